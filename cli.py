@@ -4,25 +4,35 @@ CLI tool for Amazon Smart Agent
 Allows manual scanning for arbitrage opportunities
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import argparse
 import logging
-import json
+import io
+import csv
+import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple, TextIO, TYPE_CHECKING
 import time
-from tabulate import tabulate
+import asyncio
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cached_property
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.retail_scanners import RetailProduct, WalmartScanner, TargetScanner, DollarTreeScanner, EbayScanner
-from src.amazon import AmazonProduct, AmazonProductAPI, AmazonScraper
-from src.profit_calculator import ArbitrageOpportunity, ProfitCalculator
-from src.product_filter import ProductFilter, SalesRankAnalyzer
-from src.database import ProductDatabase
-from src.listing_generator import ListingContentGenerator
+# Application components are imported where they are first needed, so that
+# `cli.py --help` does not pay for loading scanners, OpenAI, NLTK, etc.
+if TYPE_CHECKING:
+    from src.retail_scanners import RetailProduct, RetailScanner
+    from src.amazon import AmazonProduct
+    from src.profit_calculator import ArbitrageOpportunity
+    from src.product_filter import SalesRankAnalyzer
+    from src.listing_generator import ListingContentGenerator
+    from requests.adapters import HTTPAdapter
 
 # Configure logging
 logging.basicConfig(
@@ -36,25 +46,146 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def _match_key(product: RetailProduct) -> str:
+    """Key under which a retail product's Amazon match is stored"""
+    return product.upc or product.sku or product.product_id
+
+
+def _dedupe_products(products: List[RetailProduct]) -> List[RetailProduct]:
+    """
+    Drop cross-listed duplicates, keeping the cheapest listing of each product
+    
+    Products are the same if they share a UPC, else a SKU, else a normalized title.
+    """
+    from src.amazon import normalize_query
+    
+    unique: Dict[str, RetailProduct] = {}
+    for product in products:
+        key = product.upc or product.sku or normalize_query(product.title)
+        if key not in unique or product.price < unique[key].price:
+            unique[key] = product
+    
+    return list(unique.values())
+
+
+def _format_grid(rows: List[Sequence[Any]], headers: List[str]) -> str:
+    """
+    Format rows as a grid table in the layout of tabulate's 'grid' format
+    
+    Columns whose cells are all numbers are right-aligned, others left-aligned.
+    
+    Args:
+        rows: Table rows, one value per header
+        headers: Column headers
+        
+    Returns:
+        Table as a string, without a trailing newline
+    """
+    cells = [tuple(map(str, row)) for row in rows]
+    numeric = [
+        all(isinstance(row[i], (int, float)) for row in rows) and bool(rows)
+        for i in range(len(headers))
+    ]
+    widths = [
+        max([len(header) + 2] + [len(row[i]) for row in cells])
+        for i, header in enumerate(headers)
+    ]
+    
+    def format_row(values: List[str]) -> str:
+        return '| ' + ' | '.join(
+            value.rjust(width) if is_numeric else value.ljust(width)
+            for value, width, is_numeric in zip(values, widths, numeric)
+        ) + ' |'
+    
+    line = '+' + '+'.join('-' * (width + 2) for width in widths) + '+'
+    header_line = '+' + '+'.join('=' * (width + 2) for width in widths) + '+'
+    
+    lines = [line, format_row(headers), header_line]
+    for row in cells:
+        lines.append(format_row(row))
+        lines.append(line)
+    if not cells:
+        lines.append(line)
+    
+    return '\n'.join(lines)
+
+
+class ScannerRegistry(Mapping):
+    """Mapping of store name to retail scanner that creates each scanner on first access"""
+    
+    SCANNER_CLASSES = {
+        'walmart': 'WalmartScanner',
+        'target': 'TargetScanner',
+        'dollartree': 'DollarTreeScanner',
+        'ebay': 'EbayScanner'
+    }
+    
+    def __init__(self, http_adapter: Optional[HTTPAdapter] = None):
+        self.http_adapter = http_adapter
+        self._scanners: Dict[str, RetailScanner] = {}
+    
+    def __getitem__(self, name: str) -> RetailScanner:
+        if name not in self.SCANNER_CLASSES:
+            raise KeyError(name)
+        
+        scanner = self._scanners.get(name)
+        if scanner is None:
+            import src.retail_scanners as retail_scanners
+            scanner = getattr(retail_scanners, self.SCANNER_CLASSES[name])(http_adapter=self.http_adapter)
+            self._scanners[name] = scanner
+        return scanner
+    
+    def __iter__(self):
+        return iter(self.SCANNER_CLASSES)
+    
+    def __len__(self) -> int:
+        return len(self.SCANNER_CLASSES)
+
+
 class AmazonSmartAgentCLI:
     """Command-line interface for Amazon Smart Agent"""
     
+    # Maximum number of rows rendered in a single table
+    TABLE_PAGE_SIZE = 1000
+    
     def __init__(self):
         """Initialize CLI tool"""
-        # Initialize components
+        from src.amazon import AmazonProductAPI, AmazonScraper, TTLCache
+        from src.profit_calculator import ProfitCalculator
+        from src.product_filter import ProductFilter
+        from src.database import ProductDatabase
+        from src.utils import create_http_adapter
+        
+        # Initialize components; the listing generator, sales rank analyzer
+        # and scanners are only needed by some commands and are created on first use
         self.db = ProductDatabase()
         self.profit_calculator = ProfitCalculator()
         self.product_filter = ProductFilter()
-        self.sales_rank_analyzer = SalesRankAnalyzer()
-        self.listing_generator = ListingContentGenerator()
         
         # Initialize scanners
-        self.scanners = {
-            'walmart': WalmartScanner(),
-            'target': TargetScanner(),
-            'dollartree': DollarTreeScanner(),
-            'ebay': EbayScanner()
-        }
+        # Retail scanners and the Amazon scraper share one keep-alive connection pool
+        self.http_adapter = create_http_adapter()
+        self.scanners = ScannerRegistry(self.http_adapter)
+        
+        # Cache Amazon lookups across scans; retail catalogs overlap heavily
+        self.amazon_cache = TTLCache(
+            maxsize=10000,
+            ttl=float(os.getenv('AMAZON_CACHE_TTL', 6 * 60 * 60)),
+            path=os.getenv('AMAZON_CACHE_PATH', os.path.join('.cache', 'amazon.db'))
+        )
+        
+        # Compiled brand-stripping patterns, keyed by brand
+        self._brand_re_cache: Dict[str, re.Pattern] = {}
+        
+        # Print per-product progress
+        self.verbose = os.getenv('AGENT_VERBOSE', '0').lower() in ('1', 'true')
+        
+        # Maximum number of concurrent Amazon requests
+        self.amazon_max_workers = int(os.getenv('AMAZON_MAX_WORKERS', '16'))
+        
+        # Retail price cutoffs below which products are not looked up on Amazon
+        self.min_retail_price = float(os.getenv('MIN_RETAIL_PRICE', '0.5'))
+        self.max_amazon_markup = float(os.getenv('MAX_AMAZON_MARKUP', '5.0'))
         
         # Initialize Amazon API client
         amazon_access_key = os.getenv('AMAZON_ACCESS_KEY')
@@ -62,13 +193,33 @@ class AmazonSmartAgentCLI:
         amazon_associate_tag = os.getenv('AMAZON_ASSOCIATE_TAG')
         amazon_region = os.getenv('AMAZON_REGION', 'US')
         
+        # Product details are kept on disk by the client, behind its memory cache
+        amazon_product_cache_path = os.getenv(
+            'AMAZON_PRODUCT_CACHE_PATH', os.path.join('.cache', 'amazon_products.db')
+        )
+        
         if amazon_access_key and amazon_secret_key and amazon_associate_tag:
             self.amazon_client = AmazonProductAPI(
-                amazon_access_key, amazon_secret_key, amazon_associate_tag, amazon_region
+                amazon_access_key, amazon_secret_key, amazon_associate_tag, amazon_region,
+                cache_path=amazon_product_cache_path
             )
         else:
             logger.warning("Amazon API credentials not found, using scraper as fallback")
-            self.amazon_client = AmazonScraper()
+            self.amazon_client = AmazonScraper(self.http_adapter, cache_path=amazon_product_cache_path)
+    
+    @cached_property
+    def sales_rank_analyzer(self) -> SalesRankAnalyzer:
+        """Sales rank analyzer, only used when filtering scan results"""
+        from src.product_filter import SalesRankAnalyzer
+        return SalesRankAnalyzer()
+    
+    @cached_property
+    def listing_generator(self) -> ListingContentGenerator:
+        """Listing generator, only used by the generate command"""
+        from src.listing_generator import get_default_generator
+        return get_default_generator(
+            cache_path=os.getenv('LISTING_CACHE_PATH', os.path.join('.cache', 'listings.db'))
+        )
     
     def scan(self, store: str, category: str = None, discount: float = 0.0, 
              limit: int = 100, min_roi: float = 40.0, max_reviews: int = 20,
@@ -88,7 +239,7 @@ class AmazonSmartAgentCLI:
         Returns:
             List of arbitrage opportunities
         """
-        logger.info(f"Starting scan for store: {store}, category: {category}, discount: {discount}%")
+        logger.info("Starting scan for store: %s, category: %s, discount: %s%%", store, category, discount)
         
         # Step 1: Get retail products
         print(f"Step 1/4: Retrieving products from retail stores...")
@@ -101,9 +252,12 @@ class AmazonSmartAgentCLI:
         
         print(f"Found {len(retail_products)} retail products.")
         
+        # The same product is often listed by several stores; look it up once
+        retail_products = _dedupe_products(retail_products)
+        
         # Step 2: Get Amazon products
         print(f"Step 2/4: Checking products on Amazon...")
-        amazon_products = self._get_amazon_products(retail_products)
+        amazon_products = self._get_amazon_products(retail_products, min_roi)
         
         if not amazon_products:
             logger.warning("No matching Amazon products found")
@@ -140,7 +294,7 @@ class AmazonSmartAgentCLI:
         self._save_opportunities(filtered_opportunities)
         
         # Format and display results
-        results = self._format_results(filtered_opportunities, output_format)
+        self._format_results(filtered_opportunities, output_format)
         
         return filtered_opportunities
     
@@ -155,127 +309,238 @@ class AmazonSmartAgentCLI:
         try:
             # Get products from selected store(s)
             if store == "all":
-                # Scan all stores
-                for scanner_name, scanner in self.scanners.items():
-                    try:
-                        logger.info(f"Scanning {scanner_name}...")
-                        if discount > 0:
-                            store_products = scanner.search_discounted(
-                                min_discount=discount,
-                                category=category_param,
-                                limit=limit // len(self.scanners)  # Divide limit among stores
-                            )
-                        else:
-                            store_products = scanner.search_clearance(
-                                category=category_param,
-                                limit=limit // len(self.scanners)  # Divide limit among stores
-                            )
-                        
-                        products.extend(store_products)
-                        logger.info(f"Found {len(store_products)} products from {scanner_name}")
-                    except Exception as e:
-                        logger.error(f"Error scanning {scanner_name}: {e}")
-                        print(f"Error scanning {scanner_name}: {e}")
+                # Split the limit evenly, then hand the shortfall from stores
+                # that ran dry to stores that filled their quota. Scanners have
+                # no offset, so the second round re-requests a larger limit.
+                quotas = {scanner_name: limit // len(self.scanners) for scanner_name in self.scanners}
+                store_results = self._scan_stores(quotas, category_param, discount)
+                
+                shortfall = limit - sum(len(results) for results in store_results.values())
+                capped = [
+                    scanner_name for scanner_name in self.scanners
+                    if len(store_results.get(scanner_name, [])) >= quotas[scanner_name]
+                ]
+                if shortfall > 0 and capped:
+                    extra, remainder = divmod(shortfall, len(capped))
+                    second_quotas = {
+                        scanner_name: quotas[scanner_name] + extra + (1 if i < remainder else 0)
+                        for i, scanner_name in enumerate(capped)
+                    }
+                    logger.info("Redistributing %d products of quota to %s", shortfall, ', '.join(capped))
+                    for scanner_name, results in self._scan_stores(second_quotas, category_param, discount).items():
+                        if len(results) > len(store_results[scanner_name]):
+                            store_results[scanner_name] = results
+                
+                # Keep results in registry order regardless of completion order
+                for scanner_name in self.scanners:
+                    products.extend(store_results.get(scanner_name, []))
             else:
                 # Scan selected store
                 scanner = self.scanners.get(store)
                 if scanner:
-                    logger.info(f"Scanning {store}...")
-                    if discount > 0:
-                        products = scanner.search_discounted(
-                            min_discount=discount,
-                            category=category_param,
-                            limit=limit
-                        )
-                    else:
-                        products = scanner.search_clearance(
-                            category=category_param,
-                            limit=limit
-                        )
-                    logger.info(f"Found {len(products)} products from {store}")
+                    products = self._scan_store(store, scanner, category_param, discount, limit)
                 else:
-                    logger.error(f"Invalid store: {store}")
+                    logger.error("Invalid store: %s", store)
                     print(f"Invalid store: {store}")
         except Exception as e:
-            logger.error(f"Error getting retail products: {e}")
+            logger.error("Error getting retail products: %s", e)
             print(f"Error getting retail products: {e}")
         
         return products
     
-    def _get_amazon_products(self, retail_products: List[RetailProduct]) -> Dict[str, AmazonProduct]:
-        """Get matching Amazon products"""
+    def _scan_stores(self, quotas: Dict[str, int], category: Optional[str],
+                     discount: float) -> Dict[str, List[RetailProduct]]:
+        """Scan several stores concurrently, each up to its own limit; failed stores are omitted"""
+        store_results = {}
+        
+        # Each scan is an independent HTTP scrape
+        with ThreadPoolExecutor(max_workers=len(quotas)) as executor:
+            futures = {
+                executor.submit(self._scan_store, scanner_name, self.scanners[scanner_name],
+                                category, discount, store_limit): scanner_name
+                for scanner_name, store_limit in quotas.items()
+            }
+            
+            for future in as_completed(futures):
+                scanner_name = futures[future]
+                try:
+                    store_results[scanner_name] = future.result()
+                except Exception as e:
+                    logger.error("Error scanning %s: %s", scanner_name, e)
+                    print(f"Error scanning {scanner_name}: {e}")
+        
+        return store_results
+    
+    def _scan_store(self, scanner_name: str, scanner: RetailScanner, category: Optional[str],
+                    discount: float, limit: int) -> List[RetailProduct]:
+        """Get discounted or clearance products from a single store"""
+        logger.info("Scanning %s...", scanner_name)
+        if discount > 0:
+            store_products = scanner.search_discounted(
+                min_discount=discount,
+                category=category,
+                limit=limit
+            )
+        else:
+            store_products = scanner.search_clearance(
+                category=category,
+                limit=limit
+            )
+        logger.info("Found %s products from %s", len(store_products), scanner_name)
+        return store_products
+    
+    def _get_amazon_products(self, retail_products: List[RetailProduct],
+                             min_roi: Optional[float] = None) -> Dict[str, AmazonProduct]:
+        """
+        Get matching Amazon products, keyed by each retail product's _match_key
+        
+        When min_roi is given, products too cheap to reach it at a plausible
+        Amazon markup are skipped. This saves Amazon calls on clearance scans
+        at the cost of missing the rare product that sells above that markup.
+        """
+        from src.amazon import normalize_query
+        
+        if min_roi is not None:
+            cutoff = max(
+                self.min_retail_price,
+                self.profit_calculator.min_retail_price_for_roi(min_roi, self.max_amazon_markup)
+            )
+            retail_products = [product for product in retail_products if product.price >= cutoff]
+            logger.info("Looking up %d products priced at least $%.2f", len(retail_products), cutoff)
+        
         amazon_products = {}
         total = len(retail_products)
         
-        for i, product in enumerate(retail_products):
-            try:
-                # Show progress
-                if i % 5 == 0 or i == total - 1:
-                    print(f"Checking Amazon for product {i+1}/{total}...")
-                
-                # Try to find by UPC first
-                if product.upc:
-                    results = self.amazon_client.search_products(f"upc:{product.upc}", limit=1)
-                    if results:
-                        amazon_products[product.upc] = results[0]
-                        continue
+        # Try to find by UPC first, then by SKU, then by title; each pass
+        # only covers the products the previous passes failed to match
+        remaining = retail_products
+        
+        for id_field in ('upc', 'sku'):
+            queries: Dict[str, List[RetailProduct]] = {}
+            for product in remaining:
+                identifier = getattr(product, id_field)
+                if identifier:
+                    queries.setdefault(f"{id_field}:{identifier}", []).append(product)
+            
+            # Serve previously seen identifiers from the cache
+            misses = []
+            for query, products in queries.items():
+                hit, amazon_product = self.amazon_cache.get(normalize_query(query))
+                if not hit:
+                    misses.append(query)
+                elif amazon_product:
+                    for product in products:
+                        amazon_products[_match_key(product)] = amazon_product
+            
+            if misses:
+                print(f"Checking Amazon for {len(misses)} products by {id_field.upper()}...")
+                try:
+                    results = self.amazon_client.search_products_batch(misses)
+                except Exception as e:
+                    logger.error("Error getting Amazon products by %s: %s", id_field.upper(), e)
+                    print(f"Error checking Amazon by {id_field.upper()}: {e}")
+                    results = None
                 
-                # Try to find by SKU
-                if product.sku:
-                    results = self.amazon_client.search_products(f"sku:{product.sku}", limit=1)
-                    if results:
-                        amazon_products[product.sku] = results[0]
-                        continue
-                
-                # Try to find by title
-                # Remove brand name from title to improve search
-                search_title = product.title
-                if product.brand and product.brand in product.title:
-                    search_title = product.title.replace(product.brand, "").strip()
-                
-                results = self.amazon_client.search_products(search_title, limit=1)
-                if results:
-                    # Use product ID as key
-                    amazon_products[product.product_id] = results[0]
+                if results is not None:
+                    # Remember misses too, so unmatched identifiers are not re-queried
+                    self.amazon_cache.set_many(
+                        (normalize_query(query), results.get(query)) for query in misses
+                    )
+                    for query in misses:
+                        amazon_product = results.get(query)
+                        if amazon_product:
+                            for product in queries[query]:
+                                amazon_products[_match_key(product)] = amazon_product
             
-            except Exception as e:
-                logger.error(f"Error getting Amazon product for {product.title}: {e}")
-                print(f"Error checking Amazon for {product.title}: {e}")
+            remaining = [product for product in remaining if _match_key(product) not in amazon_products]
         
+        # Try to find by title; there is no batch form of keyword search,
+        # so overlap the individual requests on one event loop
+        if remaining:
+            amazon_products.update(asyncio.run(self._lookup_titles(remaining)))
+        
+        logger.info("Matched %s of %s retail products on Amazon", len(amazon_products), total)
         return amazon_products
     
-    def _calculate_opportunities(self, retail_products: List[RetailProduct], 
-                               amazon_products: Dict[str, AmazonProduct]) -> List[ArbitrageOpportunity]:
-        """Calculate arbitrage opportunities"""
-        opportunities = []
+    async def _lookup_titles(self, products: List[RetailProduct]) -> Dict[str, AmazonProduct]:
+        """Search Amazon for many retail products by title, at most amazon_max_workers at a time"""
+        semaphore = asyncio.Semaphore(self.amazon_max_workers)
+        amazon_products = {}
+        completed = 0
         
-        for retail_product in retail_products:
-            try:
-                # Find matching Amazon product
-                amazon_product = None
+        try:
+            lookups = [self._lookup_one(product, semaphore) for product in products]
+            for lookup in asyncio.as_completed(lookups):
+                completed += 1
                 
-                if retail_product.upc and retail_product.upc in amazon_products:
-                    amazon_product = amazon_products[retail_product.upc]
-                elif retail_product.sku and retail_product.sku in amazon_products:
-                    amazon_product = amazon_products[retail_product.sku]
-                elif retail_product.product_id in amazon_products:
-                    amazon_product = amazon_products[retail_product.product_id]
+                # Show progress
+                if self.verbose and (completed % 5 == 0 or completed == len(products)):
+                    print(f"Checked Amazon for {completed}/{len(products)} products by title...")
                 
+                key, amazon_product = await lookup
                 if amazon_product:
-                    # Calculate opportunity
-                    opportunity = self.profit_calculator.calculate_opportunity(
-                        retail_product=retail_product,
-                        amazon_product=amazon_product,
-                        fulfillment_method='FBA'  # Default to FBA
-                    )
-                    
-                    opportunities.append(opportunity)
-            
+                    amazon_products[key] = amazon_product
+        finally:
+            await self.amazon_client.aclose()
+        
+        return amazon_products
+    
+    async def _lookup_one(self, product: RetailProduct,
+                          semaphore: asyncio.Semaphore) -> Tuple[str, Optional[AmazonProduct]]:
+        """Search Amazon for a retail product by title"""
+        from src.amazon import normalize_query
+        
+        # Remove brand name from title to improve search
+        search_title = product.title
+        if product.brand:
+            search_title = self._strip_brand(product.title, product.brand) or product.title
+        
+        # Identifier keys normalize to e.g. "upc 123", so prefix title keys to keep them apart
+        cache_key = f"title:{normalize_query(search_title)}"
+        hit, amazon_product = await asyncio.to_thread(self.amazon_cache.get, cache_key)
+        if not hit:
+            try:
+                async with semaphore:
+                    results = await self.amazon_client.search_products_async(search_title, limit=1)
             except Exception as e:
-                logger.error(f"Error calculating opportunity for {retail_product.title}: {e}")
-                print(f"Error calculating opportunity for {retail_product.title}: {e}")
+                logger.error("Error getting Amazon product for %s: %s", product.title, e)
+                print(f"Error checking Amazon for {product.title}: {e}")
+                return _match_key(product), None
+            
+            amazon_product = results[0] if results else None
+            await asyncio.to_thread(self.amazon_cache.set, cache_key, amazon_product)
+        
+        return _match_key(product), amazon_product
+    
+    def _strip_brand(self, title: str, brand: str) -> str:
+        """Remove every case-insensitive whole-word occurrence of brand from title"""
+        pattern = self._brand_re_cache.get(brand)
+        if pattern is None:
+            pattern = self._brand_re_cache.setdefault(
+                brand, re.compile(rf'(?<!\w){re.escape(brand.strip())}(?!\w)', re.IGNORECASE)
+            )
+        return ' '.join(pattern.sub(' ', title).split())
+    
+    def _calculate_opportunities(self, retail_products: List[RetailProduct], 
+                               amazon_products: Dict[str, AmazonProduct]) -> List[ArbitrageOpportunity]:
+        """Calculate arbitrage opportunities"""
+        # Find matching Amazon products
+        pairs = [
+            (retail_product, amazon_product)
+            for retail_product in retail_products
+            if (amazon_product := amazon_products.get(_match_key(retail_product)))
+        ]
         
-        return opportunities
+        try:
+            # Calculate opportunities
+            return self.profit_calculator.calculate_opportunities_bulk(
+                pairs,
+                fulfillment_method='FBA'  # Default to FBA
+            )
+        except Exception as e:
+            logger.error("Error calculating opportunities: %s", e)
+            print(f"Error calculating opportunities: {e}")
+            return []
     
     def _filter_opportunities(self, opportunities: List[ArbitrageOpportunity], 
                              min_roi: float = 40.0, max_reviews: int = 20) -> List[ArbitrageOpportunity]:
@@ -297,82 +562,114 @@ class AmazonSmartAgentCLI:
         """Save opportunities to database"""
         try:
             self.db.add_opportunities(opportunities)
-            logger.info(f"Saved {len(opportunities)} opportunities to database")
+            logger.info("Saved %s opportunities to database", len(opportunities))
         except Exception as e:
-            logger.error(f"Error saving opportunities to database: {e}")
+            logger.error("Error saving opportunities to database: %s", e)
             print(f"Error saving opportunities to database: {e}")
     
     def _format_results(self, opportunities: List[ArbitrageOpportunity], 
-                       output_format: str = 'table') -> str:
-        """Format results for display"""
+                       output_format: str = 'table', out: Optional[TextIO] = None,
+                       to_str: bool = False) -> Optional[str]:
+        """
+        Format results for display, writing them to out (stdout by default) row by row
+        
+        Args:
+            opportunities: Opportunities to format
+            output_format: Output format ('table', 'json', 'csv')
+            out: Stream to write to
+            to_str: Return the formatted output as a string instead of writing it
+            
+        Returns:
+            Formatted output if to_str, otherwise None
+        """
+        if to_str:
+            buffer = io.StringIO()
+            self._format_results(opportunities, output_format, out=buffer)
+            return buffer.getvalue()
+        
         if not opportunities:
-            return "No opportunities found."
+            return None
         
-        if output_format == 'json':
-            # Convert to JSON
-            results = []
-            for opp in opportunities:
-                results.append({
-                    'retail_product': {
-                        'title': opp.retail_product.title,
-                        'store': opp.retail_product.store,
-                        'price': opp.retail_product.price,
-                        'url': opp.retail_product.url
-                    },
-                    'amazon_product': {
-                        'title': opp.amazon_product.title,
-                        'asin': opp.amazon_product.asin,
-                        'price': opp.amazon_product.price,
-                        'sales_rank': opp.amazon_product.sales_rank,
-                        'review_count': opp.amazon_product.review_count,
-                        'url': opp.amazon_product.url
-                    },
-                    'profit': opp.profit,
-                    'roi': opp.roi,
-                    'fulfillment_method': opp.fulfillment_method
-                })
-            
-            print(json.dumps(results, indent=2))
-            return json.dumps(results, indent=2)
+        out = out or sys.stdout
         
-        elif output_format == 'csv':
-            # Create CSV
-            csv_lines = ['Title,Store,Buy Price,Amazon Price,Profit,ROI,ASIN,Reviews,Sales Rank,URL']
-            
-            for opp in opportunities:
-                csv_lines.append(
-                    f'"{opp.retail_product.title}",{opp.retail_product.store},{opp.retail_product.price:.2f},'
-                    f'{opp.amazon_product.price:.2f},{opp.profit:.2f},{opp.roi:.1f}%,{opp.amazon_product.asin},'
-                    f'{opp.amazon_product.review_count or 0},{opp.amazon_product.sales_rank or 0},{opp.retail_product.url}'
-                )
+        if output_format == 'json':
+            import orjson
             
-            csv_output = '\n'.join(csv_lines)
-            print(csv_output)
-            return csv_output
+            # Write a JSON array one element at a time
+            out.write('[')
+            for i, opp in enumerate(opportunities):
+                item = orjson.dumps(self._opportunity_to_dict(opp), option=orjson.OPT_INDENT_2).decode()
+                out.write(',\n  ' if i else '\n  ')
+                out.write(item.replace('\n', '\n  '))
+            out.write('\n]\n')
         
-        else:  # table format
-            # Create table
-            table_data = []
-            
-            for opp in opportunities:
-                table_data.append([
-                    opp.retail_product.title[:40] + ('...' if len(opp.retail_product.title) > 40 else ''),
+        elif output_format == 'csv':
+            # Write CSV rows as they are produced
+            writer = csv.writer(out, lineterminator='\n')
+            writer.writerow(['Title', 'Store', 'Buy Price', 'Amazon Price', 'Profit', 'ROI', 'ASIN', 'Reviews', 'Sales Rank', 'URL'])
+            writer.writerows(
+                (
+                    opp.retail_product.title,
                     opp.retail_product.store,
-                    f"${opp.retail_product.price:.2f}",
-                    f"${opp.amazon_product.price:.2f}",
-                    f"${opp.profit:.2f}",
+                    f"{opp.retail_product.price:.2f}",
+                    f"{opp.amazon_product.price:.2f}",
+                    f"{opp.profit:.2f}",
                     f"{opp.roi:.1f}%",
                     opp.amazon_product.asin,
-                    opp.amazon_product.review_count or 'N/A',
-                    opp.amazon_product.sales_rank or 'N/A'
-                ])
-            
+                    opp.amazon_product.review_count or 0,
+                    opp.amazon_product.sales_rank or 0,
+                    opp.retail_product.url
+                )
+                for opp in opportunities
+            )
+        
+        else:  # table format
             headers = ['Title', 'Store', 'Buy Price', 'Amazon Price', 'Profit', 'ROI', 'ASIN', 'Reviews', 'Sales Rank']
-            table = tabulate(table_data, headers=headers, tablefmt='grid')
             
-            print("\nArbitrage Opportunities:\n")
-            print(table)
-            return table
+            out.write("\nArbitrage Opportunities:\n\n")
+            
+            # Column widths depend on every row, so large results are paged
+            for start in range(0, len(opportunities), self.TABLE_PAGE_SIZE):
+                page = opportunities[start:start + self.TABLE_PAGE_SIZE]
+                table_data = [
+                    (
+                        title if len(title := retail.title) <= 40 else title[:40] + '...',
+                        retail.store,
+                        f"${retail.price:.2f}",
+                        f"${amazon.price:.2f}",
+                        f"${opp.profit:.2f}",
+                        f"{opp.roi:.1f}%",
+                        amazon.asin,
+                        amazon.review_count or 'N/A',
+                        amazon.sales_rank or 'N/A'
+                    )
+                    for opp in page
+                    for retail, amazon in ((opp.retail_product, opp.amazon_product),)
+                ]
+                out.write(_format_grid(table_data, headers))
+                out.write('\n')
+    
+    def _opportunity_to_dict(self, opp: ArbitrageOpportunity) -> Dict[str, Any]:
+        """Convert an opportunity to a JSON-serializable dictionary"""
+        return {
+            'retail_product': {
+                'title': opp.retail_product.title,
+                'store': opp.retail_product.store,
+                'price': opp.retail_product.price,
+                'url': opp.retail_product.url
+            },
+            'amazon_product': {
+                'title': opp.amazon_product.title,
+                'asin': opp.amazon_product.asin,
+                'price': opp.amazon_product.price,
+                'sales_rank': opp.amazon_product.sales_rank,
+                'review_count': opp.amazon_product.review_count,
+                'url': opp.amazon_product.url
+            },
+            'profit': opp.profit,
+            'roi': opp.roi,
+            'fulfillment_method': opp.fulfillment_method
+        }
     
     def generate_listing(self, opportunity_id: int, output_dir: str = None) -> Optional[str]:
         """
@@ -390,7 +687,7 @@ class AmazonSmartAgentCLI:
             opportunity = self.db.get_opportunity_by_id(opportunity_id)
             
             if not opportunity:
-                logger.error(f"Opportunity #{opportunity_id} not found")
+                logger.error("Opportunity #%s not found", opportunity_id)
                 print(f"Opportunity #{opportunity_id} not found")
                 return None
             
@@ -414,14 +711,14 @@ class AmazonSmartAgentCLI:
                 output_dir=output_dir
             )
             
-            logger.info(f"Generated listing for opportunity #{opportunity_id}")
+            logger.info("Generated listing for opportunity #%s", opportunity_id)
             print(f"Generated listing saved to: {listing_file}")
             print(f"HTML preview saved to: {preview_file}")
             
             return preview_file
         
         except Exception as e:
-            logger.error(f"Error generating listing: {e}")
+            logger.error("Error generating listing: %s", e)
             print(f"Error generating listing: {e}")
             return None
     
@@ -438,22 +735,35 @@ class AmazonSmartAgentCLI:
         Returns:
             List of arbitrage opportunities
         """
+        from src.profit_calculator import ArbitrageOpportunity
+        
         try:
             # Get opportunities from database
             opportunities = self.db.get_opportunities(min_roi=min_roi, limit=limit)
             
             if not opportunities:
-                logger.warning(f"No opportunities found with {min_roi}%+ ROI")
+                logger.warning("No opportunities found with %s%%+ ROI", min_roi)
                 print(f"No opportunities found with {min_roi}%+ ROI")
                 return []
             
-            # Format and display results
-            self._format_results(opportunities, output_format)
+            # Format and display results; stored opportunities without costs cannot be shown
+            self._format_results(
+                [
+                    ArbitrageOpportunity(
+                        retail_product=opp['retail_product'],
+                        amazon_product=opp['amazon_product'],
+                        costs=opp['costs'],
+                        fulfillment_method=opp['fulfillment_method']
+                    )
+                    for opp in opportunities if opp['costs']
+                ],
+                output_format
+            )
             
             return opportunities
         
         except Exception as e:
-            logger.error(f"Error listing opportunities: {e}")
+            logger.error("Error listing opportunities: %s", e)
             print(f"Error listing opportunities: {e}")
             return []
     
@@ -472,7 +782,7 @@ class AmazonSmartAgentCLI:
             opportunity = self.db.get_opportunity_by_id(opportunity_id)
             
             if not opportunity:
-                logger.error(f"Opportunity #{opportunity_id} not found")
+                logger.error("Opportunity #%s not found", opportunity_id)
                 print(f"Opportunity #{opportunity_id} not found")
                 return None
             
@@ -549,7 +859,7 @@ class AmazonSmartAgentCLI:
             return opportunity
         
         except Exception as e:
-            logger.error(f"Error showing opportunity: {e}")
+            logger.error("Error showing opportunity: %s", e)
             print(f"Error showing opportunity: {e}")
             return None
 
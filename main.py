@@ -30,11 +30,6 @@ def main():
     """Main entry point for the application"""
     logger.info("Starting Amazon Smart Agent - Arbitrage Bot")
     
-    # Import modules here to avoid circular imports
-    from src.cli import cli_app
-    from src.telegram_bot import bot_app
-    from src.web_dashboard import dashboard_app
-    
     # Parse command line arguments
     import argparse
     parser = argparse.ArgumentParser(description='Amazon Smart Agent - Arbitrage Bot')
@@ -45,16 +40,20 @@ def main():
     args = parser.parse_args()
     
     # Run components based on arguments
+    # Components are imported only when selected, since each pulls in heavy dependencies
     if args.cli or args.all:
         logger.info("Starting CLI tool")
+        from src.cli import cli_app
         cli_app.run()
     
     if args.telegram or args.all:
         logger.info("Starting Telegram bot")
+        from src.telegram_bot import bot_app
         bot_app.run()
     
     if args.dashboard or args.all:
         logger.info("Starting web dashboard")
+        from src.web_dashboard import dashboard_app
         dashboard_app.run()
     
     # If no arguments provided, show help
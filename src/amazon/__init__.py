@@ -1,12 +1,16 @@
 """
 Amazon module initialization file
-Makes Amazon API client and scraper available for import
+Makes Amazon API client, scraper and lookup cache available for import
 """
 
-from .amazon_api import AmazonProduct, AmazonProductAPI, AmazonScraper
+from .amazon_api import AmazonAPIError, AmazonProduct, AmazonProductAPI, AmazonScraper
+from .cache import TTLCache, normalize_query
 
 __all__ = [
+    'AmazonAPIError',
     'AmazonProduct',
     'AmazonProductAPI',
-    'AmazonScraper'
+    'AmazonScraper',
+    'TTLCache',
+    'normalize_query'
 ]
@@ -4,20 +4,230 @@ Provides functionality to check Amazon product prices, sales ranks, and other de
 """
 
 import os
+import re
 import logging
 import json
 import time
+import io
 import random
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import threading
+from types import MappingProxyType
+from urllib.error import HTTPError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, ClassVar, Iterator, Optional, Sequence, Tuple
 from dataclasses import dataclass
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import bottlenose
-from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
+import numpy as np
+import orjson
+from lxml import etree
+from lxml import html as lxml_html
+
+from .cache import TTLCache
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, async searches fall back to threads
+    httpx = None
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Connection pool shared by every AmazonScraper that is not given its own
+# adapter, so keep-alive connections to Amazon survive across instances
+_SCRAPER_ADAPTER = HTTPAdapter(
+    pool_connections=50,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+)
+
+
+def _xpath_expression(path: str) -> str:
+    """
+    Translate a relative element path into a namespace-agnostic XPath expression
+    
+    API responses may or may not declare the AWSECommerceService namespace,
+    so each step matches on the local element name. A leading ".//" searches
+    all descendants, as in ElementTree's find.
+    """
+    descendant = path.startswith('.//')
+    steps = path[3:].split('/') if descendant else path.split('/')
+    expression = '/'.join(f"*[local-name()='{step}']" for step in steps)
+    return ('.//' if descendant else './') + expression
+
+
+def _xpath(path: str) -> etree.XPath:
+    """Compile a relative element path into a namespace-agnostic XPath"""
+    return etree.XPath(_xpath_expression(path))
+
+
+def _local_name(element: etree._Element) -> str:
+    """Return an element's tag without its namespace"""
+    return element.tag.rpartition('}')[2]
+
+
+# Compiled once; evaluating them does not walk the tree in Python
+_XP_ERROR_CODE = _xpath('Code')
+_XP_ERROR_MESSAGE = _xpath('Message')
+_XP_OFFER_PRICE = _xpath('.//Offers/Offer/OfferListing/Price/Amount')
+_XP_LOWEST_NEW_PRICE = _xpath('.//OfferSummary/LowestNewPrice/Amount')
+_XP_LOWEST_USED_PRICE = _xpath('.//OfferSummary/LowestUsedPrice/Amount')
+_XP_TOTAL_NEW = _xpath('.//OfferSummary/TotalNew')
+_XP_TOTAL_USED = _xpath('.//OfferSummary/TotalUsed')
+
+
+# Item fields, keyed by the (parent, element) local names that identify them.
+# One union query returns every match in document order, so _parse_item
+# makes a single XPath call per Item instead of one per field.
+_ITEM_FIELDS = {
+    ('Item', 'ASIN'): 'asin',
+    ('ItemAttributes', 'Title'): 'title',
+    ('ListPrice', 'Amount'): 'list_price',
+    ('Price', 'Amount'): 'offer_price',
+    ('Item', 'SalesRank'): 'sales_rank',
+    ('BrowseNode', 'Name'): 'category',
+    ('LargeImage', 'URL'): 'image_url',
+    ('ItemAttributes', 'Feature'): 'feature',
+    ('EditorialReview', 'Content'): 'description',
+}
+_XP_ITEM_FIELDS = etree.XPath(' | '.join(_xpath_expression(path) for path in (
+    'ASIN',
+    './/ItemAttributes/Title',
+    './/ItemAttributes/ListPrice/Amount',
+    './/Offers/Offer/OfferListing/Price/Amount',
+    'SalesRank',
+    './/BrowseNodes/BrowseNode/Name',
+    './/LargeImage/URL',
+    './/ItemAttributes/Feature',
+    './/EditorialReviews/EditorialReview/Content',
+)))
+
+
+def _first(xpath: etree.XPath, element: etree._Element) -> Optional[etree._Element]:
+    """Return the first element matched by xpath, or None"""
+    matches = xpath(element)
+    return matches[0] if matches else None
+
+
+class AmazonAPIError(Exception):
+    """Error reported in the body of a Product Advertising API response"""
+    
+    def __init__(self, code: str, message: str):
+        super().__init__(f"{code} - {message}")
+        self.code = code
+        self.message = message
+
+
+def _find_error(response) -> Optional[AmazonAPIError]:
+    """
+    Return the first Error reported by an API response, or None
+    
+    Error-free responses are recognized by a substring test, so only
+    responses that mention an Error element are parsed, and parsing stops
+    at the first one.
+    """
+    if isinstance(response, str):
+        response = response.encode('utf-8')
+    
+    if b'Error>' not in response:
+        return None
+    
+    try:
+        for _, elem in etree.iterparse(io.BytesIO(response), events=('end',), tag='{*}Error', recover=True):
+            code = _first(_XP_ERROR_CODE, elem)
+            message = _first(_XP_ERROR_MESSAGE, elem)
+            return AmazonAPIError(code.text if code is not None else "Unknown",
+                                  message.text if message is not None else "")
+    except etree.XMLSyntaxError:
+        pass
+    
+    return None
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements with a CSS class, like the CSS selector .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Scraped page selectors, written as XPath so lxml evaluates them in C
+_SEL_SEARCH_RESULTS = etree.XPath("//div[@data-asin and @data-asin != '']")
+_SEL_RESULT_TITLE = etree.XPath(".//h2//a//span")
+_SEL_RESULT_PRICE = etree.XPath(f".//span[{_has_class('a-price')}]//span[{_has_class('a-offscreen')}]")
+_SEL_RESULT_IMAGE = etree.XPath(f".//img[{_has_class('s-image')}]")
+# Product page selectors. Pages are parsed with collect_ids, so id() is a
+# hash lookup rather than a scan of the whole document
+_SEL_TITLE = etree.XPath("id('productTitle')")
+_SEL_PRICE = etree.XPath(
+    "id('priceblock_ourprice') | id('priceblock_dealprice')"
+    f" | (//*[{_has_class('a-price')}]//*[{_has_class('a-offscreen')}])[1]"
+)
+_SEL_SALES_RANK = etree.XPath(
+    "id('productDetails_detailBullets_sections1')"
+    "//tr[.//th[contains(normalize-space(.), 'Best Sellers Rank')]]/td"
+)
+_SEL_CATEGORY = etree.XPath("id('wayfinding-breadcrumbs_feature_div')//ul//li[count(following-sibling::*) = 1]")
+_SEL_REVIEW_COUNT = etree.XPath("id('acrCustomerReviewText')")
+_SEL_RATING = etree.XPath("(//span[@data-hook='rating-out-of-text'])[1]")
+_SEL_IMAGE = etree.XPath("id('landingImage')")
+_SEL_FEATURES = etree.XPath("id('feature-bullets')//ul//li")
+_SEL_DESCRIPTION = etree.XPath("id('productDescription')")
+
+# lxml parsers serialize concurrent use, so each scraper thread gets its own
+_html_parsers = threading.local()
+
+
+def _html_parser() -> lxml_html.HTMLParser:
+    """Return this thread's HTML parser, which indexes element ids"""
+    parser = getattr(_html_parsers, 'parser', None)
+    if parser is None:
+        parser = _html_parsers.parser = lxml_html.HTMLParser(collect_ids=True, huge_tree=False)
+    return parser
+
+# Scraped text patterns
+_RE_RANK = re.compile(r'#([\d,]+)\s+in')
+_RE_REVIEWS = re.compile(r'([\d,]+)\s+ratings')
+_RE_RATING = re.compile(r'([\d.]+)\s+out of')
+
+# Patterns applied to raw page bytes, before any HTML is parsed
+_RE_JSON_LD = re.compile(rb'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+_RE_RAW_RANK = re.compile(rb'Best Sellers Rank.{0,500}?#([\d,]+)\s+in', re.S)
+
+# Removes currency signs and thousands separators from prices and counts
+_PRICE_STRIP = str.maketrans('', '', '$,')
+
+# Amazon search index for each lowercased category name
+_CATEGORY_MAP = MappingProxyType({
+    "books": "Books",
+    "electronics": "Electronics",
+    "toys": "Toys",
+    "games": "VideoGames",
+    "kitchen": "Kitchen",
+    "home": "HomeGarden",
+    "beauty": "Beauty",
+    "clothing": "Apparel",
+    "sports": "SportingGoods",
+    "office": "OfficeProducts"
+})
+
+# Approximate category thresholds (these would need to be updated regularly)
+_CATEGORY_THRESHOLDS = MappingProxyType({
+    "Books": 2000000,
+    "Electronics": 500000,
+    "Toys": 400000,
+    "VideoGames": 150000,
+    "Kitchen": 600000,
+    "HomeGarden": 800000,
+    "Beauty": 300000,
+    "Apparel": 1000000,
+    "SportingGoods": 400000,
+    "OfficeProducts": 300000,
+    # Default for unknown categories
+    "All": 1000000
+})
+
+@dataclass(slots=True)
 class AmazonProduct:
     """Data class to store Amazon product information"""
     asin: str
@@ -32,15 +242,76 @@ class AmazonProduct:
     features: Optional[List[str]] = None
     description: Optional[str] = None
     
+    # Names of the values returned by to_row, matching the amazon_products columns
+    ROW_FIELDS: ClassVar[Tuple[str, ...]] = (
+        'asin', 'title', 'price', 'sales_rank', 'category', 'review_count',
+        'rating', 'image_url', 'url', 'features', 'description'
+    )
+    
     @property
     def is_valid(self) -> bool:
         """Check if the product has valid data"""
         return self.asin and self.title and self.price > 0
+    
+    def to_row(self) -> Tuple[Any, ...]:
+        """Flatten the product for storage, in ROW_FIELDS order with features as JSON"""
+        return (
+            self.asin,
+            self.title,
+            self.price,
+            self.sales_rank,
+            self.category,
+            self.review_count,
+            self.rating,
+            self.image_url,
+            self.url,
+            orjson.dumps(self.features).decode() if self.features else None,
+            self.description
+        )
 
 class AmazonProductAPI:
     """Client for Amazon Product Advertising API"""
     
-    def __init__(self, access_key: str, secret_key: str, associate_tag: str, region: str = 'US'):
+    # Maximum number of item IDs accepted by a single ItemLookup request
+    MAX_ITEMS_PER_LOOKUP = 10
+    
+    # Item attributes that may carry the identifier used in an ItemLookup
+    ITEM_ID_TAGS = {'ASIN', 'UPC', 'UPCListElement', 'EAN', 'EANListElement', 'SKU', 'PartNumber', 'MPN'}
+    
+    # How long API responses are reused: product metadata may be kept for
+    # 24 hours, while prices change too often to keep for long
+    PRODUCT_CACHE_TTL = 24 * 60 * 60
+    PRICING_CACHE_TTL = 15 * 60
+    
+    # Adaptive request rate: starts at INITIAL_QPS, rises by QPS_INCREASE after
+    # each successful request up to MAX_QPS and halves when throttled, down to
+    # MIN_QPS, so it settles near the rate the API actually allows
+    INITIAL_QPS = 1.0
+    MIN_QPS = 0.2
+    MAX_QPS = 5.0
+    QPS_INCREASE = 0.25
+    
+    # Throttled requests are retried, at the reduced rate, up to MAX_RETRIES times
+    MAX_RETRIES = 3
+    
+    # Response groups covering the fields _parse_item extracts. Reviews only
+    # carries an iframe URL, so it is not requested; EditorialReview is added
+    # only when a caller asks for the description.
+    RESPONSE_GROUP = "ItemAttributes,SalesRank,Images"
+    DESCRIPTION_RESPONSE_GROUP = RESPONSE_GROUP + ",EditorialReview"
+    
+    def __init__(self, access_key: str, secret_key: str, associate_tag: str, region: str = 'US',
+                 cache_path: Optional[str] = None):
+        """
+        Initialize API client
+        
+        Args:
+            access_key: Product Advertising API access key
+            secret_key: Product Advertising API secret key
+            associate_tag: Associate tag the requests are made for
+            region: Marketplace region
+            cache_path: Optional SQLite file that keeps product responses across runs
+        """
         self.access_key = access_key
         self.secret_key = secret_key
         self.associate_tag = associate_tag
@@ -52,178 +323,237 @@ class AmazonProductAPI:
             self.secret_key,
             self.associate_tag,
             Region=self.region,
-            Parser=lambda text: text  # Return the raw response
+            # Return the raw response as bytes, which lxml parses without decoding
+            Parser=lambda text: text if isinstance(text, bytes) else text.encode('utf-8')
         )
         
-        # Set up error handling
-        self.error_handlers = [
-            self._handle_api_error,
-            self._handle_throttling
-        ]
+        # Request pacing state, kept across calls so later lookups start at
+        # the rate learned by earlier ones
+        self._rate = self.INITIAL_QPS
+        self._next_request = 0.0
+        self._rate_lock = threading.Lock()
+        
+        # Response caches, keyed by operation and parameters; product data
+        # changes slowly enough to be worth keeping on disk between runs
+        self.product_cache = TTLCache(maxsize=10000, ttl=self.PRODUCT_CACHE_TTL, path=cache_path)
+        self.pricing_cache = TTLCache(maxsize=10000, ttl=self.PRICING_CACHE_TTL)
+    
+    async def search_products_async(self, keywords: str, category: Optional[str] = None,
+                                    limit: int = 10) -> List[AmazonProduct]:
+        """Search for products on Amazon by keywords without blocking the event loop"""
+        # bottlenose is synchronous, so the request runs on a worker thread
+        return await asyncio.to_thread(self.search_products, keywords, category, limit)
+    
+    async def aclose(self):
+        """Release resources used by async searches"""
     
     def search_products(self, keywords: str, category: Optional[str] = None, limit: int = 10) -> List[AmazonProduct]:
         """Search for products on Amazon by keywords"""
+        cache_key = f"search:{category or ''}:{keywords}"
+        hit, products = self.product_cache.get(cache_key)
+        if hit:
+            return products[:limit]
+        
         logger.info(f"Searching Amazon products with keywords: {keywords}")
         
-        search_index = "All"
-        if category:
-            # Map category to Amazon search index if possible
-            category_map = {
-                "books": "Books",
-                "electronics": "Electronics",
-                "toys": "Toys",
-                "games": "VideoGames",
-                "kitchen": "Kitchen",
-                "home": "HomeGarden",
-                "beauty": "Beauty",
-                "clothing": "Apparel",
-                "sports": "SportingGoods",
-                "office": "OfficeProducts"
-            }
-            search_index = category_map.get(category.lower(), "All")
+        # Map category to Amazon search index if possible
+        search_index = _CATEGORY_MAP.get(category.lower(), "All") if category else "All"
         
         try:
-            response = self.amazon.ItemSearch(
+            response = self._call_with_retry(
+                self.amazon.ItemSearch,
                 SearchIndex=search_index,
                 Keywords=keywords,
-                ResponseGroup="ItemAttributes,SalesRank,Images,Reviews",
+                ResponseGroup=self.RESPONSE_GROUP,
                 Sort="salesrank"
             )
             
             # Parse the XML response
             products = self._parse_item_search_response(response)
+            self.product_cache.set(cache_key, products)
             
             # Limit the number of products
             return products[:limit]
             
         except Exception as e:
             logger.error(f"Error searching Amazon products: {e}")
-            for handler in self.error_handlers:
-                if handler(e):
-                    return self.search_products(keywords, category, limit)
             return []
     
-    def get_product_by_asin(self, asin: str) -> Optional[AmazonProduct]:
-        """Get product details by ASIN"""
+    def get_product_by_asin(self, asin: str, include_description: bool = False) -> Optional[AmazonProduct]:
+        """Get product details by ASIN, optionally with its editorial description"""
+        cache_key = f"item:{asin}:description" if include_description else f"item:{asin}"
+        hit, product = self.product_cache.get(cache_key)
+        if hit:
+            return product
+        
         logger.info(f"Getting Amazon product details for ASIN: {asin}")
         
         try:
-            response = self.amazon.ItemLookup(
+            response = self._call_with_retry(
+                self.amazon.ItemLookup,
                 ItemId=asin,
-                ResponseGroup="ItemAttributes,SalesRank,Images,Reviews,EditorialReview"
+                ResponseGroup=self.DESCRIPTION_RESPONSE_GROUP if include_description else self.RESPONSE_GROUP
             )
             
             # Parse the XML response
             products = self._parse_item_lookup_response(response)
             
-            if products:
-                return products[0]
-            return None
+            product = products[0] if products else None
+            self.product_cache.set(cache_key, product)
+            return product
             
         except Exception as e:
             logger.error(f"Error getting Amazon product details: {e}")
-            for handler in self.error_handlers:
-                if handler(e):
-                    return self.get_product_by_asin(asin)
             return None
     
     def get_products_by_asins(self, asins: List[str]) -> List[AmazonProduct]:
-        """Get multiple products by ASINs"""
+        """Get multiple products by ASINs, in the order requested"""
         logger.info(f"Getting Amazon product details for {len(asins)} ASINs")
         
-        products = []
+        found = {}
         
-        # Process in batches of 10 (API limitation)
-        for i in range(0, len(asins), 10):
-            batch_asins = asins[i:i+10]
+        # Only request each uncached ASIN once, packed into full batches
+        uncached_asins = []
+        for asin in dict.fromkeys(asins):
+            hit, product = self.product_cache.get(f"item:{asin}")
+            if not hit:
+                uncached_asins.append(asin)
+            elif product:
+                found[asin] = product
+        
+        # Process in batches of 10 (API limitation); requests are paced by _call_with_retry
+        for i in range(0, len(uncached_asins), self.MAX_ITEMS_PER_LOOKUP):
+            batch_asins = uncached_asins[i:i+self.MAX_ITEMS_PER_LOOKUP]
             try:
-                response = self.amazon.ItemLookup(
+                response = self._call_with_retry(
+                    self.amazon.ItemLookup,
                     ItemId=','.join(batch_asins),
-                    ResponseGroup="ItemAttributes,SalesRank,Images,Reviews"
+                    ResponseGroup=self.RESPONSE_GROUP
                 )
                 
                 # Parse the XML response
-                batch_products = self._parse_item_lookup_response(response)
-                products.extend(batch_products)
-                
-                # Add a small delay to avoid rate limiting
-                time.sleep(random.uniform(1.0, 2.0))
+                for product in self._parse_item_lookup_response(response):
+                    self.product_cache.set(f"item:{product.asin}", product)
+                    found[product.asin] = product
                 
             except Exception as e:
                 logger.error(f"Error getting Amazon product details for batch: {e}")
-                for handler in self.error_handlers:
-                    if handler(e):
-                        # Retry this batch
-                        batch_products = self.get_products_by_asins(batch_asins)
-                        products.extend(batch_products)
-                        break
+        
+        return [found[asin] for asin in asins if asin in found]
+    
+    def search_products_batch(self, queries: List[str]) -> Dict[str, AmazonProduct]:
+        """
+        Look up many products with as few API calls as possible
+        
+        Queries of the form "upc:<code>" or "sku:<code>" are grouped by identifier
+        type and resolved with ItemLookup, up to 10 identifiers per request.
+        Any other query is treated as keywords and searched individually.
+        
+        Args:
+            queries: List of search queries
+            
+        Returns:
+            Dictionary mapping each matched query to its best Amazon product
+        """
+        logger.info(f"Batch searching Amazon products for {len(queries)} queries")
+        
+        results = {}
+        id_queries = {'UPC': {}, 'SKU': {}}
+        keyword_queries = []
+        
+        for query in queries:
+            prefix, _, identifier = query.partition(':')
+            id_type = prefix.strip().upper()
+            if identifier and id_type in id_queries:
+                id_queries[id_type][identifier.strip()] = query
+            else:
+                keyword_queries.append(query)
+        
+        for id_type, identifiers in id_queries.items():
+            batch_results = self._lookup_products_by_ids(list(identifiers), id_type)
+            for identifier, product in batch_results.items():
+                results[identifiers[identifier]] = product
+        
+        # ItemSearch has no multi-query form, so keywords still cost one call each
+        for query in keyword_queries:
+            products = self.search_products(query, limit=1)
+            if products:
+                results[query] = products[0]
+        
+        return results
+    
+    def _lookup_products_by_ids(self, identifiers: List[str], id_type: str) -> Dict[str, AmazonProduct]:
+        """Resolve UPC/SKU identifiers in batches of 10 (API limitation)"""
+        products = {}
+        
+        for i in range(0, len(identifiers), self.MAX_ITEMS_PER_LOOKUP):
+            batch_ids = identifiers[i:i+self.MAX_ITEMS_PER_LOOKUP]
+            try:
+                response = self._call_with_retry(
+                    self.amazon.ItemLookup,
+                    ItemId=','.join(batch_ids),
+                    IdType=id_type,
+                    SearchIndex="All",
+                    ResponseGroup=self.RESPONSE_GROUP
+                )
+            except Exception as e:
+                logger.error(f"Error looking up Amazon products by {id_type}: {e}")
+                continue
+            
+            products.update(self._parse_item_lookup_by_ids(response, batch_ids))
         
         return products
     
     def get_competitive_pricing(self, asin: str) -> Dict[str, Any]:
         """Get competitive pricing information for a product"""
+        hit, pricing_info = self.pricing_cache.get(asin)
+        if hit:
+            return dict(pricing_info)
+        
         logger.info(f"Getting competitive pricing for ASIN: {asin}")
         
         try:
-            response = self.amazon.ItemLookup(
+            response = self._call_with_retry(
+                self.amazon.ItemLookup,
                 ItemId=asin,
                 ResponseGroup="Offers"
             )
             
-            # Parse the XML response
-            root = ET.fromstring(response)
-            
             # Extract pricing information
             pricing_info = {}
             
-            # Check for errors
-            errors = root.findall('.//Error')
-            if errors:
-                for error in errors:
-                    code = error.find('Code')
-                    message = error.find('Message')
-                    if code is not None and message is not None:
-                        logger.error(f"Amazon API Error: {code.text} - {message.text}")
-                return pricing_info
-            
             # Extract offers
-            items = root.findall('.//Item')
-            if not items:
-                return pricing_info
-                
-            for item in items:
+            for item in self._iter_response_items(response):
                 # Get lowest new price
-                lowest_new_price = item.find('.//OfferSummary/LowestNewPrice/Amount')
+                lowest_new_price = _first(_XP_LOWEST_NEW_PRICE, item)
                 if lowest_new_price is not None:
                     pricing_info['lowest_new_price'] = float(lowest_new_price.text) / 100
                 
                 # Get lowest used price
-                lowest_used_price = item.find('.//OfferSummary/LowestUsedPrice/Amount')
+                lowest_used_price = _first(_XP_LOWEST_USED_PRICE, item)
                 if lowest_used_price is not None:
                     pricing_info['lowest_used_price'] = float(lowest_used_price.text) / 100
                 
                 # Get total new offers
-                total_new = item.find('.//OfferSummary/TotalNew')
+                total_new = _first(_XP_TOTAL_NEW, item)
                 if total_new is not None:
                     pricing_info['total_new_offers'] = int(total_new.text)
                 
                 # Get total used offers
-                total_used = item.find('.//OfferSummary/TotalUsed')
+                total_used = _first(_XP_TOTAL_USED, item)
                 if total_used is not None:
                     pricing_info['total_used_offers'] = int(total_used.text)
                 
                 # Get buy box price if available
-                buy_box = item.find('.//Offers/Offer/OfferListing/Price/Amount')
+                buy_box = _first(_XP_OFFER_PRICE, item)
                 if buy_box is not None:
                     pricing_info['buy_box_price'] = float(buy_box.text) / 100
             
+            self.pricing_cache.set(asin, dict(pricing_info))
             return pricing_info
             
         except Exception as e:
             logger.error(f"Error getting competitive pricing: {e}")
-            for handler in self.error_handlers:
-                if handler(e):
-                    return self.get_competitive_pricing(asin)
             return {}
     
     def get_sales_rank_percentile(self, sales_rank: int, category: str) -> float:
@@ -235,23 +565,7 @@ class AmazonProductAPI:
         # In a real-world scenario, you would need category-specific data
         # to accurately calculate percentiles
         
-        # Approximate category thresholds (these would need to be updated regularly)
-        category_thresholds = {
-            "Books": 2000000,
-            "Electronics": 500000,
-            "Toys": 400000,
-            "VideoGames": 150000,
-            "Kitchen": 600000,
-            "HomeGarden": 800000,
-            "Beauty": 300000,
-            "Apparel": 1000000,
-            "SportingGoods": 400000,
-            "OfficeProducts": 300000,
-            # Default for unknown categories
-            "All": 1000000
-        }
-        
-        threshold = category_thresholds.get(category, category_thresholds["All"])
+        threshold = _CATEGORY_THRESHOLDS.get(category, _CATEGORY_THRESHOLDS["All"])
         
         # Calculate percentile (lower rank is better)
         if sales_rank <= 0:
@@ -262,158 +576,269 @@ class AmazonProductAPI:
         # Cap at 100%
         return min(percentile, 100.0)
     
-    def _parse_item_search_response(self, response: str) -> List[AmazonProduct]:
+    def get_sales_rank_percentile_batch(self, sales_ranks: Sequence[Optional[int]],
+                                        categories: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Calculate sales rank percentiles for many products at once
+        
+        Args:
+            sales_ranks: Sales rank of each product; missing ranks count as invalid
+            categories: Search index of each product, aligned with sales_ranks
+            
+        Returns:
+            Array of percentiles, equal to get_sales_rank_percentile for each pair
+        """
+        default = _CATEGORY_THRESHOLDS["All"]
+        thresholds = np.array([_CATEGORY_THRESHOLDS.get(category, default) for category in categories],
+                              dtype=np.float64)
+        ranks = np.array([np.nan if rank is None else rank for rank in sales_ranks], dtype=np.float64)
+        
+        # Calculate percentile (lower rank is better), capped at 100%
+        with np.errstate(invalid='ignore'):
+            percentiles = np.minimum(ranks / thresholds * 100, 100.0)
+            percentiles[~(ranks > 0)] = 100.0  # Invalid or missing rank
+        
+        return percentiles
+    
+    def _parse_item_search_response(self, response: bytes) -> List[AmazonProduct]:
         """Parse the XML response from ItemSearch"""
         products = []
         
-        try:
-            root = ET.fromstring(response)
-            
-            # Check for errors
-            errors = root.findall('.//Error')
-            if errors:
-                for error in errors:
-                    code = error.find('Code')
-                    message = error.find('Message')
-                    if code is not None and message is not None:
-                        logger.error(f"Amazon API Error: {code.text} - {message.text}")
-                return products
-            
-            # Extract items
-            items = root.findall('.//Item')
-            if not items:
-                return products
+        for item in self._iter_response_items(response):
+            try:
+                product = self._parse_item(item)
+                if product and product.is_valid:
+                    products.append(product)
+            except Exception as e:
+                logger.error(f"Error parsing Amazon product: {e}")
+        
+        return products
+    
+    def _parse_item_lookup_by_ids(self, response: bytes, identifiers: List[str]) -> Dict[str, AmazonProduct]:
+        """Parse an ItemLookup response and map products back to the requested identifiers"""
+        products = {}
+        
+        for item in self._iter_response_items(response):
+            try:
+                product = self._parse_item(item)
+                if not product or not product.is_valid:
+                    continue
                 
-            for item in items:
-                try:
-                    # Extract ASIN
-                    asin_elem = item.find('ASIN')
-                    if asin_elem is None:
-                        continue
-                    asin = asin_elem.text
-                    
-                    # Extract title
-                    title_elem = item.find('.//ItemAttributes/Title')
-                    title = title_elem.text if title_elem is not None else "Unknown Title"
-                    
-                    # Extract price
-                    price = 0.0
-                    list_price_elem = item.find('.//ItemAttributes/ListPrice/Amount')
-                    if list_price_elem is not None:
-                        price = float(list_price_elem.text) / 100
-                    else:
-                        offer_price_elem = item.find('.//Offers/Offer/OfferListing/Price/Amount')
-                        if offer_price_elem is not None:
-                            price = float(offer_price_elem.text) / 100
-                    
-                    # Extract sales rank
-                    sales_rank = None
-                    sales_rank_elem = item.find('SalesRank')
-                    if sales_rank_elem is not None:
-                        try:
-                            sales_rank = int(sales_rank_elem.text)
-                        except ValueError:
-                            pass
-                    
-                    # Extract category
-                    category = None
-                    browse_node = item.find('.//BrowseNodes/BrowseNode/Name')
-                    if browse_node is not None:
-                        category = browse_node.text
-                    
-                    # Extract review count and rating
-                    review_count = None
-                    rating = None
-                    reviews_elem = item.find('.//CustomerReviews/IFrameURL')
-                    if reviews_elem is not None:
-                        # We would need to fetch and parse the reviews page
-                        # This is a simplified implementation
-                        pass
-                    
-                    # Extract image URL
-                    image_url = None
-                    image_elem = item.find('.//LargeImage/URL')
-                    if image_elem is not None:
-                        image_url = image_elem.text
-                    
-                    # Create product URL
-                    url = f"https://www.amazon.com/dp/{asin}"
-                    
-                    # Extract features
-                    features = []
-                    feature_elems = item.findall('.//ItemAttributes/Feature')
-                    for feature_elem in feature_elems:
-                        if feature_elem.text:
-                            features.append(feature_elem.text)
-                    
-                    # Create product object
-                    product = AmazonProduct(
-                        asin=asin,
-                        title=title,
-                        price=price,
-                        sales_rank=sales_rank,
-                        category=category,
-                        review_count=review_count,
-                        rating=rating,
-                        image_url=image_url,
-                        url=url,
-                        features=features if features else None
-                    )
-                    
-                    if product.is_valid:
-                        products.append(product)
+                if len(identifiers) == 1:
+                    item_ids = set(identifiers)
+                else:
+                    item_ids = {
+                        elem.text.strip() for elem in item.iter(etree.Element)
+                        if etree.QName(elem).localname in self.ITEM_ID_TAGS and elem.text
+                    }
                 
-                except Exception as e:
-                    logger.error(f"Error parsing Amazon product: {e}")
+                for identifier in identifiers:
+                    if identifier in item_ids and identifier not in products:
+                        products[identifier] = product
             
-        except Exception as e:
-            logger.error(f"Error parsing Amazon API response: {e}")
+            except Exception as e:
+                logger.error(f"Error parsing Amazon product: {e}")
         
         return products
     
-    def _parse_item_lookup_response(self, response: str) -> List[AmazonProduct]:
+    def _iter_response_items(self, response) -> Iterator[etree._Element]:
+        """
+        Stream the Item elements of an API response, given as text or bytes
+        
+        Each item is cleared once the caller is done with it, so only one item
+        is held in memory at a time. Responses reporting an error never get
+        here: _call_with_retry raises AmazonAPIError for them instead.
+        """
+        if isinstance(response, str):
+            response = response.encode('utf-8')
+        
+        try:
+            for _, elem in etree.iterparse(io.BytesIO(response), events=('end',),
+                                           tag='{*}Item', recover=True, huge_tree=False):
+                # Nested items (e.g. variations) belong to their parent item
+                parent = elem.getparent()
+                if parent is None or etree.QName(parent).localname != 'Items':
+                    continue
+                
+                yield elem
+                
+                # Free the parsed item and any siblings kept before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+        except etree.XMLSyntaxError as e:
+            logger.error(f"Error parsing Amazon API response: {e}")
+    
+    def _parse_item(self, item: etree._Element) -> Optional[AmazonProduct]:
+        """Parse a single Item element into an AmazonProduct"""
+        # Collect every field in one pass; the first match of each wins
+        values = {}
+        features = []
+        for elem in _XP_ITEM_FIELDS(item):
+            field = _ITEM_FIELDS.get((_local_name(elem.getparent()), _local_name(elem)))
+            if field == 'feature':
+                if elem.text:
+                    features.append(elem.text)
+            elif field is not None and field not in values:
+                values[field] = elem.text
+        
+        # Extract ASIN
+        asin = values.get('asin')
+        if asin is None:
+            return None
+        
+        # Extract title
+        title = values.get('title', "Unknown Title")
+        
+        # Extract price, preferring the list price over the offer price
+        price = 0.0
+        amount = values.get('list_price', values.get('offer_price'))
+        if amount is not None:
+            price = float(amount) / 100
+        
+        # Extract sales rank
+        sales_rank = None
+        if values.get('sales_rank') is not None:
+            try:
+                sales_rank = int(values['sales_rank'])
+            except ValueError:
+                pass
+        
+        # Extract category
+        category = values.get('category')
+        
+        # Review count and rating are only available from the reviews page
+        # linked by CustomerReviews/IFrameURL, which is not fetched here
+        review_count = None
+        rating = None
+        
+        # Extract image URL
+        image_url = values.get('image_url')
+        
+        # Create product URL
+        url = f"https://www.amazon.com/dp/{asin}"
+        
+        # Create product object
+        return AmazonProduct(
+            asin=asin,
+            title=title,
+            price=price,
+            sales_rank=sales_rank,
+            category=category,
+            review_count=review_count,
+            rating=rating,
+            image_url=image_url,
+            url=url,
+            features=features if features else None,
+            description=values.get('description')
+        )
+    
+    def _parse_item_lookup_response(self, response: bytes) -> List[AmazonProduct]:
         """Parse the XML response from ItemLookup"""
         # Similar to _parse_item_search_response but for ItemLookup
         # The main difference is handling multiple items vs. single item
         return self._parse_item_search_response(response)
     
-    def _handle_api_error(self, error: Exception) -> bool:
-        """Handle API errors and return True if retry is possible"""
-        error_str = str(error)
-        
-        if "AWS.InvalidParameterValue" in error_str:
-            logger.error("Invalid parameter value, cannot retry")
-            return False
-        
-        if "AWS.InvalidAssociate" in error_str:
-            logger.error("Invalid Associate Tag, cannot retry")
-            return False
+    def _call_with_retry(self, operation: Callable[..., Any], **params) -> Any:
+        """
+        Call an API operation at the adaptive request rate, retrying throttled requests
         
-        if "AWS.AccessDenied" in error_str:
-            logger.error("Access denied, cannot retry")
-            return False
+        Args:
+            operation: bottlenose operation, e.g. self.amazon.ItemLookup
+            **params: Request parameters
+            
+        Returns:
+            Raw API response
+            
+        Raises:
+            AmazonAPIError if the response reports an error, or the last
+            request error, once it is not retryable or retries are exhausted
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            self._wait_for_request_slot()
+            try:
+                response = operation(**params)
+                error = _find_error(response)
+                if error is not None:
+                    raise error
+            except Exception as e:
+                if not self._is_retryable(e):
+                    raise
+                
+                self._adjust_rate(throttled=True)
+                if attempt == self.MAX_RETRIES:
+                    raise
+                logger.warning(f"Request throttled, retrying at {self._rate:.2f} requests/s")
+                continue
+            
+            self._adjust_rate(throttled=False)
+            return response
+    
+    def _wait_for_request_slot(self):
+        """Sleep until the current request rate allows another request"""
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + 1.0 / self._rate
         
-        return False  # Don't retry by default
+        if start > now:
+            time.sleep(start - now)
+    
+    def _adjust_rate(self, throttled: bool):
+        """Additively raise the request rate after a success, halve it when throttled"""
+        with self._rate_lock:
+            if throttled:
+                self._rate = max(self.MIN_QPS, self._rate / 2)
+                # Back off from now at the reduced rate
+                self._next_request = max(self._next_request, time.monotonic() + 1.0 / self._rate)
+            else:
+                self._rate = min(self.MAX_QPS, self._rate + self.QPS_INCREASE)
     
-    def _handle_throttling(self, error: Exception) -> bool:
-        """Handle throttling errors and return True if retry is possible"""
-        error_str = str(error)
+    def _is_retryable(self, error: Exception) -> bool:
+        """Classify an API error, returning True if the request may be retried"""
+        # Errors from response bodies carry their code; others only a message
+        error_str = error.code if isinstance(error, AmazonAPIError) else str(error)
         
         if "AWS.ECommerceService.RequestThrottled" in error_str:
-            logger.warning("Request throttled, retrying after delay")
-            time.sleep(random.uniform(2.0, 5.0))
             return True
         
-        return False
-
+        # bottlenose surfaces throttling as HTTP 503
+        if isinstance(error, HTTPError) and error.code == 503:
+            return True
+        
+        if "AWS.InvalidParameterValue" in error_str:
+            logger.error("Invalid parameter value, cannot retry")
+        elif "AWS.InvalidAssociate" in error_str:
+            logger.error("Invalid Associate Tag, cannot retry")
+        elif "AWS.AccessDenied" in error_str:
+            logger.error("Access denied, cannot retry")
+        
+        return False  # Don't retry by default
 
 class AmazonScraper:
     """Fallback scraper for Amazon product data when API is not available"""
     
     BASE_URL = "https://www.amazon.com"
     
-    def __init__(self):
+    # Maximum number of product pages scraped concurrently
+    MAX_WORKERS = 8
+    
+    # How long scraped product pages are reused
+    PRODUCT_CACHE_TTL = 24 * 60 * 60
+    
+    def __init__(self, http_adapter: Optional[HTTPAdapter] = None, cache_path: Optional[str] = None):
+        """
+        Initialize scraper
+        
+        Args:
+            http_adapter: Optional adapter whose connection pool the scraper uses
+            cache_path: Optional SQLite file that keeps scraped products across runs
+        """
+        # Each instance keeps its own headers but shares the connection pool
         self.session = requests.Session()
+        http_adapter = http_adapter or _SCRAPER_ADAPTER
+        self.session.mount('https://', http_adapter)
+        self.session.mount('http://', http_adapter)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml',
@@ -421,77 +846,148 @@ class AmazonScraper:
             'Accept-Encoding': 'gzip, deflate, br',
         }
         self.session.headers.update(self.headers)
+        
+        # Async searches use httpx, created on first use
+        self._async_client = None
+        self._async_loop = None
+        
+        # Scraped product pages, keyed by ASIN
+        self.product_cache = TTLCache(maxsize=10000, ttl=self.PRODUCT_CACHE_TTL, path=cache_path)
     
     def search_products(self, keywords: str, category: Optional[str] = None, limit: int = 10) -> List[AmazonProduct]:
         """Search for products on Amazon by keywords"""
         logger.info(f"Scraping Amazon products with keywords: {keywords}")
         
+        try:
+            response = self.session.get(self._search_url(keywords, category))
+            response.raise_for_status()
+            return self._parse_search_results(response.content, limit)
+        except Exception as e:
+            logger.error(f"Error scraping Amazon products: {e}")
+            return []
+    
+    async def search_products_async(self, keywords: str, category: Optional[str] = None,
+                                    limit: int = 10) -> List[AmazonProduct]:
+        """Search for products on Amazon by keywords without blocking the event loop"""
+        if httpx is None:
+            return await asyncio.to_thread(self.search_products, keywords, category, limit)
+        
+        logger.info(f"Scraping Amazon products with keywords: {keywords}")
+        
+        try:
+            response = await self._get_async_client().get(self._search_url(keywords, category))
+            response.raise_for_status()
+            return self._parse_search_results(response.content, limit)
+        except Exception as e:
+            logger.error(f"Error scraping Amazon products: {e}")
+            return []
+    
+    async def aclose(self):
+        """Release resources used by async searches"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+    
+    def _get_async_client(self) -> 'httpx.AsyncClient':
+        """Get the async HTTP client, creating it for the running event loop"""
+        # An httpx client is bound to the loop it first ran on
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=64),
+                follow_redirects=True,
+                timeout=30.0
+            )
+            self._async_loop = loop
+        return self._async_client
+    
+    def _search_url(self, keywords: str, category: Optional[str] = None) -> str:
+        """Build the search page URL for keywords"""
         search_url = f"{self.BASE_URL}/s?k={keywords.replace(' ', '+')}"
         if category:
             # Add category to search URL if provided
             pass
-        
+        return search_url
+    
+    def _parse_search_results(self, html: bytes, limit: int) -> List[AmazonProduct]:
+        """Parse products from the raw bytes of a search results page"""
         products = []
         
-        try:
-            response = self.session.get(search_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find product elements
-            product_elements = soup.select('div[data-asin]:not([data-asin=""])')
-            
-            for element in product_elements[:limit]:
-                try:
-                    # Extract ASIN
-                    asin = element.get('data-asin')
-                    if not asin:
-                        continue
-                    
-                    # Extract title
-                    title_elem = element.select_one('h2 a span')
-                    title = title_elem.text.strip() if title_elem else "Unknown Title"
-                    
-                    # Extract price
-                    price_elem = element.select_one('span.a-price span.a-offscreen')
-                    price = 0.0
-                    if price_elem:
-                        price_text = price_elem.text.strip()
-                        try:
-                            price = float(price_text.replace('$', '').replace(',', ''))
-                        except ValueError:
-                            pass
-                    
-                    # Extract image URL
-                    image_elem = element.select_one('img.s-image')
-                    image_url = image_elem.get('src') if image_elem else None
-                    
-                    # Create product URL
-                    url = f"{self.BASE_URL}/dp/{asin}"
-                    
-                    # Create product object
-                    product = AmazonProduct(
-                        asin=asin,
-                        title=title,
-                        price=price,
-                        image_url=image_url,
-                        url=url
-                    )
-                    
-                    if product.is_valid:
-                        products.append(product)
+        doc = lxml_html.fromstring(html)
+        
+        # Find product elements
+        product_elements = _SEL_SEARCH_RESULTS(doc)
+        
+        for element in product_elements[:limit]:
+            try:
+                # Extract ASIN
+                asin = element.get('data-asin')
+                if not asin:
+                    continue
                 
-                except Exception as e:
-                    logger.error(f"Error parsing Amazon product: {e}")
+                # Extract title
+                title_elem = _first(_SEL_RESULT_TITLE, element)
+                title = title_elem.text_content().strip() if title_elem is not None else "Unknown Title"
+                
+                # Extract price
+                price_elem = _first(_SEL_RESULT_PRICE, element)
+                price = 0.0
+                if price_elem is not None:
+                    price_text = price_elem.text_content().strip()
+                    try:
+                        price = float(price_text.translate(_PRICE_STRIP))
+                    except ValueError:
+                        pass
+                
+                # Extract image URL
+                image_elem = _first(_SEL_RESULT_IMAGE, element)
+                image_url = image_elem.get('src') if image_elem is not None else None
+                
+                # Create product URL
+                url = f"{self.BASE_URL}/dp/{asin}"
+                
+                # Create product object
+                product = AmazonProduct(
+                    asin=asin,
+                    title=title,
+                    price=price,
+                    image_url=image_url,
+                    url=url
+                )
+                
+                if product.is_valid:
+                    products.append(product)
             
-        except Exception as e:
-            logger.error(f"Error scraping Amazon products: {e}")
+            except Exception as e:
+                logger.error(f"Error parsing Amazon product: {e}")
         
         return products
     
+    def search_products_batch(self, queries: List[str]) -> Dict[str, AmazonProduct]:
+        """
+        Look up many products, returning the best match for each query
+        
+        The website has no multi-query search, so each query is still
+        searched individually; this mirrors AmazonProductAPI.search_products_batch.
+        """
+        logger.info(f"Batch scraping Amazon products for {len(queries)} queries")
+        
+        results = {}
+        for query in queries:
+            products = self.search_products(query, limit=1)
+            if products:
+                results[query] = products[0]
+        
+        return results
+    
     def get_product_by_asin(self, asin: str) -> Optional[AmazonProduct]:
         """Get product details by ASIN"""
+        hit, product = self.product_cache.get(f"page:{asin}")
+        if hit:
+            return product
+        
         logger.info(f"Scraping Amazon product details for ASIN: {asin}")
         
         url = f"{self.BASE_URL}/dp/{asin}"
@@ -500,58 +996,62 @@ class AmazonScraper:
             response = self.session.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Structured data covers the main fields without building the HTML tree
+            product = self._product_from_json_ld(asin, url, response.content)
+            if product is not None:
+                self.product_cache.set(f"page:{asin}", product)
+                return product
+            
+            doc = lxml_html.fromstring(response.content, parser=_html_parser())
             
             # Extract title
-            title_elem = soup.select_one('#productTitle')
-            title = title_elem.text.strip() if title_elem else "Unknown Title"
+            title_elem = _first(_SEL_TITLE, doc)
+            title = title_elem.text_content().strip() if title_elem is not None else "Unknown Title"
             
             # Extract price
-            price_elem = soup.select_one('#priceblock_ourprice, #priceblock_dealprice, .a-price .a-offscreen')
+            price_elem = _first(_SEL_PRICE, doc)
             price = 0.0
-            if price_elem:
-                price_text = price_elem.text.strip()
+            if price_elem is not None:
+                price_text = price_elem.text_content().strip()
                 try:
-                    price = float(price_text.replace('$', '').replace(',', ''))
+                    price = float(price_text.translate(_PRICE_STRIP))
                 except ValueError:
                     pass
             
             # Extract sales rank
             sales_rank = None
-            for elem in soup.select('#productDetails_detailBullets_sections1 tr'):
-                if 'Best Sellers Rank' in elem.text:
-                    rank_text = elem.select_one('td').text.strip()
-                    rank_match = re.search(r'#([\d,]+)\s+in', rank_text)
-                    if rank_match:
-                        try:
-                            sales_rank = int(rank_match.group(1).replace(',', ''))
-                        except ValueError:
-                            pass
-                    break
+            sales_rank_elem = _first(_SEL_SALES_RANK, doc)
+            if sales_rank_elem is not None:
+                rank_match = _RE_RANK.search(sales_rank_elem.text_content())
+                if rank_match:
+                    try:
+                        sales_rank = int(rank_match.group(1).translate(_PRICE_STRIP))
+                    except ValueError:
+                        pass
             
             # Extract category
             category = None
-            category_elem = soup.select_one('#wayfinding-breadcrumbs_feature_div ul li:nth-last-child(2)')
-            if category_elem:
-                category = category_elem.text.strip()
+            category_elem = _first(_SEL_CATEGORY, doc)
+            if category_elem is not None:
+                category = category_elem.text_content().strip()
             
             # Extract review count and rating
             review_count = None
             rating = None
-            reviews_elem = soup.select_one('#acrCustomerReviewText')
-            if reviews_elem:
-                review_text = reviews_elem.text.strip()
-                count_match = re.search(r'([\d,]+)\s+ratings', review_text)
+            reviews_elem = _first(_SEL_REVIEW_COUNT, doc)
+            if reviews_elem is not None:
+                review_text = reviews_elem.text_content().strip()
+                count_match = _RE_REVIEWS.search(review_text)
                 if count_match:
                     try:
-                        review_count = int(count_match.group(1).replace(',', ''))
+                        review_count = int(count_match.group(1).translate(_PRICE_STRIP))
                     except ValueError:
                         pass
             
-            rating_elem = soup.select_one('span[data-hook="rating-out-of-text"]')
-            if rating_elem:
-                rating_text = rating_elem.text.strip()
-                rating_match = re.search(r'([\d.]+)\s+out of', rating_text)
+            rating_elem = _first(_SEL_RATING, doc)
+            if rating_elem is not None:
+                rating_text = rating_elem.text_content().strip()
+                rating_match = _RE_RATING.search(rating_text)
                 if rating_match:
                     try:
                         rating = float(rating_match.group(1))
@@ -559,26 +1059,25 @@ class AmazonScraper:
                         pass
             
             # Extract image URL
-            image_elem = soup.select_one('#landingImage')
+            image_elem = _first(_SEL_IMAGE, doc)
             image_url = None
-            if image_elem:
+            if image_elem is not None:
                 image_url = image_elem.get('src')
                 if not image_url:
                     image_url = image_elem.get('data-old-hires')
             
             # Extract features
             features = []
-            feature_elems = soup.select('#feature-bullets ul li')
-            for feature_elem in feature_elems:
-                feature_text = feature_elem.text.strip()
+            for feature_elem in _SEL_FEATURES(doc):
+                feature_text = feature_elem.text_content().strip()
                 if feature_text and not feature_text.startswith('›'):
                     features.append(feature_text)
             
             # Extract description
             description = None
-            description_elem = soup.select_one('#productDescription')
-            if description_elem:
-                description = description_elem.text.strip()
+            description_elem = _first(_SEL_DESCRIPTION, doc)
+            if description_elem is not None:
+                description = description_elem.text_content().strip()
             
             # Create product object
             product = AmazonProduct(
@@ -595,7 +1094,11 @@ class AmazonScraper:
                 description=description
             )
             
-            return product if product.is_valid else None
+            # Invalid pages (e.g. captchas) are not cached, so they are retried
+            if not product.is_valid:
+                return None
+            self.product_cache.set(f"page:{asin}", product)
+            return product
             
         except Exception as e:
             logger.error(f"Error scraping Amazon product details: {e}")
@@ -605,18 +1108,108 @@ class AmazonScraper:
         """Get multiple products by ASINs"""
         logger.info(f"Scraping Amazon product details for {len(asins)} ASINs")
         
-        products = []
+        found = {}
+        
+        # Only scrape each uncached ASIN once
+        uncached_asins = []
+        for asin in dict.fromkeys(asins):
+            hit, product = self.product_cache.get(f"page:{asin}")
+            if hit:
+                found[asin] = product
+            else:
+                uncached_asins.append(asin)
+        
+        # Scrape a few pages at a time; each worker paces its own requests
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = {executor.submit(self._get_product_by_asin_paced, asin): asin for asin in uncached_asins}
+            
+            for future in as_completed(futures):
+                asin = futures[future]
+                try:
+                    product = future.result()
+                    if product:
+                        found[asin] = product
+                except Exception as e:
+                    logger.error(f"Error scraping Amazon product details for ASIN {asin}: {e}")
+        
+        return [found[asin] for asin in asins if asin in found]
+    
+    def _product_from_json_ld(self, asin: str, url: str, content: bytes) -> Optional[AmazonProduct]:
+        """
+        Build a product from a page's JSON-LD Product data, if it is complete
         
-        for asin in asins:
+        Args:
+            asin: Product ASIN
+            url: Product page URL
+            content: Raw page bytes
+            
+        Returns:
+            AmazonProduct, or None if the page has no usable structured data
+            or no sales rank, in which case the HTML has to be parsed
+        """
+        data = None
+        for match in _RE_JSON_LD.finditer(content):
             try:
-                product = self.get_product_by_asin(asin)
-                if product:
-                    products.append(product)
-                
-                # Add a small delay to avoid rate limiting
-                time.sleep(random.uniform(2.0, 5.0))
-                
-            except Exception as e:
-                logger.error(f"Error scraping Amazon product details for ASIN {asin}: {e}")
+                blocks = orjson.loads(match.group(1))
+            except orjson.JSONDecodeError:
+                continue
+            
+            if isinstance(blocks, dict):
+                blocks = blocks.get('@graph', [blocks])
+            for block in blocks if isinstance(blocks, list) else []:
+                if isinstance(block, dict) and block.get('@type') == 'Product':
+                    data = block
+                    break
+            if data is not None:
+                break
         
-        return products
+        if data is None:
+            return None
+        
+        offers = data.get('offers')
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        try:
+            price = float(str(offers['price']).translate(_PRICE_STRIP)) if isinstance(offers, dict) else 0.0
+        except (KeyError, ValueError):
+            price = 0.0
+        
+        # Sales rank is never part of the structured data
+        rank_match = _RE_RAW_RANK.search(content)
+        if not isinstance(data.get('name'), str) or price <= 0 or not rank_match:
+            return None
+        
+        image = data.get('image')
+        if isinstance(image, list):
+            image = image[0] if image else None
+        
+        review_count = None
+        rating = None
+        aggregate_rating = data.get('aggregateRating')
+        if isinstance(aggregate_rating, dict):
+            try:
+                review_count = int(aggregate_rating.get('reviewCount') or aggregate_rating.get('ratingCount'))
+            except (TypeError, ValueError):
+                pass
+            try:
+                rating = float(aggregate_rating.get('ratingValue'))
+            except (TypeError, ValueError):
+                pass
+        
+        return AmazonProduct(
+            asin=asin,
+            title=data['name'].strip(),
+            price=price,
+            sales_rank=int(rank_match.group(1).replace(b',', b'')),
+            category=data['category'] if isinstance(data.get('category'), str) else None,
+            review_count=review_count,
+            rating=rating,
+            image_url=image if isinstance(image, str) else None,
+            url=url,
+            description=data.get('description')
+        )
+    
+    def _get_product_by_asin_paced(self, asin: str) -> Optional[AmazonProduct]:
+        """Get product details by ASIN after a random delay, to avoid rate limiting"""
+        time.sleep(random.uniform(2.0, 5.0))
+        return self.get_product_by_asin(asin)
@@ -0,0 +1,152 @@
+"""
+Amazon lookup cache module
+Provides a TTL-bounded LRU cache, optionally persisted to SQLite, for Amazon lookups
+"""
+
+import os
+import re
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live for cached lookups (6 hours)
+DEFAULT_TTL = 6 * 60 * 60
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so equivalent queries share a cache entry
+    
+    Lowercases, strips punctuation and collapses whitespace, so that
+    "Brand X Item" and "brand x item " map to the same key.
+    """
+    query = _PUNCTUATION_RE.sub(' ', query.lower())
+    return _WHITESPACE_RE.sub(' ', query).strip()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live"""
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = DEFAULT_TTL, path: Optional[str] = None):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Maximum number of entries kept in memory
+            ttl: Time-to-live of an entry in seconds
+            path: Optional SQLite file used to persist entries across runs
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                # WAL with NORMAL sync avoids an fsync on every commit; a crash can only lose recent entries
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute('PRAGMA synchronous=NORMAL')
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL, value BLOB)'
+                )
+                # Drop entries left expired by earlier runs so the file does not grow forever
+                self._db.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error opening cache at {path}, using memory only: {e}")
+                self._db = None
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Get a cached value
+        
+        Returns:
+            Tuple of (hit, value); value may legitimately be None for cached misses
+        """
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return True, value
+                del self._entries[key]
+            
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        'SELECT expires_at, value FROM cache WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row and row[0] > now:
+                        value = pickle.loads(row[1])
+                        self._store(key, row[0], value)
+                        return True, value
+                except Exception as e:
+                    logger.error(f"Error reading cache entry {key}: {e}")
+        
+        return False, None
+    
+    def set(self, key: str, value: Any):
+        """Store a value in the cache"""
+        self.set_many([(key, value)])
+    
+    def set_many(self, items: Iterable[Tuple[str, Any]]):
+        """
+        Store several values in the cache with a single disk commit
+        
+        Args:
+            items: Iterable of (key, value) pairs
+        """
+        expires_at = time.time() + self.ttl
+        items = list(items)
+        if not items:
+            return
+        
+        with self._lock:
+            for key, value in items:
+                self._store(key, expires_at, value)
+            
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        'INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)',
+                        [(key, expires_at, pickle.dumps(value)) for key, value in items]
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"Error writing {len(items)} cache entries: {e}")
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM cache')
+                self._db.commit()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _store(self, key: str, expires_at: float, value: Any):
+        """Insert into the in-memory LRU, evicting the oldest entry when full"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -5,14 +5,21 @@ Provides functionality to store and retrieve arbitrage opportunities
 
 import os
 import logging
-import json
-from typing import List, Dict, Any, Optional, Union
-from datetime import datetime
+import threading
+import orjson
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
+from datetime import datetime, time, timedelta
 import sqlite3
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, fields
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import create_engine, event, select, insert, update, delete, Column, Index, Integer, String, Float, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql import func
 from sqlalchemy.orm import sessionmaker, relationship, Session
 
 from src.retail_scanners import RetailProduct
@@ -23,9 +30,34 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Maximum number of keys bound in one IN (...) lookup
+LOOKUP_BATCH_SIZE = 500
+
+# Rows sent per multi-VALUES INSERT when inserting many rows at once
+INSERT_PAGE_SIZE = 10000
+
+# Rows fetched per round trip when streaming opportunity reads
+READ_BATCH_SIZE = 500
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Use write-ahead logging, so commits don't each wait on a full fsync,
+    and enforce foreign keys, so ON DELETE CASCADE applies
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
 class RetailProductModel(Base):
     """SQLAlchemy model for retail products"""
     __tablename__ = 'retail_products'
+    __table_args__ = (
+        # Natural key, used as the conflict target of upserts
+        Index('uq_retail_products_product_id_store', 'product_id', 'store', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     product_id = Column(String(50), nullable=False, index=True)
@@ -40,8 +72,8 @@ class RetailProductModel(Base):
     sku = Column(String(50), nullable=True, index=True)
     description = Column(Text, nullable=True)
     store = Column(String(50), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     
     # Relationship with opportunities
     opportunities = relationship("ArbitrageOpportunityModel", back_populates="retail_product")
@@ -98,8 +130,8 @@ class AmazonProductModel(Base):
     url = Column(String(255), nullable=True)
     features = Column(Text, nullable=True)  # Stored as JSON
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     
     # Relationship with opportunities
     opportunities = relationship("ArbitrageOpportunityModel", back_populates="amazon_product")
@@ -117,7 +149,7 @@ class AmazonProductModel(Base):
             rating=product.rating,
             image_url=product.image_url,
             url=product.url,
-            features=json.dumps(product.features) if product.features else None,
+            features=orjson.dumps(product.features).decode() if product.features else None,
             description=product.description
         )
     
@@ -133,7 +165,7 @@ class AmazonProductModel(Base):
             rating=self.rating,
             image_url=self.image_url,
             url=self.url,
-            features=json.loads(self.features) if self.features else None,
+            features=orjson.loads(self.features) if self.features else None,
             description=self.description
         )
 
@@ -143,14 +175,14 @@ class ArbitrageCostsModel(Base):
     __tablename__ = 'arbitrage_costs'
     
     id = Column(Integer, primary_key=True)
-    opportunity_id = Column(Integer, ForeignKey('arbitrage_opportunities.id'), nullable=False)
+    opportunity_id = Column(Integer, ForeignKey('arbitrage_opportunities.id', ondelete='CASCADE'), nullable=False, index=True)
     buy_price = Column(Float, nullable=False)
     amazon_fees = Column(Float, nullable=False)
     fulfillment_cost = Column(Float, nullable=False)
     shipping_to_amazon = Column(Float, nullable=False)
     other_costs = Column(Float, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     
     # Relationship with opportunity
     opportunity = relationship("ArbitrageOpportunityModel", back_populates="costs")
@@ -188,13 +220,21 @@ class ArbitrageOpportunityModel(Base):
     profit = Column(Float, nullable=False)
     roi = Column(Float, nullable=False)
     is_profitable = Column(Boolean, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), index=True)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Serve ORDER BY roi DESC LIMIT n and the minimum ROI/profit filters
+        Index('ix_opp_roi_desc', roi.desc()),
+        Index('ix_opp_profit_desc', profit.desc()),
+    )
     
     # Relationships
-    retail_product = relationship("RetailProductModel", back_populates="opportunities")
-    amazon_product = relationship("AmazonProductModel", back_populates="opportunities")
-    costs = relationship("ArbitrageCostsModel", back_populates="opportunity", uselist=False)
+    retail_product = relationship("RetailProductModel", back_populates="opportunities", lazy="selectin")
+    amazon_product = relationship("AmazonProductModel", back_populates="opportunities", lazy="selectin")
+    # One-to-one, so joining it into the opportunity's SELECT cannot multiply rows
+    costs = relationship("ArbitrageCostsModel", back_populates="opportunity", uselist=False, lazy="joined",
+                         cascade="all, delete-orphan", passive_deletes=True)
     
     @classmethod
     def from_arbitrage_opportunity(cls, opportunity: ArbitrageOpportunity, 
@@ -210,16 +250,116 @@ class ArbitrageOpportunityModel(Base):
         )
 
 
+_OPPORTUNITY_FIELDS = ('id', 'fulfillment_method', 'profit', 'roi', 'is_profitable', 'created_at', 'updated_at')
+_RETAIL_FIELDS = tuple(field.name for field in fields(RetailProduct))
+_COSTS_FIELDS = tuple(field.name for field in fields(ArbitrageCosts))
+
+# Every column an opportunity dictionary needs, selected in one joined query.
+# Product and costs columns are labeled with a prefix, since the tables share names.
+_OPPORTUNITY_SELECT = select(
+    *[getattr(ArbitrageOpportunityModel, field) for field in _OPPORTUNITY_FIELDS],
+    *[getattr(RetailProductModel, field).label(f'retail_{field}') for field in _RETAIL_FIELDS],
+    *[getattr(AmazonProductModel, field).label(f'amazon_{field}') for field in AmazonProduct.ROW_FIELDS],
+    ArbitrageCostsModel.id.label('costs_id'),
+    *[getattr(ArbitrageCostsModel, field).label(f'costs_{field}') for field in _COSTS_FIELDS]
+).join(
+    RetailProductModel, ArbitrageOpportunityModel.retail_product_id == RetailProductModel.id
+).join(
+    AmazonProductModel, ArbitrageOpportunityModel.amazon_product_id == AmazonProductModel.id
+).outerjoin(
+    ArbitrageCostsModel, ArbitrageCostsModel.opportunity_id == ArbitrageOpportunityModel.id
+)
+
+# Getters fetching each group of columns from a row mapping in one call
+_GET_OPPORTUNITY = itemgetter(*_OPPORTUNITY_FIELDS)
+_GET_RETAIL = itemgetter(*[f'retail_{field}' for field in _RETAIL_FIELDS])
+_GET_AMAZON = itemgetter(*[f'amazon_{field}' for field in AmazonProduct.ROW_FIELDS])
+_GET_COSTS = itemgetter(*[f'costs_{field}' for field in _COSTS_FIELDS])
+
+
+def _opportunity_to_dict(row: Any) -> Dict[str, Any]:
+    """Convert a row mapping of _OPPORTUNITY_SELECT to the dictionary returned by reads"""
+    opportunity = dict(zip(_OPPORTUNITY_FIELDS, _GET_OPPORTUNITY(row)))
+    
+    amazon = dict(zip(AmazonProduct.ROW_FIELDS, _GET_AMAZON(row)))
+    amazon['features'] = orjson.loads(amazon['features']) if amazon['features'] else None
+    
+    opportunity['retail_product'] = RetailProduct(*_GET_RETAIL(row))
+    opportunity['amazon_product'] = AmazonProduct(**amazon)
+    opportunity['costs'] = ArbitrageCosts(*_GET_COSTS(row)) if row['costs_id'] is not None else None
+    return opportunity
+
+
+# Engines and session factories shared by ProductDatabase instances, keyed on URL and pool options
+_engines: Dict[Tuple, Tuple[Engine, sessionmaker]] = {}
+_engines_lock = threading.Lock()
+
+
+def _create_engine(url: URL, pool_size: Optional[int], max_overflow: Optional[int],
+                   pool_timeout: Optional[float]) -> Tuple[Engine, sessionmaker]:
+    """
+    Create an engine and session factory, and bring the schema up to date
+    
+    Args:
+        url: Database URL
+        pool_size: Connections kept open to a database server
+        max_overflow: Extra connections allowed under load
+        pool_timeout: Seconds to wait for a free connection
+        
+    Returns:
+        Tuple of engine and session factory
+    """
+    # Batch executemany INSERTs into multi-VALUES statements
+    engine_options = {'insertmanyvalues_page_size': INSERT_PAGE_SIZE, 'pool_pre_ping': True}
+    if url.get_driver_name() == 'psycopg2':
+        engine_options['executemany_mode'] = 'values_plus_batch'
+    
+    # Size the pool so concurrent workers don't queue for connections.
+    # SQLite has no server to pool connections to; an in-memory database
+    # is shared by all threads through a single connection
+    if url.get_backend_name() != 'sqlite':
+        engine_options.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=1800
+        )
+    elif url.database in (None, '', ':memory:'):
+        engine_options.update(poolclass=StaticPool, connect_args={'check_same_thread': False})
+    
+    engine = create_engine(url, **engine_options)
+    if url.get_backend_name() == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    
+    # Create tables if they don't exist
+    Base.metadata.create_all(engine)
+    
+    # Tables created before an index was declared need it added
+    for index in (index for table in Base.metadata.sorted_tables for index in table.indexes):
+        try:
+            index.create(engine, checkfirst=True)
+        except Exception as e:
+            logger.warning(f"Could not create index {index.name}: {e}")
+    
+    # Models returned by the add_* methods stay readable after their session
+    # commits and closes, without a refresh SELECT
+    return engine, sessionmaker(bind=engine, expire_on_commit=False)
+
+
 class ProductDatabase:
     """Database manager for product storage"""
     
-    def __init__(self, db_path: str = None, db_url: str = None):
+    def __init__(self, db_path: str = None, db_url: str = None, pool_size: int = None,
+                 max_overflow: int = None, pool_timeout: float = None):
         """
         Initialize database manager
         
         Args:
             db_path: Path to SQLite database file (for testing)
             db_url: SQLAlchemy database URL (e.g., 'sqlite:///database/products.db')
+            pool_size: Connections kept open to a database server (default DB_POOL_SIZE or 10)
+            max_overflow: Extra connections allowed under load (default DB_MAX_OVERFLOW or 20)
+            pool_timeout: Seconds to wait for a free connection (default DB_POOL_TIMEOUT or 30)
         """
         # Handle special case for in-memory database (for testing)
         if db_path == ":memory:":
@@ -247,16 +387,87 @@ class ProductDatabase:
                 os.makedirs(db_dir, exist_ok=True)
                 logger.info(f"Using database at {db_path}")
         
-        self.engine = create_engine(db_url)
-        self.Session = sessionmaker(bind=self.engine)
+        url = make_url(db_url)
+        if url.get_backend_name() != 'sqlite':
+            pool_size = pool_size if pool_size is not None else int(os.getenv('DB_POOL_SIZE', '10'))
+            max_overflow = max_overflow if max_overflow is not None else int(os.getenv('DB_MAX_OVERFLOW', '20'))
+            pool_timeout = pool_timeout if pool_timeout is not None else float(os.getenv('DB_POOL_TIMEOUT', '30'))
         
-        # Create tables if they don't exist
-        Base.metadata.create_all(self.engine)
+        # Instances for the same database share one engine per process, so the
+        # schema is only checked the first time; each in-memory database is separate
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            self.engine, self.Session = _create_engine(url, pool_size, max_overflow, pool_timeout)
+        else:
+            key = (url.render_as_string(hide_password=False), pool_size, max_overflow, pool_timeout)
+            with _engines_lock:
+                if key not in _engines:
+                    _engines[key] = _create_engine(url, pool_size, max_overflow, pool_timeout)
+                self.engine, self.Session = _engines[key]
+    
+    def _upsert_insert(self) -> Optional[Any]:
+        """Get the dialect's INSERT construct supporting ON CONFLICT, or None if it has none"""
+        return {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(self.engine.dialect.name)
+    
+    def _upsert_model_tx(self, session: Session, model: type, index_elements: List[str],
+                         values: Dict[str, Any]) -> Optional[Any]:
+        """
+        Insert or update one row with a single INSERT ... ON CONFLICT statement
+        
+        Args:
+            session: Active session
+            model: Model class of the table
+            index_elements: Columns of the unique index identifying the row
+            values: Column values of the row
+            
+        Returns:
+            The written model instance, or None if the dialect has no upsert
+            or the table lacks the unique index
+        """
+        insert_fn = self._upsert_insert()
+        if insert_fn is None:
+            return None
+        
+        stmt = insert_fn(model).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                **{field: value for field, value in values.items() if field not in index_elements},
+                'updated_at': func.now()
+            }
+        )
+        
+        try:
+            with session.begin_nested():
+                return session.scalars(
+                    stmt.returning(model), execution_options={'populate_existing': True}
+                ).one()
+        except Exception as e:
+            logger.debug(f"Upsert into {model.__tablename__} failed, falling back to lookup: {e}")
+            return None
     
     def get_session(self) -> Session:
         """Get database session"""
         return self.Session()
     
+    @contextmanager
+    def _session_scope(self) -> Iterator[Session]:
+        """
+        Provide a session for one transaction
+        
+        The transaction is committed when the block exits normally and rolled
+        back when it raises; the session is closed either way, returning its
+        connection to the pool.
+        """
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     def add_retail_product(self, product: RetailProduct) -> RetailProductModel:
         """
         Add retail product to database
@@ -267,41 +478,12 @@ class ProductDatabase:
         Returns:
             RetailProductModel object
         """
-        session = self.get_session()
         try:
-            # Check if product already exists
-            existing = session.query(RetailProductModel).filter_by(
-                product_id=product.product_id,
-                store=product.store
-            ).first()
-            
-            if existing:
-                # Update existing product
-                existing.title = product.title
-                existing.price = product.price
-                existing.original_price = product.original_price
-                existing.url = product.url
-                existing.image_url = product.image_url
-                existing.brand = product.brand
-                existing.category = product.category
-                existing.upc = product.upc
-                existing.sku = product.sku
-                existing.description = product.description
-                existing.updated_at = datetime.utcnow()
-                model = existing
-            else:
-                # Create new product
-                model = RetailProductModel.from_retail_product(product)
-                session.add(model)
-            
-            session.commit()
-            return model
+            with self._session_scope() as session:
+                return self._add_retail_product_tx(session, product)
         except Exception as e:
-            session.rollback()
             logger.error(f"Error adding retail product: {e}")
             raise
-        finally:
-            session.close()
     
     def add_amazon_product(self, product: AmazonProduct) -> AmazonProductModel:
         """
@@ -313,38 +495,53 @@ class ProductDatabase:
         Returns:
             AmazonProductModel object
         """
-        session = self.get_session()
         try:
-            # Check if product already exists
-            existing = session.query(AmazonProductModel).filter_by(asin=product.asin).first()
-            
-            if existing:
-                # Update existing product
-                existing.title = product.title
-                existing.price = product.price
-                existing.sales_rank = product.sales_rank
-                existing.category = product.category
-                existing.review_count = product.review_count
-                existing.rating = product.rating
-                existing.image_url = product.image_url
-                existing.url = product.url
-                existing.features = json.dumps(product.features) if product.features else None
-                existing.description = product.description
-                existing.updated_at = datetime.utcnow()
-                model = existing
-            else:
-                # Create new product
-                model = AmazonProductModel.from_amazon_product(product)
-                session.add(model)
-            
-            session.commit()
-            return model
+            with self._session_scope() as session:
+                return self._add_amazon_product_tx(session, product)
         except Exception as e:
-            session.rollback()
             logger.error(f"Error adding Amazon product: {e}")
             raise
-        finally:
-            session.close()
+    
+    def add_amazon_products(self, products: List[AmazonProduct]) -> int:
+        """
+        Add or update many Amazon products in a single transaction
+        
+        On SQLite and PostgreSQL the products are upserted by ASIN with one
+        executemany statement; other databases fall back to per-product updates.
+        
+        Args:
+            products: List of AmazonProduct objects
+            
+        Returns:
+            Number of distinct products written
+        """
+        # One row per ASIN, the last occurrence winning, as with repeated add_amazon_product calls
+        latest = {product.asin: product for product in products}
+        if not latest:
+            return 0
+        rows = [dict(zip(AmazonProduct.ROW_FIELDS, product.to_row())) for product in latest.values()]
+        
+        insert_fn = self._upsert_insert()
+        try:
+            with self._session_scope() as session:
+                if insert_fn is not None:
+                    stmt = insert_fn(AmazonProductModel)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['asin'],
+                        set_={
+                            **{field: stmt.excluded[field] for field in AmazonProduct.ROW_FIELDS if field != 'asin'},
+                            'updated_at': func.now()
+                        }
+                    )
+                    session.execute(stmt, rows)
+                else:
+                    for product in latest.values():
+                        self._add_amazon_product_tx(session, product)
+                
+                return len(rows)
+        except Exception as e:
+            logger.error(f"Error adding Amazon products: {e}")
+            raise
     
     def add_arbitrage_opportunity(self, opportunity: ArbitrageOpportunity) -> ArbitrageOpportunityModel:
         """
@@ -356,82 +553,252 @@ class ProductDatabase:
         Returns:
             ArbitrageOpportunityModel object
         """
-        session = self.get_session()
         try:
-            # Add retail product
-            retail_model = self.add_retail_product(opportunity.retail_product)
-            
-            # Add Amazon product
-            amazon_model = self.add_amazon_product(opportunity.amazon_product)
-            
-            # Check if opportunity already exists
-            existing = session.query(ArbitrageOpportunityModel).filter_by(
-                retail_product_id=retail_model.id,
-                amazon_product_id=amazon_model.id
-            ).first()
+            with self._session_scope() as session:
+                return self._add_arbitrage_opportunity_tx(session, opportunity)
+        except Exception as e:
+            logger.error(f"Error adding arbitrage opportunity: {e}")
+            raise
+    
+    def add_opportunities(self, opportunities: List[ArbitrageOpportunity]) -> int:
+        """
+        Add multiple arbitrage opportunities to database in a single transaction
+        
+        Products and opportunities are deduplicated in memory, then each table
+        is written with one bulk UPDATE for existing rows and one bulk INSERT
+        for new ones. Opportunities without costs cannot be stored and are
+        skipped.
+        
+        Args:
+            opportunities: List of ArbitrageOpportunity objects
             
-            if existing:
-                # Update existing opportunity
-                existing.fulfillment_method = opportunity.fulfillment_method
-                existing.profit = opportunity.profit
-                existing.roi = opportunity.roi
-                existing.is_profitable = opportunity.is_profitable
-                existing.updated_at = datetime.utcnow()
+        Returns:
+            Number of distinct opportunities written
+        """
+        valid_opportunities = []
+        for opportunity in opportunities:
+            if opportunity.costs is None:
+                logger.error(f"Error adding opportunity: {opportunity.retail_product.title} has no costs")
+            else:
+                valid_opportunities.append(opportunity)
+        if not valid_opportunities:
+            return 0
+        
+        # Scans often repeat a product, so each distinct one (the last occurrence
+        # winning) is converted to a row once
+        retail_products = {}
+        amazon_products = {}
+        for opportunity in valid_opportunities:
+            retail_product = opportunity.retail_product
+            retail_products[(retail_product.product_id, retail_product.store)] = retail_product
+            amazon_products[(opportunity.amazon_product.asin,)] = opportunity.amazon_product
+        
+        # The product and costs dataclasses have the same fields as their tables
+        retail_rows = {key: asdict(product) for key, product in retail_products.items()}
+        amazon_rows = {
+            key: dict(zip(AmazonProduct.ROW_FIELDS, product.to_row())) for key, product in amazon_products.items()
+        }
+        
+        try:
+            with self._session_scope() as session:
+                retail_ids, _ = self._bulk_upsert_tx(session, RetailProductModel, ('product_id', 'store'), retail_rows)
+                amazon_ids, _ = self._bulk_upsert_tx(session, AmazonProductModel, ('asin',), amazon_rows)
                 
-                # Update costs
-                if existing.costs:
-                    costs_model = existing.costs
-                    costs_model.buy_price = opportunity.costs.buy_price
-                    costs_model.amazon_fees = opportunity.costs.amazon_fees
-                    costs_model.fulfillment_cost = opportunity.costs.fulfillment_cost
-                    costs_model.shipping_to_amazon = opportunity.costs.shipping_to_amazon
-                    costs_model.other_costs = opportunity.costs.other_costs
-                else:
-                    costs_model = ArbitrageCostsModel.from_arbitrage_costs(opportunity.costs)
-                    costs_model.opportunity = existing
-                    session.add(costs_model)
+                opportunity_rows = {}
+                costs = {}
+                for opportunity in valid_opportunities:
+                    key = (
+                        retail_ids[(opportunity.retail_product.product_id, opportunity.retail_product.store)],
+                        amazon_ids[(opportunity.amazon_product.asin,)]
+                    )
+                    opportunity_rows[key] = {
+                        'retail_product_id': key[0],
+                        'amazon_product_id': key[1],
+                        'fulfillment_method': opportunity.fulfillment_method,
+                        'profit': opportunity.profit,
+                        'roi': opportunity.roi,
+                        'is_profitable': opportunity.is_profitable
+                    }
+                    costs[key] = opportunity.costs
                 
-                model = existing
-            else:
-                # Create new opportunity
-                model = ArbitrageOpportunityModel.from_arbitrage_opportunity(
-                    opportunity, retail_model.id, amazon_model.id
+                opportunity_ids, inserted = self._bulk_upsert_tx(
+                    session, ArbitrageOpportunityModel, ('retail_product_id', 'amazon_product_id'), opportunity_rows
                 )
-                session.add(model)
                 
-                # Add costs
-                costs_model = ArbitrageCostsModel.from_arbitrage_costs(opportunity.costs)
-                costs_model.opportunity = model
-                session.add(costs_model)
-            
-            session.commit()
-            return model
+                # Costs of newly inserted opportunities cannot exist yet, so only the
+                # costs of existing opportunities need the lookup of an upsert
+                new_costs_rows = []
+                existing_costs_rows = {}
+                for key, opportunity_costs in costs.items():
+                    row = {**asdict(opportunity_costs), 'opportunity_id': opportunity_ids[key]}
+                    if key in inserted:
+                        new_costs_rows.append(row)
+                    else:
+                        existing_costs_rows[(row['opportunity_id'],)] = row
+                
+                if new_costs_rows:
+                    session.execute(insert(ArbitrageCostsModel), new_costs_rows)
+                self._bulk_upsert_tx(session, ArbitrageCostsModel, ('opportunity_id',), existing_costs_rows)
+                
+                return len(opportunity_rows)
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error adding arbitrage opportunity: {e}")
-            raise
-        finally:
-            session.close()
+            logger.error(f"Error adding opportunities: {e}")
+            return 0
     
-    def add_opportunities(self, opportunities: List[ArbitrageOpportunity]) -> List[ArbitrageOpportunityModel]:
+    def _bulk_upsert_tx(self, session: Session, model: type, key_fields: Tuple[str, ...],
+                        rows: Dict[Tuple, Dict[str, Any]]) -> Tuple[Dict[Tuple, int], Set[Tuple]]:
         """
-        Add multiple arbitrage opportunities to database
+        Insert or update rows identified by a natural key within the caller's transaction
         
         Args:
-            opportunities: List of ArbitrageOpportunity objects
+            session: Active session
+            model: Model class of the table
+            key_fields: Columns forming the natural key, in the order of the rows' keys
+            rows: Column values of each row, keyed by natural key
             
         Returns:
-            List of ArbitrageOpportunityModel objects
+            Tuple of a dictionary mapping each natural key to its row id,
+            and the set of keys whose rows were inserted
         """
-        models = []
-        for opportunity in opportunities:
-            try:
-                model = self.add_arbitrage_opportunity(opportunity)
-                models.append(model)
-            except Exception as e:
-                logger.error(f"Error adding opportunity: {e}")
+        key_columns = [getattr(model, field) for field in key_fields]
+        ids = {}
+        
+        # Find existing rows; the lookup narrows on the first key column
+        # and the rest of the key is matched here
+        first_values = list({key[0] for key in rows})
+        for i in range(0, len(first_values), LOOKUP_BATCH_SIZE):
+            batch = first_values[i:i+LOOKUP_BATCH_SIZE]
+            for row_id, *key in session.execute(select(model.id, *key_columns).where(key_columns[0].in_(batch))):
+                if tuple(key) in rows:
+                    ids[tuple(key)] = row_id
+        
+        # Timestamps come from the column defaults, evaluated by the database
+        updates = [{**rows[key], 'id': row_id} for key, row_id in ids.items()]
+        if updates:
+            session.execute(update(model), updates)
+        
+        inserted = {key for key in rows if key not in ids}
+        if inserted:
+            inserts = [row for key, row in rows.items() if key in inserted]
+            for row_id, *key in session.execute(insert(model).returning(model.id, *key_columns), inserts):
+                ids[tuple(key)] = row_id
+        
+        return ids, inserted
+    
+    def _add_retail_product_tx(self, session: Session, product: RetailProduct) -> RetailProductModel:
+        """Add or update a retail product within the caller's transaction"""
+        # The product dataclass has the same fields as the table
+        model = self._upsert_model_tx(session, RetailProductModel, ['product_id', 'store'], asdict(product))
+        if model is not None:
+            return model
+        
+        # Check if product already exists
+        existing = session.query(RetailProductModel).filter_by(
+            product_id=product.product_id,
+            store=product.store
+        ).first()
+        
+        if existing:
+            # Update existing product
+            existing.title = product.title
+            existing.price = product.price
+            existing.original_price = product.original_price
+            existing.url = product.url
+            existing.image_url = product.image_url
+            existing.brand = product.brand
+            existing.category = product.category
+            existing.upc = product.upc
+            existing.sku = product.sku
+            existing.description = product.description
+            return existing
+        
+        # Create new product
+        model = RetailProductModel.from_retail_product(product)
+        session.add(model)
+        return model
+    
+    def _add_amazon_product_tx(self, session: Session, product: AmazonProduct) -> AmazonProductModel:
+        """Add or update an Amazon product within the caller's transaction"""
+        model = self._upsert_model_tx(
+            session, AmazonProductModel, ['asin'], dict(zip(AmazonProduct.ROW_FIELDS, product.to_row()))
+        )
+        if model is not None:
+            return model
+        
+        # Check if product already exists
+        existing = session.query(AmazonProductModel).filter_by(asin=product.asin).first()
+        
+        if existing:
+            # Update existing product
+            existing.title = product.title
+            existing.price = product.price
+            existing.sales_rank = product.sales_rank
+            existing.category = product.category
+            existing.review_count = product.review_count
+            existing.rating = product.rating
+            existing.image_url = product.image_url
+            existing.url = product.url
+            existing.features = orjson.dumps(product.features).decode() if product.features else None
+            existing.description = product.description
+            return existing
         
-        return models
+        # Create new product
+        model = AmazonProductModel.from_amazon_product(product)
+        session.add(model)
+        return model
+    
+    def _add_arbitrage_opportunity_tx(self, session: Session,
+                                      opportunity: ArbitrageOpportunity) -> ArbitrageOpportunityModel:
+        """Add or update an arbitrage opportunity and its products within the caller's transaction"""
+        # Add retail product
+        retail_model = self._add_retail_product_tx(session, opportunity.retail_product)
+        
+        # Add Amazon product
+        amazon_model = self._add_amazon_product_tx(session, opportunity.amazon_product)
+        
+        # Assign IDs to new products
+        session.flush()
+        
+        # Check if opportunity already exists
+        existing = session.query(ArbitrageOpportunityModel).filter_by(
+            retail_product_id=retail_model.id,
+            amazon_product_id=amazon_model.id
+        ).first()
+        
+        if existing:
+            # Update existing opportunity
+            existing.fulfillment_method = opportunity.fulfillment_method
+            existing.profit = opportunity.profit
+            existing.roi = opportunity.roi
+            existing.is_profitable = opportunity.is_profitable
+            
+            # Update costs
+            if existing.costs:
+                costs_model = existing.costs
+                costs_model.buy_price = opportunity.costs.buy_price
+                costs_model.amazon_fees = opportunity.costs.amazon_fees
+                costs_model.fulfillment_cost = opportunity.costs.fulfillment_cost
+                costs_model.shipping_to_amazon = opportunity.costs.shipping_to_amazon
+                costs_model.other_costs = opportunity.costs.other_costs
+            else:
+                costs_model = ArbitrageCostsModel.from_arbitrage_costs(opportunity.costs)
+                costs_model.opportunity = existing
+                session.add(costs_model)
+            
+            return existing
+        
+        # Create new opportunity
+        model = ArbitrageOpportunityModel.from_arbitrage_opportunity(
+            opportunity, retail_model.id, amazon_model.id
+        )
+        session.add(model)
+        
+        # Add costs
+        costs_model = ArbitrageCostsModel.from_arbitrage_costs(opportunity.costs)
+        costs_model.opportunity = model
+        session.add(costs_model)
+        
+        return model
     
     def get_opportunities(self, min_roi: Optional[float] = None, 
                          min_profit: Optional[float] = None,
@@ -447,49 +814,59 @@ class ProductDatabase:
         Returns:
             List of opportunity dictionaries
         """
-        session = self.get_session()
         try:
-            query = session.query(ArbitrageOpportunityModel)
-            
-            # Apply filters
-            if min_roi is not None:
-                query = query.filter(ArbitrageOpportunityModel.roi >= min_roi)
-            
-            if min_profit is not None:
-                query = query.filter(ArbitrageOpportunityModel.profit >= min_profit)
-            
-            # Order by ROI (highest first)
-            query = query.order_by(ArbitrageOpportunityModel.roi.desc())
-            
-            # Limit results
-            query = query.limit(limit)
-            
-            # Execute query
-            models = query.all()
-            
-            # Convert to dictionaries
-            opportunities = []
-            for model in models:
-                opportunity = {
-                    'id': model.id,
-                    'retail_product': model.retail_product.to_retail_product(),
-                    'amazon_product': model.amazon_product.to_amazon_product(),
-                    'fulfillment_method': model.fulfillment_method,
-                    'profit': model.profit,
-                    'roi': model.roi,
-                    'is_profitable': model.is_profitable,
-                    'costs': model.costs.to_arbitrage_costs() if model.costs else None,
-                    'created_at': model.created_at,
-                    'updated_at': model.updated_at
-                }
-                opportunities.append(opportunity)
-            
-            return opportunities
+            with self._session_scope() as session:
+                stmt = self._opportunities_select(min_roi, min_profit).limit(limit)
+                
+                # Execute query and convert to dictionaries
+                return [_opportunity_to_dict(row) for row in session.execute(stmt).mappings()]
         except Exception as e:
             logger.error(f"Error getting opportunities: {e}")
             return []
-        finally:
-            session.close()
+    
+    def iter_opportunities(self, min_roi: Optional[float] = None,
+                           min_profit: Optional[float] = None,
+                           limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over arbitrage opportunities without loading them all at once
+        
+        Rows are streamed from the database in batches, so memory stays bounded
+        however many opportunities match. The session is held open until the
+        iterator is exhausted or closed.
+        
+        Args:
+            min_roi: Minimum ROI percentage
+            min_profit: Minimum profit amount
+            limit: Maximum number of opportunities to return, or None for all
+            
+        Returns:
+            Iterator of opportunity dictionaries
+        """
+        try:
+            with self._session_scope() as session:
+                stmt = self._opportunities_select(min_roi, min_profit)
+                if limit is not None:
+                    stmt = stmt.limit(limit)
+                
+                result = session.execute(stmt, execution_options={'stream_results': True, 'yield_per': READ_BATCH_SIZE})
+                for row in result.mappings():
+                    yield _opportunity_to_dict(row)
+        except Exception as e:
+            logger.error(f"Error iterating opportunities: {e}")
+    
+    def _opportunities_select(self, min_roi: Optional[float], min_profit: Optional[float]):
+        """Build the SELECT of opportunities matching the filters, highest ROI first"""
+        stmt = _OPPORTUNITY_SELECT
+        
+        # Apply filters
+        if min_roi is not None:
+            stmt = stmt.where(ArbitrageOpportunityModel.roi >= min_roi)
+        
+        if min_profit is not None:
+            stmt = stmt.where(ArbitrageOpportunityModel.profit >= min_profit)
+        
+        # Order by ROI (highest first)
+        return stmt.order_by(ArbitrageOpportunityModel.roi.desc())
     
     def get_opportunity_by_id(self, opportunity_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -501,32 +878,18 @@ class ProductDatabase:
         Returns:
             Opportunity dictionary or None if not found
         """
-        session = self.get_session()
         try:
-            model = session.query(ArbitrageOpportunityModel).filter_by(id=opportunity_id).first()
-            
-            if not model:
-                return None
-            
-            opportunity = {
-                'id': model.id,
-                'retail_product': model.retail_product.to_retail_product(),
-                'amazon_product': model.amazon_product.to_amazon_product(),
-                'fulfillment_method': model.fulfillment_method,
-                'profit': model.profit,
-                'roi': model.roi,
-                'is_profitable': model.is_profitable,
-                'costs': model.costs.to_arbitrage_costs() if model.costs else None,
-                'created_at': model.created_at,
-                'updated_at': model.updated_at
-            }
-            
-            return opportunity
+            with self._session_scope() as session:
+                stmt = _OPPORTUNITY_SELECT.where(ArbitrageOpportunityModel.id == opportunity_id)
+                row = session.execute(stmt).mappings().first()
+                
+                if not row:
+                    return None
+                
+                return _opportunity_to_dict(row)
         except Exception as e:
             logger.error(f"Error getting opportunity by ID: {e}")
             return None
-        finally:
-            session.close()
     
     def get_opportunities_by_store(self, store: str, limit: int = 100) -> List[Dict[str, Any]]:
         """
@@ -539,44 +902,21 @@ class ProductDatabase:
         Returns:
             List of opportunity dictionaries
         """
-        session = self.get_session()
         try:
-            query = session.query(ArbitrageOpportunityModel).join(
-                RetailProductModel, ArbitrageOpportunityModel.retail_product_id == RetailProductModel.id
-            ).filter(RetailProductModel.store == store)
-            
-            # Order by ROI (highest first)
-            query = query.order_by(ArbitrageOpportunityModel.roi.desc())
-            
-            # Limit results
-            query = query.limit(limit)
-            
-            # Execute query
-            models = query.all()
-            
-            # Convert to dictionaries
-            opportunities = []
-            for model in models:
-                opportunity = {
-                    'id': model.id,
-                    'retail_product': model.retail_product.to_retail_product(),
-                    'amazon_product': model.amazon_product.to_amazon_product(),
-                    'fulfillment_method': model.fulfillment_method,
-                    'profit': model.profit,
-                    'roi': model.roi,
-                    'is_profitable': model.is_profitable,
-                    'costs': model.costs.to_arbitrage_costs() if model.costs else None,
-                    'created_at': model.created_at,
-                    'updated_at': model.updated_at
-                }
-                opportunities.append(opportunity)
-            
-            return opportunities
+            with self._session_scope() as session:
+                stmt = _OPPORTUNITY_SELECT.where(RetailProductModel.store == store)
+                
+                # Order by ROI (highest first)
+                stmt = stmt.order_by(ArbitrageOpportunityModel.roi.desc())
+                
+                # Limit results
+                stmt = stmt.limit(limit)
+                
+                # Execute query and convert to dictionaries
+                return [_opportunity_to_dict(row) for row in session.execute(stmt).mappings()]
         except Exception as e:
             logger.error(f"Error getting opportunities by store: {e}")
             return []
-        finally:
-            session.close()
     
     def get_today_opportunities(self, limit: int = 100) -> List[Dict[str, Any]]:
         """
@@ -588,45 +928,27 @@ class ProductDatabase:
         Returns:
             List of opportunity dictionaries
         """
-        session = self.get_session()
         try:
-            today = datetime.utcnow().date()
-            query = session.query(ArbitrageOpportunityModel).filter(
-                ArbitrageOpportunityModel.created_at >= today
-            )
-            
-            # Order by ROI (highest first)
-            query = query.order_by(ArbitrageOpportunityModel.roi.desc())
-            
-            # Limit results
-            query = query.limit(limit)
-            
-            # Execute query
-            models = query.all()
-            
-            # Convert to dictionaries
-            opportunities = []
-            for model in models:
-                opportunity = {
-                    'id': model.id,
-                    'retail_product': model.retail_product.to_retail_product(),
-                    'amazon_product': model.amazon_product.to_amazon_product(),
-                    'fulfillment_method': model.fulfillment_method,
-                    'profit': model.profit,
-                    'roi': model.roi,
-                    'is_profitable': model.is_profitable,
-                    'costs': model.costs.to_arbitrage_costs() if model.costs else None,
-                    'created_at': model.created_at,
-                    'updated_at': model.updated_at
-                }
-                opportunities.append(opportunity)
-            
-            return opportunities
+            with self._session_scope() as session:
+                # Half-open range of datetimes, so the created_at index serves the filter
+                start = datetime.combine(datetime.utcnow().date(), time.min)
+                end = start + timedelta(days=1)
+                stmt = _OPPORTUNITY_SELECT.where(
+                    ArbitrageOpportunityModel.created_at >= start,
+                    ArbitrageOpportunityModel.created_at < end
+                )
+                
+                # Order by ROI (highest first)
+                stmt = stmt.order_by(ArbitrageOpportunityModel.roi.desc())
+                
+                # Limit results
+                stmt = stmt.limit(limit)
+                
+                # Execute query and convert to dictionaries
+                return [_opportunity_to_dict(row) for row in session.execute(stmt).mappings()]
         except Exception as e:
             logger.error(f"Error getting today's opportunities: {e}")
             return []
-        finally:
-            session.close()
     
     def delete_opportunity(self, opportunity_id: int) -> bool:
         """
@@ -638,25 +960,14 @@ class ProductDatabase:
         Returns:
             True if successful, False otherwise
         """
-        session = self.get_session()
         try:
-            model = session.query(ArbitrageOpportunityModel).filter_by(id=opportunity_id).first()
-            
-            if not model:
-                return False
-            
-            # Delete costs
-            if model.costs:
-                session.delete(model.costs)
-            
-            # Delete opportunity
-            session.delete(model)
-            session.commit()
-            
-            return True
+            with self._session_scope() as session:
+                # Delete costs explicitly as well, since databases created before
+                # the foreign key cascaded deletes don't remove them on their own
+                session.execute(delete(ArbitrageCostsModel).where(ArbitrageCostsModel.opportunity_id == opportunity_id))
+                result = session.execute(delete(ArbitrageOpportunityModel).where(ArbitrageOpportunityModel.id == opportunity_id))
+                
+                return result.rowcount > 0
         except Exception as e:
-            session.rollback()
             logger.error(f"Error deleting opportunity: {e}")
             return False
-        finally:
-            session.close()
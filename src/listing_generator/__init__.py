@@ -3,8 +3,9 @@ Listing generator module initialization file
 Makes listing generator components available for import
 """
 
-from .listing_generator import ListingContentGenerator
+from .listing_generator import ListingContentGenerator, get_default_generator
 
 __all__ = [
-    'ListingContentGenerator'
+    'ListingContentGenerator',
+    'get_default_generator'
 ]
@@ -6,43 +6,226 @@ Generates optimized product listings for Amazon based on retail product data
 import os
 import logging
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+from functools import lru_cache
+import hashlib
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple
 import json
-import random
+import zlib
 from datetime import datetime
+from pathlib import Path
 
+import numpy as np
 import openai
-from nltk.tokenize import sent_tokenize
-import nltk
+import orjson
+from jinja2 import Environment, FileSystemLoader, Template
 
 from src.retail_scanners import RetailProduct
-from src.amazon import AmazonProduct
-
-# Download NLTK data if not already present
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+from src.amazon import AmazonProduct, TTLCache
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Template-based bullet points, filled in per product
+_BULLET_TEMPLATES = (
+    "PREMIUM QUALITY - This {product} is made with high-quality materials to ensure durability and long-lasting performance, providing excellent value for your investment.",
+    "VERSATILE DESIGN - Perfect for {use_case}, this {product} offers exceptional versatility and convenience for everyday use in various situations.",
+    "EASY TO USE - The {product} features a user-friendly design that makes it simple to operate, saving you time and effort while delivering outstanding results.",
+    "PERFECT GIFT IDEA - This {product} makes an excellent gift for {occasion}, sure to impress with its quality and functionality.",
+    "SATISFACTION GUARANTEED - We stand behind the quality of our {product}, offering complete customer satisfaction with reliable performance you can trust."
+)
+
+# Category-specific use cases and occasions for the bullet points
+_USE_CASES = MappingProxyType({
+    "Electronics": "home entertainment, office work, or travel",
+    "Toys": "playtime, learning activities, or child development",
+    "Home": "home decoration, organization, or everyday household tasks",
+    "Clothing": "casual outings, special occasions, or everyday wear",
+    "Beauty": "daily skincare routines, special occasions, or professional use",
+    "Kitchen": "cooking, baking, or entertaining guests",
+    "Sports": "training, competitions, or casual exercise",
+    "Books": "learning, entertainment, or professional development",
+    "Generic": "various applications, daily use, or special occasions"
+})
+
+_OCCASIONS = MappingProxyType({
+    "Electronics": "technology enthusiasts, students, or professionals",
+    "Toys": "birthdays, holidays, or special achievements",
+    "Home": "housewarming, weddings, or anniversaries",
+    "Clothing": "birthdays, holidays, or special occasions",
+    "Beauty": "birthdays, self-care enthusiasts, or beauty lovers",
+    "Kitchen": "cooking enthusiasts, newlyweds, or new homeowners",
+    "Sports": "fitness enthusiasts, athletes, or active individuals",
+    "Books": "book lovers, students, or lifelong learners",
+    "Generic": "birthdays, holidays, or any special occasion"
+})
+
+
+def _freeze_keywords(keywords: Dict[str, List[str]]) -> Mapping[str, Tuple[str, ...]]:
+    """Make keywords by category read-only, with hashable tuples the cached templates can take"""
+    return MappingProxyType({category: tuple(words) for category, words in keywords.items()})
+
+
+# Default keywords by category if the keywords file is not found
+_DEFAULT_KEYWORDS = _freeze_keywords({
+    "Electronics": [
+        "high quality", "durable", "wireless", "bluetooth", "rechargeable", 
+        "fast charging", "long battery life", "HD", "4K", "smart", "compatible",
+        "portable", "lightweight", "premium", "professional", "noise cancelling"
+    ],
+    "Toys": [
+        "educational", "fun", "creative", "interactive", "colorful", "durable",
+        "safe", "non-toxic", "developmental", "engaging", "award-winning",
+        "STEM", "classic", "popular", "bestselling", "age-appropriate"
+    ],
+    "Home": [
+        "premium", "durable", "easy to clean", "stylish", "modern", "elegant",
+        "space-saving", "multifunctional", "high quality", "comfortable",
+        "eco-friendly", "stain-resistant", "waterproof", "decorative", "practical"
+    ],
+    "Clothing": [
+        "comfortable", "stylish", "premium", "soft", "breathable", "durable",
+        "machine washable", "high quality", "trendy", "classic", "versatile",
+        "lightweight", "stretchy", "moisture-wicking", "fashionable"
+    ],
+    "Beauty": [
+        "natural", "organic", "cruelty-free", "vegan", "paraben-free", "effective",
+        "gentle", "hydrating", "nourishing", "anti-aging", "dermatologist tested",
+        "long-lasting", "premium", "professional", "salon quality"
+    ],
+    "Kitchen": [
+        "durable", "easy to clean", "dishwasher safe", "premium", "professional",
+        "high quality", "stainless steel", "non-stick", "BPA-free", "multifunctional",
+        "space-saving", "ergonomic", "chef-recommended", "versatile"
+    ],
+    "Sports": [
+        "durable", "high performance", "professional", "comfortable", "lightweight",
+        "breathable", "water-resistant", "adjustable", "premium", "ergonomic",
+        "versatile", "high quality", "training", "exercise", "fitness"
+    ],
+    "Books": [
+        "bestselling", "award-winning", "critically acclaimed", "educational",
+        "informative", "comprehensive", "illustrated", "practical", "essential",
+        "definitive", "authoritative", "popular", "classic", "inspiring"
+    ],
+    "Generic": [
+        "high quality", "premium", "durable", "versatile", "practical",
+        "perfect gift", "essential", "popular", "bestselling", "value pack",
+        "satisfaction guaranteed", "top rated", "multipurpose", "convenient"
+    ]
+})
+
+
+@lru_cache(maxsize=1)
+def _load_keywords_file(keywords_file: str) -> Mapping[str, Tuple[str, ...]]:
+    """
+    Load keywords by category from a JSON file, falling back to the defaults
+    
+    The result is read-only, so it is parsed once and shared by every generator.
+    """
+    try:
+        if os.path.exists(keywords_file):
+            return _freeze_keywords(orjson.loads(Path(keywords_file).read_bytes()))
+    except Exception as e:
+        logger.error(f"Error loading keywords: {e}")
+    
+    return _DEFAULT_KEYWORDS
+
+
+def _seed(text: str) -> int:
+    """Stable seed derived from text, unlike hash() which varies between runs"""
+    return zlib.crc32(text.encode())
+
+
+def _pick(keywords: Sequence[str], k: int, seed: int) -> List[str]:
+    """
+    Pick up to k consecutive keywords, wrapping around, from a position derived from seed
+    
+    A deterministic stand-in for random.sample, so the same product always
+    gets the same keywords.
+    """
+    if not keywords:
+        return []
+    start = seed % len(keywords)
+    return [keywords[(start + i) % len(keywords)] for i in range(min(k, len(keywords)))]
+
+
+@lru_cache(maxsize=4096)
+def _template_description(product_name: str, brand: str, category: str, keywords: Tuple[str, ...]) -> str:
+    """
+    Build a template-based product description
+    
+    Keywords are picked deterministically, so the description only depends
+    on the arguments and repeat products are served from the cache.
+    """
+    selected_keywords = _pick(keywords, 5, _seed(product_name))
+    
+    # Create description paragraphs
+    intro = f"""<p><strong>Introducing the {product_name}</strong> - a {selected_keywords[0]} addition to your {category.lower()} collection. {brand} is proud to offer this {selected_keywords[1]} product designed to enhance your experience and provide exceptional value.</p>"""
+    
+    features = f"""<p>This {product_name} features {selected_keywords[2]} construction for durability and long-lasting performance. The {selected_keywords[3]} design ensures it will integrate seamlessly into your lifestyle, providing convenience and satisfaction with every use.</p>"""
+    
+    benefits = f"""<p>Experience the benefits of owning this {selected_keywords[4]} {product_name}:</p>
+        <ul>
+            <li>Enhanced performance for optimal results</li>
+            <li>Reliable durability for long-term use</li>
+            <li>Versatile functionality for various applications</li>
+            <li>User-friendly design for convenience and ease</li>
+        </ul>"""
+    
+    conclusion = f"""<p>Don't miss this opportunity to own the {product_name}. <strong>Add to cart now</strong> and experience the quality and performance that {brand} products are known for. Your satisfaction is our priority!</p>"""
+    
+    # Combine paragraphs
+    return "\n\n".join((intro, features, benefits, conclusion))
+
+
+@lru_cache(maxsize=1)
+def _preview_template() -> Template:
+    """Compile the HTML preview template on first use"""
+    environment = Environment(
+        loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')),
+        autoescape=True
+    )
+    return environment.get_template('preview.html.j2')
+
+
 class ListingContentGenerator:
     """
     Generates optimized Amazon product listings based on retail product data
     and competitive analysis of existing Amazon listings
+    
+    Synchronous generation is safe to call from several threads, so one
+    instance can be shared (see get_default_generator). keywords_by_category
+    is read-only and shared between instances.
     """
     
-    def __init__(self, openai_api_key: str = None):
+    # Chat model used for AI generation
+    MODEL = "gpt-4o-mini"
+    
+    # How long AI responses are reused for an identical request (7 days)
+    AI_CACHE_TTL = 7 * 24 * 60 * 60
+    
+    def __init__(self, openai_api_key: str = None, cache_path: Optional[str] = None):
         """
         Initialize the listing content generator
         
         Args:
             openai_api_key: OpenAI API key for content generation
+            cache_path: Optional SQLite file persisting AI responses across runs
         """
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         
+        # Repeat scans see the same products, so responses are cached by request
+        self.ai_cache = TTLCache(maxsize=4096, ttl=self.AI_CACHE_TTL, path=cache_path)
+        
+        # The async client is created lazily for the event loop it runs on
+        self._async_client = None
+        self._async_loop = None
+        
         if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+            self.client = openai.OpenAI(api_key=self.openai_api_key)
             self.use_ai = True
         else:
             logger.warning("OpenAI API key not found, using template-based generation")
@@ -51,70 +234,15 @@ class ListingContentGenerator:
         # Load keyword data
         self.keywords_by_category = self._load_keywords()
     
-    def _load_keywords(self) -> Dict[str, List[str]]:
+    def _load_keywords(self) -> Mapping[str, Tuple[str, ...]]:
         """
         Load category-specific keywords from file or use default set
         
         Returns:
-            Dictionary mapping categories to lists of keywords
+            Read-only mapping of categories to tuples of keywords
         """
-        try:
-            keywords_file = os.path.join(os.path.dirname(__file__), 'data', 'amazon_keywords.json')
-            
-            if os.path.exists(keywords_file):
-                with open(keywords_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading keywords: {e}")
-        
-        # Default keywords by category if file not found
-        return {
-            "Electronics": [
-                "high quality", "durable", "wireless", "bluetooth", "rechargeable", 
-                "fast charging", "long battery life", "HD", "4K", "smart", "compatible",
-                "portable", "lightweight", "premium", "professional", "noise cancelling"
-            ],
-            "Toys": [
-                "educational", "fun", "creative", "interactive", "colorful", "durable",
-                "safe", "non-toxic", "developmental", "engaging", "award-winning",
-                "STEM", "classic", "popular", "bestselling", "age-appropriate"
-            ],
-            "Home": [
-                "premium", "durable", "easy to clean", "stylish", "modern", "elegant",
-                "space-saving", "multifunctional", "high quality", "comfortable",
-                "eco-friendly", "stain-resistant", "waterproof", "decorative", "practical"
-            ],
-            "Clothing": [
-                "comfortable", "stylish", "premium", "soft", "breathable", "durable",
-                "machine washable", "high quality", "trendy", "classic", "versatile",
-                "lightweight", "stretchy", "moisture-wicking", "fashionable"
-            ],
-            "Beauty": [
-                "natural", "organic", "cruelty-free", "vegan", "paraben-free", "effective",
-                "gentle", "hydrating", "nourishing", "anti-aging", "dermatologist tested",
-                "long-lasting", "premium", "professional", "salon quality"
-            ],
-            "Kitchen": [
-                "durable", "easy to clean", "dishwasher safe", "premium", "professional",
-                "high quality", "stainless steel", "non-stick", "BPA-free", "multifunctional",
-                "space-saving", "ergonomic", "chef-recommended", "versatile"
-            ],
-            "Sports": [
-                "durable", "high performance", "professional", "comfortable", "lightweight",
-                "breathable", "water-resistant", "adjustable", "premium", "ergonomic",
-                "versatile", "high quality", "training", "exercise", "fitness"
-            ],
-            "Books": [
-                "bestselling", "award-winning", "critically acclaimed", "educational",
-                "informative", "comprehensive", "illustrated", "practical", "essential",
-                "definitive", "authoritative", "popular", "classic", "inspiring"
-            ],
-            "Generic": [
-                "high quality", "premium", "durable", "versatile", "practical",
-                "perfect gift", "essential", "popular", "bestselling", "value pack",
-                "satisfaction guaranteed", "top rated", "multipurpose", "convenient"
-            ]
-        }
+        keywords_file = os.path.join(os.path.dirname(__file__), 'data', 'amazon_keywords.json')
+        return _load_keywords_file(keywords_file)
     
     def generate_listing(self, retail_product: RetailProduct, 
                          amazon_product: Optional[AmazonProduct] = None) -> Dict[str, Any]:
@@ -128,13 +256,80 @@ class ListingContentGenerator:
         Returns:
             Dictionary containing optimized listing content
         """
+        ai_fields = self._generate_all_fields(retail_product, amazon_product)
+        return self._compose_listing(retail_product, amazon_product, ai_fields)
+    
+    async def generate_listing_async(self, retail_product: RetailProduct,
+                                     amazon_product: Optional[AmazonProduct] = None) -> Dict[str, Any]:
+        """Generate listing content without blocking the event loop"""
+        ai_fields = await self._generate_all_fields_async(retail_product, amazon_product)
+        return self._compose_listing(retail_product, amazon_product, ai_fields)
+    
+    async def generate_listings_batch(self, products: Sequence[Tuple[RetailProduct, Optional[AmazonProduct]]],
+                                      concurrency: int = 16) -> List[Dict[str, Any]]:
+        """
+        Generate listing content for many products concurrently
+        
+        Args:
+            products: Pairs of retail product and existing Amazon product (or None)
+            concurrency: Maximum number of AI requests in flight at once
+            
+        Returns:
+            List of listing dictionaries, in the order of products
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        pricing = self.generate_pricing_batch(products)
+        
+        async def generate(retail_product: RetailProduct, amazon_product: Optional[AmazonProduct],
+                           product_pricing: Dict[str, float]):
+            async with semaphore:
+                ai_fields = await self._generate_all_fields_async(retail_product, amazon_product)
+            return self._compose_listing(retail_product, amazon_product, ai_fields, product_pricing)
+        
+        return await asyncio.gather(*(generate(retail_product, amazon_product, product_pricing)
+                                      for (retail_product, amazon_product), product_pricing
+                                      in zip(products, pricing)))
+    
+    async def aclose(self):
+        """Release resources used by async generation"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_loop = None
+    
+    def _get_async_client(self) -> 'openai.AsyncOpenAI':
+        """Get the async OpenAI client, creating it for the running event loop"""
+        # The client's HTTP connections are bound to the loop it first ran on
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = openai.AsyncOpenAI(api_key=self.openai_api_key)
+            self._async_loop = loop
+        return self._async_client
+    
+    def _compose_listing(self, retail_product: RetailProduct, amazon_product: Optional[AmazonProduct],
+                         ai_fields: Dict[str, Any], pricing: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Compile listing content from AI generated fields, using templates for missing ones
+        
+        Args:
+            retail_product: Retail product data
+            amazon_product: Existing Amazon product data (if available)
+            ai_fields: Fields generated by the AI
+            pricing: Pricing suggestions computed in advance (default: computed here)
+            
+        Returns:
+            Dictionary containing optimized listing content
+        """
+        generated_at = datetime.now().isoformat()
+        
         try:
-            # Extract product information
-            title = self._generate_title(retail_product, amazon_product)
-            bullet_points = self._generate_bullet_points(retail_product, amazon_product)
-            description = self._generate_description(retail_product, amazon_product)
-            keywords = self._generate_keywords(retail_product, amazon_product)
-            pricing = self._generate_pricing_suggestions(retail_product, amazon_product)
+            title = ai_fields.get('title') or self._generate_title(retail_product, amazon_product)
+            bullet_points = (ai_fields.get('bullet_points') or
+                             self._generate_bullet_points(retail_product, amazon_product))
+            description = ai_fields.get('description') or self._generate_description(retail_product, amazon_product)
+            keywords = ai_fields.get('keywords') or self._generate_keywords(retail_product, amazon_product)
+            if pricing is None:
+                pricing = self._generate_pricing_suggestions(retail_product, amazon_product)
             
             # Compile listing content
             listing = {
@@ -143,32 +338,218 @@ class ListingContentGenerator:
                 "description": description,
                 "keywords": keywords,
                 "pricing": pricing,
-                "generated_at": datetime.now().isoformat()
+                "generated_at": generated_at
             }
             
             return listing
         
         except Exception as e:
             logger.error(f"Error generating listing content: {e}")
+            return self._fallback_listing(retail_product, generated_at)
+    
+    @staticmethod
+    def _fallback_listing(retail_product: RetailProduct, generated_at: str) -> Dict[str, Any]:
+        """
+        Build a basic listing straight from the retail product, used if generation fails
+        
+        Args:
+            retail_product: Retail product data
+            generated_at: ISO timestamp of the listing
             
-            # Return basic listing if error occurs
-            return {
-                "title": retail_product.title,
-                "bullet_points": ["Product imported from retail store"],
-                "description": f"This is a {retail_product.title} product.",
-                "keywords": [retail_product.title.split()],
-                "pricing": {
-                    "suggested_price": retail_product.price * 1.5,
-                    "min_price": retail_product.price * 1.3,
-                    "max_price": retail_product.price * 2.0
-                },
-                "generated_at": datetime.now().isoformat()
-            }
+        Returns:
+            Dictionary containing basic listing content
+        """
+        return {
+            "title": retail_product.title,
+            "bullet_points": ["Product imported from retail store"],
+            "description": f"This is a {retail_product.title} product.",
+            "keywords": retail_product.title.split(),
+            "pricing": {
+                "suggested_price": retail_product.price * 1.5,
+                "min_price": retail_product.price * 1.3,
+                "max_price": retail_product.price * 2.0
+            },
+            "generated_at": generated_at
+        }
+    
+    def _generate_all_fields(self, retail_product: RetailProduct,
+                             amazon_product: Optional[AmazonProduct] = None) -> Dict[str, Any]:
+        """
+        Generate title, bullet points, description and keywords with a single AI request
+        
+        Args:
+            retail_product: Retail product data
+            amazon_product: Existing Amazon product data (if available)
+            
+        Returns:
+            Dictionary with the fields the AI returned usable values for;
+            empty if AI generation is disabled or fails
+        """
+        if not (self.use_ai and self.openai_api_key):
+            return {}
+        
+        try:
+            request = self._completion_request(retail_product)
+            key = self._cache_key(request)
+            hit, content = self.ai_cache.get(key)
+            if not hit:
+                response = self.client.chat.completions.create(**request)
+                content = response.choices[0].message.content
+            
+            # Only responses that parse are cached
+            fields = self._parse_ai_fields(content, retail_product)
+            if not hit:
+                self.ai_cache.set(key, content)
+            return fields
+        except Exception as e:
+            logger.error(f"Error generating AI listing content: {e}")
+            return {}
+    
+    async def _generate_all_fields_async(self, retail_product: RetailProduct,
+                                         amazon_product: Optional[AmazonProduct] = None) -> Dict[str, Any]:
+        """Generate the AI fields like _generate_all_fields, without blocking the event loop"""
+        if not (self.use_ai and self.openai_api_key):
+            return {}
+        
+        try:
+            request = self._completion_request(retail_product)
+            key = self._cache_key(request)
+            hit, content = await asyncio.to_thread(self.ai_cache.get, key)
+            if not hit:
+                response = await self._get_async_client().chat.completions.create(**request)
+                content = response.choices[0].message.content
+            
+            # Only responses that parse are cached
+            fields = self._parse_ai_fields(content, retail_product)
+            if not hit:
+                await asyncio.to_thread(self.ai_cache.set, key, content)
+            return fields
+        except Exception as e:
+            logger.error(f"Error generating AI listing content: {e}")
+            return {}
+    
+    def _completion_request(self, retail_product: RetailProduct) -> Dict[str, Any]:
+        """
+        Build the chat completion request asking for all listing fields as one JSON object
+        
+        Args:
+            retail_product: Retail product data
+            
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        prompt = f"""
+        Create optimized Amazon listing content for the following product:
+        
+        Product: {retail_product.title}
+        Brand: {retail_product.brand or 'Unknown'}
+        Category: {retail_product.category or 'General'}
+        Description: {retail_product.description or 'No description available'}
+        
+        Return a JSON object with these keys:
+        "title": the product title, which should
+            1. Be 150-200 characters long
+            2. Include the brand name first
+            3. Include key product features and benefits
+            4. Include color, size, or quantity if applicable
+            5. Include important keywords for searchability
+        "bullet_points": a list of 5 bullet points, each of which should
+            1. Highlight a key feature or benefit
+            2. Be 150-200 characters long
+            3. Start with a benefit in ALL CAPS
+            4. Include important keywords for searchability
+        "description": the product description, which should
+            1. Be 1000-2000 characters long
+            2. Start with an engaging introduction about the product
+            3. Include 3-4 paragraphs highlighting features and benefits
+            4. Use HTML formatting (<p>, <strong>, <em>, <ul>, <li>) for readability
+            5. Include a call to action at the end
+            6. Incorporate important keywords naturally
+        "keywords": a list of 20 search keywords, which should
+            1. Include both short-tail and long-tail keywords
+            2. Be relevant to the product and its features
+            3. Include common search terms in this product category
+            4. Include variations and synonyms
+        
+        Return only the JSON object without any additional commentary.
+        """
+        
+        return {
+            "model": self.MODEL,
+            "messages": [
+                {"role": "system", "content": "You generate Amazon product listings."},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 2100,
+            "n": 1,
+            # Deterministic, so a cached response is what a new request would return
+            "temperature": 0
+        }
+    
+    def _cache_key(self, request: Dict[str, Any]) -> str:
+        """Hash a completion request into its AI response cache key"""
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+    
+    def _parse_ai_fields(self, content: str, retail_product: RetailProduct) -> Dict[str, Any]:
+        """
+        Parse and clean the JSON object returned by the AI
+        
+        Args:
+            content: Response text
+            retail_product: Retail product data
+            
+        Returns:
+            Dictionary with the usable fields of the response
+        """
+        # JSON mode guarantees the response parses
+        data = json.loads(content)
+        if not isinstance(data, dict):
+            logger.error("AI listing content is not a JSON object")
+            return {}
+        
+        fields = {}
+        
+        title = data.get('title')
+        if isinstance(title, str) and title.strip():
+            title = title.strip()
+            # Ensure title is not too long for Amazon (max 200 characters)
+            if len(title) > 200:
+                title = title[:197] + "..."
+            fields['title'] = title
+        
+        bullets = data.get('bullet_points')
+        if isinstance(bullets, list):
+            cleaned_bullets = []
+            for bullet in bullets:
+                bullet = str(bullet).strip()
+                if bullet.startswith('- '):
+                    bullet = bullet[2:]
+                if bullet:
+                    cleaned_bullets.append(bullet)
+            
+            if cleaned_bullets:
+                # Ensure we have 5 bullet points
+                while len(cleaned_bullets) < 5:
+                    cleaned_bullets.append(f"PREMIUM QUALITY - This {retail_product.title} is designed to provide exceptional performance and durability for long-lasting use.")
+                fields['bullet_points'] = cleaned_bullets[:5]
+        
+        description = data.get('description')
+        if isinstance(description, str) and description.strip():
+            fields['description'] = description.strip()
+        
+        keywords = data.get('keywords')
+        if isinstance(keywords, list):
+            cleaned_keywords = [str(keyword).strip() for keyword in keywords if str(keyword).strip()]
+            if cleaned_keywords:
+                fields['keywords'] = cleaned_keywords
+        
+        return fields
     
     def _generate_title(self, retail_product: RetailProduct, 
                        amazon_product: Optional[AmazonProduct] = None) -> str:
         """
-        Generate optimized product title
+        Generate optimized product title from templates
         
         Args:
             retail_product: Retail product data
@@ -177,47 +558,6 @@ class ListingContentGenerator:
         Returns:
             Optimized product title
         """
-        if self.use_ai and self.openai_api_key:
-            try:
-                # Use AI to generate optimized title
-                prompt = f"""
-                Create an optimized Amazon product title for the following product:
-                
-                Product: {retail_product.title}
-                Brand: {retail_product.brand or 'Unknown'}
-                Category: {retail_product.category or 'General'}
-                
-                The title should:
-                1. Be 150-200 characters long
-                2. Include the brand name first
-                3. Include key product features and benefits
-                4. Include color, size, or quantity if applicable
-                5. Include important keywords for searchability
-                
-                Return only the title text without any additional commentary.
-                """
-                
-                response = openai.Completion.create(
-                    engine="text-davinci-003",
-                    prompt=prompt,
-                    max_tokens=100,
-                    n=1,
-                    stop=None,
-                    temperature=0.7
-                )
-                
-                ai_title = response.choices[0].text.strip()
-                
-                # Ensure title is not too long for Amazon (max 200 characters)
-                if len(ai_title) > 200:
-                    ai_title = ai_title[:197] + "..."
-                
-                return ai_title
-            
-            except Exception as e:
-                logger.error(f"Error generating AI title: {e}")
-                # Fall back to template-based generation
-        
         # Template-based title generation
         brand = retail_product.brand or ""
         title = retail_product.title
@@ -225,7 +565,7 @@ class ListingContentGenerator:
         # Remove brand from title if it's already there to avoid duplication
         if brand and brand in title:
             title = title.replace(brand, "").strip()
-            title = re.sub(r'\s+', ' ', title)  # Remove extra spaces
+            title = _WHITESPACE_RE.sub(' ', title)  # Remove extra spaces
         
         # Get category-specific keywords
         category = retail_product.category or "Generic"
@@ -233,7 +573,7 @@ class ListingContentGenerator:
             category = "Generic"
         
         keywords = self.keywords_by_category[category]
-        selected_keywords = random.sample(keywords, min(3, len(keywords)))
+        selected_keywords = _pick(keywords, 3, _seed(retail_product.title))
         
         # Construct title with brand, product name, and keywords
         optimized_title = f"{brand} {title}"
@@ -246,10 +586,14 @@ class ListingContentGenerator:
         if hasattr(retail_product, 'size') and retail_product.size:
             optimized_title += f", {retail_product.size}"
         
-        # Add selected keywords
+        # Add selected keywords, keeping a lowercase copy of the title in step
+        # instead of lowercasing the whole title for every keyword
+        title_lower = optimized_title.lower()
         for keyword in selected_keywords:
-            if keyword.lower() not in optimized_title.lower() and len(optimized_title) + len(keyword) + 2 <= 200:
+            keyword_lower = keyword.lower()
+            if keyword_lower not in title_lower and len(optimized_title) + len(keyword) + 2 <= 200:
                 optimized_title += f", {keyword}"
+                title_lower += f", {keyword_lower}"
         
         # Ensure title is not too long for Amazon (max 200 characters)
         if len(optimized_title) > 200:
@@ -260,7 +604,7 @@ class ListingContentGenerator:
     def _generate_bullet_points(self, retail_product: RetailProduct, 
                                amazon_product: Optional[AmazonProduct] = None) -> List[str]:
         """
-        Generate optimized bullet points (key features)
+        Generate optimized bullet points (key features) from templates
         
         Args:
             retail_product: Retail product data
@@ -269,99 +613,14 @@ class ListingContentGenerator:
         Returns:
             List of optimized bullet points
         """
-        if self.use_ai and self.openai_api_key:
-            try:
-                # Use AI to generate optimized bullet points
-                prompt = f"""
-                Create 5 optimized Amazon product bullet points for the following product:
-                
-                Product: {retail_product.title}
-                Brand: {retail_product.brand or 'Unknown'}
-                Category: {retail_product.category or 'General'}
-                Description: {retail_product.description or 'No description available'}
-                
-                Each bullet point should:
-                1. Highlight a key feature or benefit
-                2. Be 150-200 characters long
-                3. Start with a benefit in ALL CAPS
-                4. Include important keywords for searchability
-                
-                Format each bullet point on a new line starting with a dash (-).
-                Return only the bullet points without any additional commentary.
-                """
-                
-                response = openai.Completion.create(
-                    engine="text-davinci-003",
-                    prompt=prompt,
-                    max_tokens=500,
-                    n=1,
-                    stop=None,
-                    temperature=0.7
-                )
-                
-                ai_bullets = response.choices[0].text.strip().split('\n')
-                
-                # Clean up bullet points
-                cleaned_bullets = []
-                for bullet in ai_bullets:
-                    bullet = bullet.strip()
-                    if bullet.startswith('- '):
-                        bullet = bullet[2:]
-                    if bullet:
-                        cleaned_bullets.append(bullet)
-                
-                # Ensure we have 5 bullet points
-                while len(cleaned_bullets) < 5:
-                    cleaned_bullets.append(f"PREMIUM QUALITY - This {retail_product.title} is designed to provide exceptional performance and durability for long-lasting use.")
-                
-                return cleaned_bullets[:5]  # Return max 5 bullet points
-            
-            except Exception as e:
-                logger.error(f"Error generating AI bullet points: {e}")
-                # Fall back to template-based generation
-        
-        # Template-based bullet point generation
-        bullet_templates = [
-            "PREMIUM QUALITY - This {product} is made with high-quality materials to ensure durability and long-lasting performance, providing excellent value for your investment.",
-            "VERSATILE DESIGN - Perfect for {use_case}, this {product} offers exceptional versatility and convenience for everyday use in various situations.",
-            "EASY TO USE - The {product} features a user-friendly design that makes it simple to operate, saving you time and effort while delivering outstanding results.",
-            "PERFECT GIFT IDEA - This {product} makes an excellent gift for {occasion}, sure to impress with its quality and functionality.",
-            "SATISFACTION GUARANTEED - We stand behind the quality of our {product}, offering complete customer satisfaction with reliable performance you can trust."
-        ]
-        
-        # Get category-specific use cases and occasions
-        category = retail_product.category or "Generic"
-        use_cases = {
-            "Electronics": "home entertainment, office work, or travel",
-            "Toys": "playtime, learning activities, or child development",
-            "Home": "home decoration, organization, or everyday household tasks",
-            "Clothing": "casual outings, special occasions, or everyday wear",
-            "Beauty": "daily skincare routines, special occasions, or professional use",
-            "Kitchen": "cooking, baking, or entertaining guests",
-            "Sports": "training, competitions, or casual exercise",
-            "Books": "learning, entertainment, or professional development",
-            "Generic": "various applications, daily use, or special occasions"
-        }
-        
-        occasions = {
-            "Electronics": "technology enthusiasts, students, or professionals",
-            "Toys": "birthdays, holidays, or special achievements",
-            "Home": "housewarming, weddings, or anniversaries",
-            "Clothing": "birthdays, holidays, or special occasions",
-            "Beauty": "birthdays, self-care enthusiasts, or beauty lovers",
-            "Kitchen": "cooking enthusiasts, newlyweds, or new homeowners",
-            "Sports": "fitness enthusiasts, athletes, or active individuals",
-            "Books": "book lovers, students, or lifelong learners",
-            "Generic": "birthdays, holidays, or any special occasion"
-        }
-        
         # Generate bullet points
+        category = retail_product.category or "Generic"
         product_name = retail_product.title.split()[-1] if retail_product.title else "product"
-        use_case = use_cases.get(category, use_cases["Generic"])
-        occasion = occasions.get(category, occasions["Generic"])
+        use_case = _USE_CASES.get(category, _USE_CASES["Generic"])
+        occasion = _OCCASIONS.get(category, _OCCASIONS["Generic"])
         
         bullets = []
-        for template in bullet_templates:
+        for template in _BULLET_TEMPLATES:
             bullet = template.format(
                 product=product_name,
                 use_case=use_case,
@@ -374,7 +633,7 @@ class ListingContentGenerator:
     def _generate_description(self, retail_product: RetailProduct, 
                              amazon_product: Optional[AmazonProduct] = None) -> str:
         """
-        Generate optimized product description
+        Generate optimized product description from templates
         
         Args:
             retail_product: Retail product data
@@ -383,44 +642,6 @@ class ListingContentGenerator:
         Returns:
             Optimized product description
         """
-        if self.use_ai and self.openai_api_key:
-            try:
-                # Use AI to generate optimized description
-                prompt = f"""
-                Create an optimized Amazon product description for the following product:
-                
-                Product: {retail_product.title}
-                Brand: {retail_product.brand or 'Unknown'}
-                Category: {retail_product.category or 'General'}
-                Description: {retail_product.description or 'No description available'}
-                
-                The description should:
-                1. Be 1000-2000 characters long
-                2. Start with an engaging introduction about the product
-                3. Include 3-4 paragraphs highlighting features and benefits
-                4. Use HTML formatting (<p>, <strong>, <em>, <ul>, <li>) for readability
-                5. Include a call to action at the end
-                6. Incorporate important keywords naturally
-                
-                Return only the description without any additional commentary.
-                """
-                
-                response = openai.Completion.create(
-                    engine="text-davinci-003",
-                    prompt=prompt,
-                    max_tokens=1000,
-                    n=1,
-                    stop=None,
-                    temperature=0.7
-                )
-                
-                ai_description = response.choices[0].text.strip()
-                return ai_description
-            
-            except Exception as e:
-                logger.error(f"Error generating AI description: {e}")
-                # Fall back to template-based generation
-        
         # Template-based description generation
         product_name = retail_product.title
         brand = retail_product.brand or "Our"
@@ -431,32 +652,12 @@ class ListingContentGenerator:
             category = "Generic"
         
         keywords = self.keywords_by_category[category]
-        selected_keywords = random.sample(keywords, min(5, len(keywords)))
-        
-        # Create description paragraphs
-        intro = f"""<p><strong>Introducing the {product_name}</strong> - a {selected_keywords[0]} addition to your {category.lower()} collection. {brand} is proud to offer this {selected_keywords[1]} product designed to enhance your experience and provide exceptional value.</p>"""
-        
-        features = f"""<p>This {product_name} features {selected_keywords[2]} construction for durability and long-lasting performance. The {selected_keywords[3]} design ensures it will integrate seamlessly into your lifestyle, providing convenience and satisfaction with every use.</p>"""
-        
-        benefits = f"""<p>Experience the benefits of owning this {selected_keywords[4]} {product_name}:</p>
-        <ul>
-            <li>Enhanced performance for optimal results</li>
-            <li>Reliable durability for long-term use</li>
-            <li>Versatile functionality for various applications</li>
-            <li>User-friendly design for convenience and ease</li>
-        </ul>"""
-        
-        conclusion = f"""<p>Don't miss this opportunity to own the {product_name}. <strong>Add to cart now</strong> and experience the quality and performance that {brand} products are known for. Your satisfaction is our priority!</p>"""
-        
-        # Combine paragraphs
-        description = f"{intro}\n\n{features}\n\n{benefits}\n\n{conclusion}"
-        
-        return description
+        return _template_description(product_name, brand, category, keywords)
     
     def _generate_keywords(self, retail_product: RetailProduct, 
                           amazon_product: Optional[AmazonProduct] = None) -> List[str]:
         """
-        Generate optimized search keywords
+        Generate optimized search keywords from templates
         
         Args:
             retail_product: Retail product data
@@ -465,69 +666,38 @@ class ListingContentGenerator:
         Returns:
             List of optimized search keywords
         """
-        if self.use_ai and self.openai_api_key:
-            try:
-                # Use AI to generate optimized keywords
-                prompt = f"""
-                Generate a list of 20 optimized Amazon search keywords for the following product:
-                
-                Product: {retail_product.title}
-                Brand: {retail_product.brand or 'Unknown'}
-                Category: {retail_product.category or 'General'}
-                Description: {retail_product.description or 'No description available'}
-                
-                The keywords should:
-                1. Include both short-tail and long-tail keywords
-                2. Be relevant to the product and its features
-                3. Include common search terms in this product category
-                4. Include variations and synonyms
-                
-                Format each keyword on a new line.
-                Return only the keywords without any additional commentary.
-                """
-                
-                response = openai.Completion.create(
-                    engine="text-davinci-003",
-                    prompt=prompt,
-                    max_tokens=500,
-                    n=1,
-                    stop=None,
-                    temperature=0.7
-                )
-                
-                ai_keywords = response.choices[0].text.strip().split('\n')
-                
-                # Clean up keywords
-                cleaned_keywords = []
-                for keyword in ai_keywords:
-                    keyword = keyword.strip()
-                    if keyword:
-                        cleaned_keywords.append(keyword)
-                
-                return cleaned_keywords
-            
-            except Exception as e:
-                logger.error(f"Error generating AI keywords: {e}")
-                # Fall back to template-based generation
-        
-        # Template-based keyword generation
+        # Template-based keyword generation, deduplicated as candidates come in
         keywords = []
+        seen = set()
+        candidates = 0
+        
+        def add(keyword: str) -> bool:
+            """Add a candidate keyword, returning True once 20 unique keywords are collected"""
+            nonlocal candidates
+            candidates += 1
+            if keyword not in seen:
+                seen.add(keyword)
+                keywords.append(keyword)
+            return len(keywords) >= 20
         
         # Add product title and components
-        keywords.append(retail_product.title)
+        if add(retail_product.title):
+            return keywords
         title_words = retail_product.title.split()
         if len(title_words) > 1:
-            keywords.extend([word for word in title_words if len(word) > 3])
+            for word in title_words:
+                if len(word) > 3 and add(word):
+                    return keywords
         
         # Add brand if available
         if retail_product.brand:
-            keywords.append(retail_product.brand)
-            keywords.append(f"{retail_product.brand} {title_words[-1]}")
+            if add(retail_product.brand) or add(f"{retail_product.brand} {title_words[-1]}"):
+                return keywords
         
         # Add category if available
         if retail_product.category:
-            keywords.append(retail_product.category)
-            keywords.append(f"{retail_product.category} {title_words[-1]}")
+            if add(retail_product.category) or add(f"{retail_product.category} {title_words[-1]}"):
+                return keywords
         
         # Get category-specific keywords
         category = retail_product.category or "Generic"
@@ -536,19 +706,21 @@ class ListingContentGenerator:
         
         category_keywords = self.keywords_by_category[category]
         
-        # Add category keywords combined with product
+        # Add category keywords combined with product; slots count every
+        # candidate, duplicates included
         for keyword in category_keywords:
-            if len(keywords) < 20:  # Amazon allows up to 250 bytes of keywords
-                keywords.append(f"{keyword} {title_words[-1]}")
+            if candidates < 20:  # Amazon allows up to 250 bytes of keywords
+                if add(f"{keyword} {title_words[-1]}"):
+                    return keywords
         
         # Add remaining category keywords if needed
-        remaining_slots = 20 - len(keywords)
+        remaining_slots = 20 - candidates
         if remaining_slots > 0:
-            keywords.extend(category_keywords[:remaining_slots])
+            for keyword in category_keywords[:remaining_slots]:
+                if add(keyword):
+                    return keywords
         
-        # Remove duplicates and limit to 20 keywords
-        unique_keywords = list(dict.fromkeys(keywords))
-        return unique_keywords[:20]
+        return keywords
     
     def _generate_pricing_suggestions(self, retail_product: RetailProduct, 
                                      amazon_product: Optional[AmazonProduct] = None) -> Dict[str, float]:
@@ -590,6 +762,47 @@ class ListingContentGenerator:
             "max_price": max_price
         }
     
+    def generate_pricing_batch(self, products: Sequence[Tuple[RetailProduct, Optional[AmazonProduct]]]
+                               ) -> List[Dict[str, float]]:
+        """
+        Generate pricing suggestions for many products at once
+        
+        Same rules as _generate_pricing_suggestions, with the price arithmetic
+        done on arrays. Rounding stays per value so results match exactly.
+        
+        Args:
+            products: Pairs of retail product and existing Amazon product (or None)
+            
+        Returns:
+            List of pricing dictionaries, in the order of products
+        """
+        if not products:
+            return []
+        
+        count = len(products)
+        retail_prices = np.fromiter((retail.price for retail, _ in products), dtype=np.float64, count=count)
+        # Products without Amazon pricing are NaN and priced on the retail price alone
+        amazon_prices = np.fromiter(
+            ((amazon.price if amazon and amazon.price else np.nan) for _, amazon in products),
+            dtype=np.float64, count=count
+        )
+        has_amazon = ~np.isnan(amazon_prices)
+        
+        suggested = np.where(has_amazon, np.fmax(retail_prices * 1.4, amazon_prices * 0.95), retail_prices * 1.5)
+        minimum = np.where(has_amazon, np.fmax(retail_prices * 1.2, amazon_prices * 0.85), retail_prices * 1.3)
+        maximum = np.where(has_amazon, np.fmax(retail_prices * 1.8, amazon_prices * 1.1), retail_prices * 2.0)
+        
+        # Round prices to .99 for psychological pricing
+        return [
+            {
+                "suggested_price": round(suggested_price - 0.01, 2),
+                "min_price": round(min_price - 0.01, 2),
+                "max_price": round(max_price - 0.01, 2)
+            }
+            for suggested_price, min_price, max_price
+            in zip(suggested.tolist(), minimum.tolist(), maximum.tolist())
+        ]
+    
     def save_listing(self, listing: Dict[str, Any], product_id: str, output_dir: str = None) -> str:
         """
         Save generated listing to file
@@ -614,8 +827,7 @@ class ListingContentGenerator:
         filepath = os.path.join(output_dir, filename)
         
         # Save listing to file
-        with open(filepath, 'w') as f:
-            json.dump(listing, f, indent=2)
+        Path(filepath).write_bytes(orjson.dumps(listing, option=orjson.OPT_INDENT_2))
         
         return filepath
     
@@ -642,75 +854,24 @@ class ListingContentGenerator:
         filename = f"preview_{product_id}_{timestamp}.html"
         filepath = os.path.join(output_dir, filename)
         
-        # Generate HTML content
-        html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Amazon Listing Preview - {listing['title']}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; color: #333; }}
-        .container {{ max-width: 1000px; margin: 0 auto; }}
-        .header {{ background-color: #232f3e; color: white; padding: 10px 20px; }}
-        .title {{ font-size: 24px; margin-bottom: 20px; }}
-        .price {{ font-size: 28px; color: #B12704; margin-bottom: 20px; }}
-        .bullets {{ margin-bottom: 20px; }}
-        .bullets h3 {{ font-size: 18px; margin-bottom: 10px; }}
-        .bullets ul {{ margin-left: 20px; }}
-        .bullets li {{ margin-bottom: 8px; }}
-        .description {{ margin-bottom: 20px; }}
-        .description h3 {{ font-size: 18px; margin-bottom: 10px; }}
-        .keywords {{ margin-bottom: 20px; background-color: #f8f8f8; padding: 15px; border-radius: 5px; }}
-        .keywords h3 {{ font-size: 18px; margin-bottom: 10px; }}
-        .keywords .tag {{ display: inline-block; background-color: #e7e7e7; padding: 5px 10px; margin: 5px; border-radius: 3px; }}
-        .footer {{ margin-top: 30px; text-align: center; color: #666; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Amazon Listing Preview</h1>
-        </div>
-        
-        <div class="title">
-            <h2>{listing['title']}</h2>
-        </div>
-        
-        <div class="price">
-            <span>${listing['pricing']['suggested_price']}</span>
-            <span style="font-size: 14px; color: #555;"> (Min: ${listing['pricing']['min_price']} - Max: ${listing['pricing']['max_price']})</span>
-        </div>
-        
-        <div class="bullets">
-            <h3>Key Features:</h3>
-            <ul>
-                {''.join([f'<li>{bullet}</li>' for bullet in listing['bullet_points']])}
-            </ul>
-        </div>
-        
-        <div class="description">
-            <h3>Product Description:</h3>
-            <div>{listing['description']}</div>
-        </div>
-        
-        <div class="keywords">
-            <h3>Search Keywords:</h3>
-            <div>
-                {''.join([f'<span class="tag">{keyword}</span>' for keyword in listing['keywords']])}
-            </div>
-        </div>
-        
-        <div class="footer">
-            <p>Generated by Amazon Smart Agent on {listing['generated_at']}</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        
-        # Save HTML to file
+        # Stream the rendered page to the file instead of building it as one string
         with open(filepath, 'w') as f:
-            f.write(html_content)
+            _preview_template().stream(listing=listing).dump(f)
         
         return filepath
+
+
+@lru_cache(maxsize=8)
+def get_default_generator(openai_api_key: Optional[str] = None,
+                          cache_path: Optional[str] = None) -> ListingContentGenerator:
+    """
+    Get a process-wide listing generator, created on first use
+    
+    Args:
+        openai_api_key: OpenAI API key (default: from environment)
+        cache_path: Optional SQLite file used to persist AI responses
+        
+    Returns:
+        Shared generator for these arguments
+    """
+    return ListingContentGenerator(openai_api_key=openai_api_key, cache_path=cache_path)
@@ -8,6 +8,9 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import math
+from functools import lru_cache
+from types import MappingProxyType
+import numpy as np
 
 from src.retail_scanners import RetailProduct
 from src.amazon import AmazonProduct
@@ -15,6 +18,43 @@ from src.profit_calculator import ArbitrageOpportunity, ProfitCalculator
 
 logger = logging.getLogger(__name__)
 
+# Simplified approximation of ranked products per category, keyed by
+# lowercased category name so lookups only lowercase the query
+_CATEGORY_THRESHOLDS = MappingProxyType({
+    "books": 2000000,
+    "electronics": 500000,
+    "toys": 400000,
+    "video games": 150000,
+    "kitchen": 600000,
+    "home & garden": 800000,
+    "beauty": 300000,
+    "clothing": 1000000,
+    "sports & outdoors": 400000,
+    "office products": 300000
+})
+
+# Threshold for unknown categories
+_DEFAULT_CATEGORY_THRESHOLD = 500000
+
+
+@lru_cache(maxsize=1024)
+def _category_threshold(category: str) -> int:
+    """
+    Get the approximate number of ranked products in a category
+    
+    Amazon reports a small set of category names, so the substring search
+    runs once per name and later lookups are a cache hit.
+    """
+    # Get threshold for this category or use default
+    category = category.lower()
+    for cat_key, threshold in _CATEGORY_THRESHOLDS.items():
+        if cat_key in category:
+            return threshold
+    
+    # Use default threshold
+    return _DEFAULT_CATEGORY_THRESHOLD
+
+
 class ProductFilter:
     """Filter for arbitrage opportunities based on various criteria"""
     
@@ -61,30 +101,14 @@ class ProductFilter:
         """
         logger.info(f"Filtering opportunities by BSR percentile: {self.max_bsr_percentile}%")
         
-        filtered_opps = []
+        if not opportunities:
+            return []
         
-        for opp in opportunities:
-            # Skip if no sales rank
-            if opp.amazon_product.sales_rank is None:
-                continue
-                
-            # Get category
-            category = opp.amazon_product.category
-            if not category:
-                continue
-                
-            # Get percentile for this sales rank and category
-            percentile = self._get_sales_rank_percentile(
-                opp.amazon_product.sales_rank, 
-                category, 
-                category_percentiles
-            )
-            
-            # Keep if percentile is below threshold (lower is better)
-            if percentile <= self.max_bsr_percentile:
-                filtered_opps.append(opp)
+        # Products without a sales rank or category get NaN and never pass
+        percentiles = self._get_sales_rank_percentiles(opportunities, category_percentiles)
+        keep = percentiles <= self.max_bsr_percentile
         
-        return filtered_opps
+        return [opp for opp, kept in zip(opportunities, keep.tolist()) if kept]
     
     def filter_by_profit(self, opportunities: List[ArbitrageOpportunity]) -> List[ArbitrageOpportunity]:
         """Filter opportunities by minimum profit amount"""
@@ -92,123 +116,174 @@ class ProductFilter:
         return [opp for opp in opportunities if opp.profit >= self.min_profit]
     
     def apply_all_filters(self, opportunities: List[ArbitrageOpportunity], 
-                         category_percentiles: Optional[Dict[str, Dict[int, float]]] = None) -> List[ArbitrageOpportunity]:
+                         category_percentiles: Optional[Dict[str, Dict[int, float]]] = None,
+                         min_roi: Optional[float] = None, max_reviews: Optional[int] = None) -> List[ArbitrageOpportunity]:
         """
         Apply all filters to opportunities
         
+        Equivalent to chaining the individual filters, but evaluates them as
+        boolean masks over arrays of the opportunity fields.
+        
         Args:
             opportunities: List of arbitrage opportunities
             category_percentiles: Dictionary mapping categories to dictionaries of sales rank to percentile
+            min_roi: Minimum ROI percentage, overriding the filter's own
+            max_reviews: Maximum number of reviews, overriding the filter's own
             
         Returns:
             Filtered list of opportunities
         """
-        logger.info(f"Applying all filters to {len(opportunities)} opportunities")
+        if min_roi is None:
+            min_roi = self.min_roi
+        if max_reviews is None:
+            max_reviews = self.max_reviews
+        
+        count = len(opportunities)
+        logger.info("Applying all filters to %d opportunities", count)
+        if count == 0:
+            return []
+        
+        arrays = self._to_arrays(opportunities)
+        roi = arrays['roi']
+        profit = arrays['profit']
+        reviews = arrays['reviews']
         
         # Filter by ROI
-        filtered_opps = self.filter_by_roi(opportunities)
-        logger.info(f"After ROI filter: {len(filtered_opps)} opportunities")
+        mask = roi >= min_roi
+        logger.info("After ROI filter: %d opportunities", np.count_nonzero(mask))
         
         # Filter by profit
-        filtered_opps = self.filter_by_profit(filtered_opps)
-        logger.info(f"After profit filter: {len(filtered_opps)} opportunities")
+        mask &= profit >= self.min_profit
+        logger.info("After profit filter: %d opportunities", np.count_nonzero(mask))
         
-        # Filter by reviews
-        filtered_opps = self.filter_by_reviews(filtered_opps)
-        logger.info(f"After reviews filter: {len(filtered_opps)} opportunities")
+        # Filter by reviews (unknown review counts pass)
+        mask &= reviews <= max_reviews
+        logger.info("After reviews filter: %d opportunities", np.count_nonzero(mask))
         
-        # Filter by sales rank if category percentiles provided
+        # Filter by sales rank if category percentiles provided, looking up
+        # percentiles only for the rows the cheaper filters kept; products
+        # without a sales rank or category get NaN and never pass
         if category_percentiles:
-            filtered_opps = self.filter_by_sales_rank(filtered_opps, category_percentiles)
-            logger.info(f"After sales rank filter: {len(filtered_opps)} opportunities")
+            alive = np.flatnonzero(mask)
+            percentiles = self._get_sales_rank_percentiles([opportunities[i] for i in alive], category_percentiles)
+            mask[alive] = percentiles <= self.max_bsr_percentile
+            logger.info("After sales rank filter: %d opportunities", np.count_nonzero(mask))
         
-        # Sort by ROI (highest first)
-        filtered_opps.sort(key=lambda x: x.roi, reverse=True)
+        # Sort by ROI (highest first), keeping the input order for ties
+        indices = np.flatnonzero(mask)
+        indices = indices[np.argsort(-roi[indices], kind='stable')]
         
-        return filtered_opps
+        return [opportunities[i] for i in indices]
     
-    def _get_sales_rank_percentile(self, sales_rank: int, category: str, 
-                                  category_percentiles: Dict[str, Dict[int, float]]) -> float:
+    @staticmethod
+    def _to_arrays(opportunities: List[ArbitrageOpportunity]) -> Dict[str, np.ndarray]:
         """
-        Get percentile for a sales rank in a category
+        Gather the fields the filters need into arrays, in a single pass
         
         Args:
-            sales_rank: Sales rank
-            category: Product category
-            category_percentiles: Dictionary mapping categories to dictionaries of sales rank to percentile
+            opportunities: List of arbitrage opportunities
             
         Returns:
-            Percentile (0-100, lower is better)
+            Dictionary of 'profit', 'roi' and 'reviews' arrays aligned with the
+            opportunities; unknown review counts are -1
         """
-        # If category not in percentiles, use approximation
-        if category not in category_percentiles:
-            return self._approximate_percentile(sales_rank, category)
+        fields = np.array([
+            (opp.profit, opp.roi,
+             -1 if opp.amazon_product.review_count is None else opp.amazon_product.review_count)
+            for opp in opportunities
+        ], dtype=np.float64).reshape(len(opportunities), 3)
         
-        # Get percentiles for this category
-        percentiles = category_percentiles[category]
+        profit, roi, reviews = fields.T
+        return {'profit': profit, 'roi': roi, 'reviews': reviews.astype(np.int64)}
+    
+    def _get_sales_rank_percentiles(self, opportunities: List[ArbitrageOpportunity],
+                                    category_percentiles: Dict[str, Dict[int, float]]) -> np.ndarray:
+        """
+        Get sales rank percentiles for many opportunities at once
         
-        # If exact sales rank exists, return its percentile
-        if sales_rank in percentiles:
-            return percentiles[sales_rank]
+        Args:
+            opportunities: List of arbitrage opportunities
+            category_percentiles: Dictionary mapping categories to dictionaries of sales rank to percentile
+            
+        Returns:
+            Array of percentiles aligned with the opportunities, NaN where unknown
+        """
+        percentiles = np.full(len(opportunities), np.nan)
         
-        # Otherwise, find closest sales ranks and interpolate
-        ranks = sorted(percentiles.keys())
+        # Group by category so each percentile table is prepared once
+        by_category: Dict[str, List[int]] = {}
+        for i, opp in enumerate(opportunities):
+            if opp.amazon_product.sales_rank is not None and opp.amazon_product.category:
+                by_category.setdefault(opp.amazon_product.category, []).append(i)
         
-        # If sales rank is lower than lowest rank, return lowest percentile
-        if sales_rank < ranks[0]:
-            return percentiles[ranks[0]]
+        for category, indices in by_category.items():
+            ranks = np.array([opportunities[i].amazon_product.sales_rank for i in indices], dtype=np.float64)
+            percentiles[indices] = self._get_category_rank_percentiles(ranks, category, category_percentiles)
         
-        # If sales rank is higher than highest rank, return highest percentile
-        if sales_rank > ranks[-1]:
-            return percentiles[ranks[-1]]
+        return percentiles
+    
+    def _get_category_rank_percentiles(self, ranks: np.ndarray, category: str,
+                                       category_percentiles: Dict[str, Dict[int, float]]) -> np.ndarray:
+        """
+        Get percentiles for many sales ranks in one category
         
-        # Find ranks that sales_rank falls between
-        for i in range(len(ranks) - 1):
-            if ranks[i] <= sales_rank <= ranks[i + 1]:
-                # Interpolate percentile
-                rank1, rank2 = ranks[i], ranks[i + 1]
-                perc1, perc2 = percentiles[rank1], percentiles[rank2]
-                
-                # Linear interpolation
-                return perc1 + (perc2 - perc1) * (sales_rank - rank1) / (rank2 - rank1)
+        Args:
+            ranks: Array of sales ranks
+            category: Product category
+            category_percentiles: Dictionary mapping categories to dictionaries of sales rank to percentile
+            
+        Returns:
+            Array of percentiles (0-100, lower is better) aligned with the ranks
+        """
+        # If category not in percentiles, use approximation
+        if category not in category_percentiles:
+            return self._approximate_percentile(ranks, category)
         
-        # Fallback to approximation
-        return self._approximate_percentile(sales_rank, category)
+        # Linear interpolation, clamped to the table's end points
+        table = category_percentiles[category]
+        table_ranks = sorted(table)
+        return np.interp(ranks, table_ranks, [table[rank] for rank in table_ranks])
     
-    def _approximate_percentile(self, sales_rank: int, category: str) -> float:
+    def _get_sales_rank_percentile(self, sales_rank: int, category: str, 
+                                  category_percentiles: Dict[str, Dict[int, float]]) -> float:
         """
-        Approximate percentile for a sales rank in a category
+        Get percentile for a sales rank in a category
         
         Args:
             sales_rank: Sales rank
             category: Product category
+            category_percentiles: Dictionary mapping categories to dictionaries of sales rank to percentile
             
         Returns:
-            Approximate percentile (0-100, lower is better)
+            Percentile (0-100, lower is better)
         """
-        # Simplified approximation based on category
-        category_thresholds = {
-            "Books": 2000000,
-            "Electronics": 500000,
-            "Toys": 400000,
-            "Video Games": 150000,
-            "Kitchen": 600000,
-            "Home & Garden": 800000,
-            "Beauty": 300000,
-            "Clothing": 1000000,
-            "Sports & Outdoors": 400000,
-            "Office Products": 300000,
-            # Default for unknown categories
-            "default": 500000
-        }
+        ranks = np.array([sales_rank], dtype=np.float64)
+        return float(self._get_category_rank_percentiles(ranks, category, category_percentiles)[0])
+    
+    def _approximate_percentile(self, sales_rank, category: str):
+        """
+        Approximate percentile for a sales rank in a category
         
-        # Get threshold for this category or use default
-        for cat_key, threshold in category_thresholds.items():
-            if cat_key.lower() in category.lower():
-                return (sales_rank / threshold) * 100
+        Args:
+            sales_rank: Sales rank, or an array of sales ranks
+            category: Product category
+            
+        Returns:
+            Approximate percentile (0-100, lower is better), with the shape of sales_rank
+        """
+        return (sales_rank / self._get_category_threshold(category)) * 100
+    
+    def _get_category_threshold(self, category: str) -> int:
+        """
+        Get the approximate number of ranked products in a category
         
-        # Use default threshold
-        return (sales_rank / category_thresholds["default"]) * 100
+        Args:
+            category: Product category
+            
+        Returns:
+            Sales rank corresponding to the 100th percentile
+        """
+        return _category_threshold(category)
 
 
 class SalesRankAnalyzer:
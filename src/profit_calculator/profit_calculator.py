@@ -6,15 +6,73 @@ Calculates potential profit and ROI for arbitrage opportunities
 import os
 import logging
 from typing import Dict, Any, Optional, List, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 import math
+from operator import attrgetter
+import numpy as np
 
 from src.retail_scanners import RetailProduct
 from src.amazon import AmazonProduct
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Sort key for opportunities, a C-level attribute load
+_ROI_KEY = attrgetter('roi')
+
+
+# Catalogs repeat the same weights and dimensions (most products use the
+# defaults), so lookups are memoized on their exact inputs
+@lru_cache(maxsize=4096)
+def _fba_costs(weight_lb: float, length_in: float, width_in: float,
+               height_in: float) -> Tuple[float, float, float, float]:
+    """
+    Calculate FBA fees from weight and dimensions
+    
+    Returns:
+        Tuple of (weight handling, order handling, pick and pack, 30-day storage)
+    """
+    # Calculate dimensional weight
+    cubic_feet = (length_in * width_in * height_in) / 1728  # Convert cubic inches to cubic feet
+    longest = max(length_in, width_in, height_in)
+    shortest = min(length_in, width_in, height_in)
+    
+    # Determine size tier and calculate fees based on it
+    if longest <= 15 and shortest <= 0.75 and weight_lb <= 0.5:
+        # Small Standard
+        weight_handling = 2.16 if weight_lb <= 0.5 else 2.48
+        pick_pack = 0.99
+        thirty_day_storage = 0.75 * cubic_feet
+    elif longest <= 18 and shortest <= 8 and weight_lb <= 20:
+        # Large Standard
+        if weight_lb <= 1:
+            weight_handling = 2.73
+        elif weight_lb <= 2:
+            weight_handling = 3.47
+        else:
+            weight_handling = 4.21 + (weight_lb - 2) * 0.38
+        pick_pack = 1.20
+        thirty_day_storage = 0.75 * cubic_feet
+    elif longest <= 60 and shortest <= 30 and weight_lb <= 70:
+        # Small Oversize
+        weight_handling = 8.26 + (weight_lb - 20) * 0.38 if weight_lb > 20 else 8.26
+        pick_pack = 4.72
+        thirty_day_storage = 0.48 * cubic_feet
+    elif longest <= 108 and weight_lb <= 150:
+        # Medium Oversize (the Large Oversize tier has the same bounds, so it is never reached)
+        weight_handling = 11.37 + (weight_lb - 40) * 0.39 if weight_lb > 40 else 11.37
+        pick_pack = 5.42
+        thirty_day_storage = 0.48 * cubic_feet
+    else:
+        # Special Oversize
+        weight_handling = 137.32 + (weight_lb - 90) * 0.91 if weight_lb > 90 else 137.32
+        pick_pack = 13.34
+        thirty_day_storage = 0.48 * cubic_feet
+    
+    return weight_handling, 0.0, pick_pack, thirty_day_storage
+
+
+@dataclass(slots=True)
 class FulfillmentCost:
     """Data class to store fulfillment cost information"""
     weight_handling: float  # Weight handling fee
@@ -36,66 +94,7 @@ class FulfillmentCost:
         Returns:
             FulfillmentCost object with calculated costs
         """
-        # Calculate dimensional weight
-        cubic_feet = (length_in * width_in * height_in) / 1728  # Convert cubic inches to cubic feet
-        
-        # Determine size tier
-        if max(length_in, width_in, height_in) <= 15 and min(length_in, width_in, height_in) <= 0.75 and weight_lb <= 0.5:
-            size_tier = "Small Standard"
-        elif max(length_in, width_in, height_in) <= 18 and min(length_in, width_in, height_in) <= 8 and weight_lb <= 20:
-            size_tier = "Large Standard"
-        elif max(length_in, width_in, height_in) <= 60 and min(length_in, width_in, height_in) <= 30 and weight_lb <= 70:
-            size_tier = "Small Oversize"
-        elif max(length_in, width_in, height_in) <= 108 and weight_lb <= 150:
-            size_tier = "Medium Oversize"
-        elif max(length_in, width_in, height_in) <= 108 and weight_lb <= 150:
-            size_tier = "Large Oversize"
-        else:
-            size_tier = "Special Oversize"
-        
-        # Calculate fees based on size tier
-        if size_tier == "Small Standard":
-            weight_handling = 2.16 if weight_lb <= 0.5 else 2.48
-            order_handling = 0.0
-            pick_pack = 0.99
-            thirty_day_storage = 0.75 * cubic_feet
-        elif size_tier == "Large Standard":
-            if weight_lb <= 1:
-                weight_handling = 2.73
-            elif weight_lb <= 2:
-                weight_handling = 3.47
-            else:
-                weight_handling = 4.21 + (weight_lb - 2) * 0.38
-            order_handling = 0.0
-            pick_pack = 1.20
-            thirty_day_storage = 0.75 * cubic_feet
-        elif size_tier == "Small Oversize":
-            weight_handling = 8.26 + (weight_lb - 20) * 0.38 if weight_lb > 20 else 8.26
-            order_handling = 0.0
-            pick_pack = 4.72
-            thirty_day_storage = 0.48 * cubic_feet
-        elif size_tier == "Medium Oversize":
-            weight_handling = 11.37 + (weight_lb - 40) * 0.39 if weight_lb > 40 else 11.37
-            order_handling = 0.0
-            pick_pack = 5.42
-            thirty_day_storage = 0.48 * cubic_feet
-        elif size_tier == "Large Oversize":
-            weight_handling = 76.57 + (weight_lb - 90) * 0.79 if weight_lb > 90 else 76.57
-            order_handling = 0.0
-            pick_pack = 10.53
-            thirty_day_storage = 0.48 * cubic_feet
-        else:  # Special Oversize
-            weight_handling = 137.32 + (weight_lb - 90) * 0.91 if weight_lb > 90 else 137.32
-            order_handling = 0.0
-            pick_pack = 13.34
-            thirty_day_storage = 0.48 * cubic_feet
-        
-        return cls(
-            weight_handling=weight_handling,
-            order_handling=order_handling,
-            pick_pack=pick_pack,
-            thirty_day_storage=thirty_day_storage
-        )
+        return cls(*_fba_costs(weight_lb, length_in, width_in, height_in))
     
     @classmethod
     def get_fbm_costs(cls, weight_lb: float) -> 'FulfillmentCost':
@@ -129,7 +128,7 @@ class FulfillmentCost:
             thirty_day_storage=0.0
         )
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ArbitrageCosts:
     """Data class to store all costs associated with an arbitrage opportunity"""
     buy_price: float  # Purchase price from retail store
@@ -143,25 +142,29 @@ class ArbitrageCosts:
         """Calculate total cost"""
         return self.buy_price + self.amazon_fees + self.fulfillment_cost + self.shipping_to_amazon + self.other_costs
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ArbitrageOpportunity:
-    """Data class to store arbitrage opportunity information"""
+    """
+    Data class to store arbitrage opportunity information
+    
+    Profit and ROI are computed from the Amazon price and the costs when the
+    opportunity is created. The costs are frozen, but the products are not:
+    after changing a product's price, rebuild the opportunity, e.g. with
+    dataclasses.replace(opportunity), to recompute profit and ROI.
+    """
     retail_product: RetailProduct
     amazon_product: AmazonProduct
     costs: ArbitrageCosts
     fulfillment_method: str  # 'FBA' or 'FBM'
+    profit: float = field(init=False)  # Profit, computed from the prices and costs
+    roi: float = field(init=False)  # ROI as percentage, computed from the prices and costs
     
-    @property
-    def profit(self) -> float:
-        """Calculate profit"""
-        return self.amazon_product.price - self.costs.total_cost
-    
-    @property
-    def roi(self) -> float:
-        """Calculate ROI as percentage"""
-        if self.costs.total_cost == 0:
-            return 0.0
-        return (self.profit / self.costs.total_cost) * 100
+    def __post_init__(self):
+        """Calculate profit and ROI once; filters and sorts read them many times"""
+        total_cost = self.costs.total_cost
+        profit = self.amazon_product.price - total_cost
+        object.__setattr__(self, 'profit', profit)
+        object.__setattr__(self, 'roi', 0.0 if total_cost == 0 else (profit / total_cost) * 100)
     
     @property
     def is_profitable(self) -> bool:
@@ -220,14 +223,7 @@ class ProfitCalculator:
         amazon_fees = (amazon_product.price * self.amazon_fee_percentage) / 100
         
         # Calculate fulfillment costs
-        if fulfillment_method == 'FBA':
-            fulfillment = FulfillmentCost.get_fba_costs(weight, dims[0], dims[1], dims[2])
-            fulfillment_cost = fulfillment.weight_handling + fulfillment.order_handling + fulfillment.pick_pack
-            shipping_to_amazon = weight * self.shipping_to_amazon_per_lb
-        else:  # FBM
-            fulfillment = FulfillmentCost.get_fbm_costs(weight)
-            fulfillment_cost = fulfillment.weight_handling  # For FBM, this is the shipping cost
-            shipping_to_amazon = 0.0
+        fulfillment_cost, shipping_to_amazon = self._get_fulfillment_costs(weight, dims, fulfillment_method)
         
         # Calculate other costs
         other_costs = (retail_product.price * self.other_costs_percentage) / 100
@@ -251,6 +247,105 @@ class ProfitCalculator:
         
         return opportunity
     
+    def calculate_opportunities_bulk(self, pairs: List[Tuple[RetailProduct, AmazonProduct]],
+                                     fulfillment_method: str = 'FBA') -> List[ArbitrageOpportunity]:
+        """
+        Calculate arbitrage opportunities for already matched product pairs
+        
+        Uses the default weight and dimensions for every pair, so fulfillment
+        costs are computed once and the per-price fees are computed as arrays.
+        
+        Args:
+            pairs: List of (RetailProduct, AmazonProduct) tuples
+            fulfillment_method: Fulfillment method ('FBA' or 'FBM')
+            
+        Returns:
+            List of ArbitrageOpportunity objects, in the order of the pairs
+        """
+        if not pairs:
+            return []
+        
+        count = len(pairs)
+        buy_prices = np.fromiter((retail.price for retail, _ in pairs), dtype=np.float64, count=count)
+        sell_prices = np.fromiter((amazon.price for _, amazon in pairs), dtype=np.float64, count=count)
+        
+        # Calculate Amazon fees and other costs, in the same order of
+        # operations as calculate_opportunity so the results match exactly
+        amazon_fees = (sell_prices * self.amazon_fee_percentage) / 100
+        other_costs = (buy_prices * self.other_costs_percentage) / 100
+        
+        # Fulfillment costs only depend on the (default) weight and dimensions
+        fulfillment_cost, shipping_to_amazon = self._get_fulfillment_costs(
+            self.default_weight_lb, self.default_dimensions, fulfillment_method
+        )
+        
+        return [
+            ArbitrageOpportunity(
+                retail_product=retail_product,
+                amazon_product=amazon_product,
+                costs=ArbitrageCosts(
+                    buy_price=retail_product.price,
+                    amazon_fees=fees,
+                    fulfillment_cost=fulfillment_cost,
+                    shipping_to_amazon=shipping_to_amazon,
+                    other_costs=other
+                ),
+                fulfillment_method=fulfillment_method
+            )
+            for (retail_product, amazon_product), fees, other
+            in zip(pairs, amazon_fees.tolist(), other_costs.tolist())
+        ]
+    
+    def _get_fulfillment_costs(self, weight: float, dims: Tuple[float, float, float],
+                               fulfillment_method: str) -> Tuple[float, float]:
+        """Get (fulfillment cost, shipping to Amazon) for a product"""
+        if fulfillment_method == 'FBA':
+            fulfillment = FulfillmentCost.get_fba_costs(weight, dims[0], dims[1], dims[2])
+            fulfillment_cost = fulfillment.weight_handling + fulfillment.order_handling + fulfillment.pick_pack
+            shipping_to_amazon = weight * self.shipping_to_amazon_per_lb
+        else:  # FBM
+            fulfillment = FulfillmentCost.get_fbm_costs(weight)
+            fulfillment_cost = fulfillment.weight_handling  # For FBM, this is the shipping cost
+            shipping_to_amazon = 0.0
+        
+        return fulfillment_cost, shipping_to_amazon
+    
+    def min_retail_price_for_roi(self, min_roi: float, max_markup: float = 5.0,
+                                 fulfillment_method: str = 'FBA') -> float:
+        """
+        Calculate the lowest buy price that can still reach a minimum ROI
+        
+        Assumes the Amazon price is at most max_markup times the retail price
+        and the product has the default weight and dimensions. Below the
+        returned price the fixed fulfillment costs eat the margin, so such
+        products can be skipped before querying Amazon. A product selling at
+        more than max_markup times its retail price would be missed.
+        
+        Args:
+            min_roi: Minimum ROI percentage
+            max_markup: Highest plausible ratio of Amazon price to retail price
+            fulfillment_method: Fulfillment method ('FBA' or 'FBM')
+            
+        Returns:
+            Minimum retail price, or infinity if no price can reach the ROI
+        """
+        fulfillment_cost, shipping_to_amazon = self._get_fulfillment_costs(
+            self.default_weight_lb, self.default_dimensions, fulfillment_method
+        )
+        fixed_costs = fulfillment_cost + shipping_to_amazon
+        roi = min_roi / 100
+        fee_rate = self.amazon_fee_percentage / 100
+        other_rate = self.other_costs_percentage / 100
+        
+        # With sell = max_markup * buy, ROI >= roi requires
+        # buy * margin_per_dollar >= fixed_costs * (1 + roi)
+        margin_per_dollar = (max_markup * (1 - fee_rate) - (1 + roi) * (1 + other_rate)
+                             - roi * fee_rate * max_markup)
+        if margin_per_dollar <= 0:
+            return float('inf')
+        
+        return fixed_costs * (1 + roi) / margin_per_dollar
+    
     def calculate_bulk_opportunities(self, retail_products: List[RetailProduct], 
                                     amazon_products: Dict[str, AmazonProduct],
                                     fulfillment_method: str = 'FBA') -> List[ArbitrageOpportunity]:
@@ -265,28 +360,21 @@ class ProfitCalculator:
         Returns:
             List of ArbitrageOpportunity objects
         """
-        opportunities = []
+        # Match retail products to Amazon products in one pass, then cost all
+        # matched pairs together
+        pairs = []
+        lookup = amazon_products.get
         
         for retail_product in retail_products:
-            # Try to find matching Amazon product by UPC or SKU
-            amazon_product = None
-            
-            if retail_product.upc and retail_product.upc in amazon_products:
-                amazon_product = amazon_products[retail_product.upc]
-            elif retail_product.sku and retail_product.sku in amazon_products:
-                amazon_product = amazon_products[retail_product.sku]
+            # Try to find matching Amazon product by UPC or SKU, with one probe per identifier
+            amazon_product = lookup(retail_product.upc) if retail_product.upc else None
+            if amazon_product is None and retail_product.sku:
+                amazon_product = lookup(retail_product.sku)
             
             if amazon_product:
-                # Calculate opportunity
-                opportunity = self.calculate_opportunity(
-                    retail_product=retail_product,
-                    amazon_product=amazon_product,
-                    fulfillment_method=fulfillment_method
-                )
-                
-                opportunities.append(opportunity)
+                pairs.append((retail_product, amazon_product))
         
-        return opportunities
+        return self.calculate_opportunities_bulk(pairs, fulfillment_method=fulfillment_method)
     
     def find_best_opportunities(self, opportunities: List[ArbitrageOpportunity], 
                                min_roi: float = 40.0, 
@@ -325,6 +413,6 @@ class ProfitCalculator:
             filtered_opportunities.append(opportunity)
         
         # Sort by ROI (highest first)
-        filtered_opportunities.sort(key=lambda x: x.roi, reverse=True)
+        filtered_opportunities.sort(key=_ROI_KEY, reverse=True)
         
         return filtered_opportunities
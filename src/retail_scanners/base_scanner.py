@@ -3,15 +3,17 @@ Base scanner module for retail websites
 Provides common functionality for all retail scanners
 """
 
+import asyncio
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class RetailProduct:
     """Data class to store retail product information"""
     product_id: str
@@ -37,9 +39,13 @@ class RetailProduct:
 class RetailScanner(ABC):
     """Base class for retail website scanners"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_adapter: Optional[HTTPAdapter] = None):
         self.api_key = api_key
         self.session = requests.Session()
+        if http_adapter is not None:
+            # Share a keep-alive connection pool with other scanners
+            self.session.mount('https://', http_adapter)
+            self.session.mount('http://', http_adapter)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -62,6 +68,16 @@ class RetailScanner(ABC):
         """Get detailed information for a specific product"""
         pass
     
+    async def search_clearance_async(self, category: Optional[str] = None, limit: int = 50) -> List[RetailProduct]:
+        """Search for clearance products without blocking the event loop"""
+        # Scanners page through results with polite delays, so the search runs on a worker thread
+        return await asyncio.to_thread(self.search_clearance, category, limit)
+    
+    async def search_discounted_async(self, min_discount: float = 40.0, category: Optional[str] = None,
+                                      limit: int = 50) -> List[RetailProduct]:
+        """Search for discounted products without blocking the event loop"""
+        return await asyncio.to_thread(self.search_discounted, min_discount, category, limit)
+    
     def _handle_request_error(self, response: requests.Response, context: str):
         """Handle request errors with proper logging"""
         try:
@@ -7,6 +7,7 @@ import logging
 import json
 from typing import List, Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import time
 import random
@@ -21,8 +22,8 @@ class DollarTreeScanner(RetailScanner):
     BASE_URL = "https://www.dollartree.com"
     SEARCH_URL = f"{BASE_URL}/on-sale"
     
-    def __init__(self, api_key: Optional[str] = None):
-        super().__init__(api_key)
+    def __init__(self, api_key: Optional[str] = None, http_adapter: Optional[HTTPAdapter] = None):
+        super().__init__(api_key, http_adapter)
         self.store = "Dollar Tree"
         
         # Additional headers for Dollar Tree
@@ -7,6 +7,7 @@ import logging
 import json
 from typing import List, Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import time
 import random
@@ -22,8 +23,8 @@ class TargetScanner(RetailScanner):
     SEARCH_URL = f"{BASE_URL}/c/clearance/-/N-5q0ga"
     API_URL = "https://redsky.target.com/redsky_aggregations/v1/web/plp_search_v1"
     
-    def __init__(self, api_key: Optional[str] = None):
-        super().__init__(api_key)
+    def __init__(self, api_key: Optional[str] = None, http_adapter: Optional[HTTPAdapter] = None):
+        super().__init__(api_key, http_adapter)
         self.store = "Target"
         
         # Additional headers for Target
@@ -7,6 +7,7 @@ import logging
 import json
 from typing import List, Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import time
 import random
@@ -22,8 +23,8 @@ class WalmartScanner(RetailScanner):
     SEARCH_URL = f"{BASE_URL}/browse/deals/clearance"
     API_URL = "https://www.walmart.com/orchestra/home/graphql"
     
-    def __init__(self, api_key: Optional[str] = None):
-        super().__init__(api_key)
+    def __init__(self, api_key: Optional[str] = None, http_adapter: Optional[HTTPAdapter] = None):
+        super().__init__(api_key, http_adapter)
         self.store = "Walmart"
         
         # Additional headers for Walmart
@@ -414,36 +414,37 @@ class TelegramBot:
         
         # Get products from selected store(s)
         if store == "all":
-            # Scan all stores
-            for scanner_name, scanner in self.scanners.items():
-                try:
-                    if discount > 0:
-                        store_products = scanner.search_discounted(
-                            min_discount=float(discount),
-                            category=category_param,
-                            limit=25  # Limit per store
-                        )
-                    else:
-                        store_products = scanner.search_clearance(
-                            category=category_param,
-                            limit=25  # Limit per store
-                        )
-                    
+            # Scan all stores at once, each on its own worker thread
+            scans = [
+                scanner.search_discounted_async(
+                    min_discount=float(discount),
+                    category=category_param,
+                    limit=25  # Limit per store
+                ) if discount > 0 else scanner.search_clearance_async(
+                    category=category_param,
+                    limit=25  # Limit per store
+                )
+                for scanner in self.scanners.values()
+            ]
+            results = await asyncio.gather(*scans, return_exceptions=True)
+            
+            for scanner_name, store_products in zip(self.scanners, results):
+                if isinstance(store_products, Exception):
+                    logger.error(f"Error scanning {scanner_name}: {store_products}")
+                else:
                     products.extend(store_products)
-                except Exception as e:
-                    logger.error(f"Error scanning {scanner_name}: {e}")
         else:
             # Scan selected store
             scanner = self.scanners.get(store)
             if scanner:
                 if discount > 0:
-                    products = scanner.search_discounted(
+                    products = await scanner.search_discounted_async(
                         min_discount=float(discount),
                         category=category_param,
                         limit=100
                     )
                 else:
-                    products = scanner.search_clearance(
+                    products = await scanner.search_clearance_async(
                         category=category_param,
                         limit=100
                     )
@@ -9,10 +9,12 @@ from .error_handling import (
     retry, 
     initialize_error_handling
 )
+from .http import create_http_adapter
 
 __all__ = [
     'LoggingManager',
     'ErrorHandler',
     'retry',
-    'initialize_error_handling'
+    'initialize_error_handling',
+    'create_http_adapter'
 ]
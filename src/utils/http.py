@@ -0,0 +1,30 @@
+"""
+HTTP utilities module
+Provides a pooled, retrying transport that can be shared between HTTP sessions
+"""
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_http_adapter(pool_size: int = 32, retries: int = 2, backoff_factor: float = 0.3) -> HTTPAdapter:
+    """
+    Create an HTTP adapter with a keep-alive connection pool and retries
+    
+    The connection pool lives in the adapter, so mounting one adapter on
+    several sessions shares their connections while each session keeps
+    its own headers.
+    
+    Args:
+        pool_size: Number of hosts to pool and connections kept per host
+        retries: Number of retries on connection errors
+        backoff_factor: Backoff factor between retries in seconds
+        
+    Returns:
+        HTTPAdapter to mount on requests sessions
+    """
+    return HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, backoff_factor=backoff_factor)
+    )
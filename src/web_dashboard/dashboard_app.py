@@ -4,7 +4,9 @@ Provides a Flask-based web interface for viewing and managing arbitrage opportun
 """
 
 import os
+import heapq
 import logging
+from operator import itemgetter
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
@@ -254,7 +256,7 @@ def api_opportunities():
     if store:
         opps = db.get_opportunities_by_store(store, limit=limit)
     else:
-        opps = db.get_opportunities(min_roi=min_roi, min_profit=min_profit, limit=limit)
+        opps = db.iter_opportunities(min_roi=min_roi, min_profit=min_profit, limit=limit)
     
     # Convert to JSON-serializable format
     result = []
@@ -360,7 +362,7 @@ def api_stats():
             store_counts[store] = store_counts.get(store, 0) + 1
         
         # Get top opportunities
-        top_opps = sorted(today_opps, key=lambda x: x['roi'], reverse=True)[:5]
+        top_opps = heapq.nlargest(5, today_opps, key=itemgetter('roi'))
         top_opps_data = []
         
         for opp in top_opps:
@@ -8,19 +8,24 @@ import os
 import sys
 import logging
 import unittest
+import unittest.mock
 import json
+import tempfile
+import dataclasses
 from datetime import datetime
 import time
+import asyncio
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.retail_scanners import RetailProduct, WalmartScanner, TargetScanner, DollarTreeScanner, EbayScanner
-from src.amazon import AmazonProduct, AmazonProductAPI, AmazonScraper
-from src.profit_calculator import ArbitrageOpportunity, ProfitCalculator
+from src.amazon import AmazonProduct, AmazonProductAPI, AmazonScraper, TTLCache, normalize_query
+from src.amazon.amazon_api import httpx
+from src.profit_calculator import ArbitrageCosts, ArbitrageOpportunity, ProfitCalculator
 from src.product_filter import ProductFilter, SalesRankAnalyzer
-from src.database import ProductDatabase
-from src.listing_generator import ListingContentGenerator
+from src.database import AmazonProductModel, ProductDatabase, RetailProductModel
+from src.listing_generator import ListingContentGenerator, get_default_generator
 from src.utils import LoggingManager, ErrorHandler
 
 # Configure logging
@@ -65,6 +70,17 @@ class TestRetailScanners(unittest.TestCase):
         # Restore original method
         self.walmart_scanner.search_clearance = original_method
     
+    def test_scanner_async_search(self):
+        """Test async searches run the scanner's synchronous search"""
+        product = RetailProduct(product_id="123", title="Test Product", price=10.99, original_price=19.99,
+                                url="https://www.walmart.com/ip/123", image_url="", store="Walmart")
+        self.walmart_scanner.search_clearance = unittest.mock.Mock(return_value=[product])
+        
+        results = asyncio.run(self.walmart_scanner.search_clearance_async(category="Electronics", limit=10))
+        
+        self.assertEqual(results, [product])
+        self.walmart_scanner.search_clearance.assert_called_once_with("Electronics", 10)
+    
     def test_target_scanner_mock(self):
         """Test Target scanner with mock data"""
         # Create mock product
@@ -156,6 +172,11 @@ class TestAmazonAPI(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
         self.amazon_scraper = AmazonScraper()
+        
+        # Don't wait out request pacing in tests
+        sleep_patcher = unittest.mock.patch('time.sleep')
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
     
     def test_amazon_scraper_mock(self):
         """Test Amazon scraper with mock data"""
@@ -185,6 +206,331 @@ class TestAmazonAPI(unittest.TestCase):
         
         # Restore original method
         self.amazon_scraper.search_products = original_method
+    
+    def test_amazon_api_batch_lookup_mock(self):
+        """Test batched Amazon API lookups with mock data"""
+        amazon_api = AmazonProductAPI("access", "secret", "tag")
+        
+        # Mock ItemLookup to answer both UPCs in one response
+        calls = []
+        
+        def item_lookup(**kwargs):
+            calls.append(kwargs)
+            return (
+                "<ItemLookupResponse><Items>"
+                "<Item><ASIN>B01AAAAAAA</ASIN><ItemAttributes><Title>First</Title><UPC>111</UPC>"
+                "<ListPrice><Amount>1999</Amount></ListPrice></ItemAttributes></Item>"
+                "<Item><ASIN>B01BBBBBBB</ASIN><ItemAttributes><Title>Second</Title><UPC>222</UPC>"
+                "<ListPrice><Amount>2999</Amount></ListPrice></ItemAttributes></Item>"
+                "</Items></ItemLookupResponse>"
+            )
+        
+        amazon_api.amazon.ItemLookup = item_lookup
+        
+        # Test search_products_batch
+        results = amazon_api.search_products_batch(["upc:222", "upc:111"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0]['IdType'], "UPC")
+        self.assertEqual(results["upc:111"].asin, "B01AAAAAAA")
+        self.assertEqual(results["upc:222"].price, 29.99)
+    
+    def test_amazon_api_response_cache(self):
+        """Test repeated Amazon API lookups are served from the cache"""
+        amazon_api = AmazonProductAPI("access", "secret", "tag")
+        calls = []
+        
+        def item_lookup(**kwargs):
+            calls.append(kwargs)
+            items = "".join(
+                f"<Item><ASIN>{asin}</ASIN><ItemAttributes><Title>Product {asin}</Title>"
+                f"<ListPrice><Amount>1999</Amount></ListPrice></ItemAttributes></Item>"
+                for asin in kwargs['ItemId'].split(',')
+            )
+            return f"<ItemLookupResponse><Items>{items}</Items></ItemLookupResponse>"
+        
+        amazon_api.amazon.ItemLookup = item_lookup
+        
+        self.assertEqual(amazon_api.get_product_by_asin("B01").asin, "B01")
+        self.assertEqual(amazon_api.get_product_by_asin("B01").asin, "B01")
+        self.assertEqual(len(calls), 1)
+        
+        # Only uncached ASINs are requested, and the requested order is kept
+        products = amazon_api.get_products_by_asins(["B02", "B01"])
+        self.assertEqual([product.asin for product in products], ["B02", "B01"])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[1]['ItemId'], "B02")
+        
+        # Duplicate ASINs are requested once but returned for each occurrence
+        products = amazon_api.get_products_by_asins(["B03", "B01", "B03"])
+        self.assertEqual([product.asin for product in products], ["B03", "B01", "B03"])
+        self.assertEqual(calls[2]['ItemId'], "B03")
+    
+    def test_amazon_api_description_response_group(self):
+        """Test EditorialReview is only requested when the description is wanted"""
+        amazon_api = AmazonProductAPI("access", "secret", "tag")
+        calls = []
+        
+        def item_lookup(**kwargs):
+            calls.append(kwargs)
+            return (
+                "<ItemLookupResponse><Items><Item><ASIN>B01</ASIN><ItemAttributes><Title>First</Title>"
+                "<ListPrice><Amount>1999</Amount></ListPrice></ItemAttributes><EditorialReviews><EditorialReview><Source>Product Description</Source>"
+                "<Content>A fine product</Content></EditorialReview></EditorialReviews></Item></Items>"
+                "</ItemLookupResponse>"
+            )
+        
+        amazon_api.amazon.ItemLookup = item_lookup
+        
+        amazon_api.get_product_by_asin("B01")
+        self.assertNotIn("Reviews", calls[0]['ResponseGroup'])
+        
+        product = amazon_api.get_product_by_asin("B01", include_description=True)
+        self.assertIn("EditorialReview", calls[1]['ResponseGroup'])
+        self.assertEqual(product.description, "A fine product")
+    
+    def test_amazon_api_retry_throttled(self):
+        """Test throttled requests are retried and other errors are not"""
+        amazon_api = AmazonProductAPI("access", "secret", "tag")
+        calls = []
+        
+        def item_lookup(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise Exception("AWS.ECommerceService.RequestThrottled")
+            if len(calls) == 2:
+                return (
+                    "<ItemLookupResponse><Items><Request><Errors><Error>"
+                    "<Code>AWS.ECommerceService.RequestThrottled</Code><Message>Slow down</Message>"
+                    "</Error></Errors></Request></Items></ItemLookupResponse>"
+                )
+            return (
+                "<ItemLookupResponse><Items><Item><ASIN>B01</ASIN><ItemAttributes><Title>First</Title>"
+                "<ListPrice><Amount>1999</Amount></ListPrice></ItemAttributes></Item></Items></ItemLookupResponse>"
+            )
+        
+        amazon_api.amazon.ItemLookup = item_lookup
+        
+        with unittest.mock.patch('time.sleep') as sleep:
+            self.assertEqual(amazon_api.get_product_by_asin("B01").asin, "B01")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+        
+        # Throttling halved the request rate; the success only added to it
+        self.assertEqual(amazon_api._rate, 0.5)
+        
+        def invalid_lookup(**kwargs):
+            calls.append(kwargs)
+            raise Exception("AWS.InvalidParameterValue")
+        
+        amazon_api.amazon.ItemLookup = invalid_lookup
+        self.assertEqual(amazon_api.get_competitive_pricing("B02"), {})
+        self.assertEqual(len(calls), 4)
+        
+        def invalid_response(**kwargs):
+            calls.append(kwargs)
+            return (
+                "<ItemLookupResponse><Items><Request><Errors><Error>"
+                "<Code>AWS.InvalidParameterValue</Code><Message>Bad ASIN</Message>"
+                "</Error></Errors></Request></Items></ItemLookupResponse>"
+            )
+        
+        amazon_api.amazon.ItemLookup = invalid_response
+        self.assertIsNone(amazon_api.get_product_by_asin("B03"))
+        self.assertEqual(len(calls), 5)
+    
+    def test_amazon_api_parse_namespaced_response(self):
+        """Test parsing a response that declares the API namespace"""
+        amazon_api = AmazonProductAPI("access", "secret", "tag")
+        response = (
+            b'<?xml version="1.0" encoding="UTF-8"?>'
+            b'<ItemSearchResponse xmlns="http://webservices.amazon.com/AWSECommerceService/2013-08-01">'
+            b'<Items><Item><ASIN>B01EXAMPLE</ASIN><SalesRank>1000</SalesRank>'
+            b'<ItemAttributes><Title>Amazon Test Product</Title><Feature>Feature 1</Feature>'
+            b'<ListPrice><Amount>2999</Amount></ListPrice></ItemAttributes></Item></Items>'
+            b'</ItemSearchResponse>'
+        )
+        
+        products = amazon_api._parse_item_search_response(response)
+        self.assertEqual(len(products), 1)
+        self.assertEqual(products[0].asin, "B01EXAMPLE")
+        self.assertEqual(products[0].price, 29.99)
+        self.assertEqual(products[0].sales_rank, 1000)
+        self.assertEqual(products[0].features, ["Feature 1"])
+    
+    def test_sales_rank_percentile_batch(self):
+        """Test batch sales rank percentiles against the per-product calculation"""
+        amazon_api = AmazonProductAPI("access", "secret", "tag")
+        ranks = [1000, 250000, 5000000, 0, 300]
+        categories = ["Books", "Electronics", "Toys", "Kitchen", "Unknown"]
+        
+        percentiles = amazon_api.get_sales_rank_percentile_batch(ranks, categories)
+        expected = [amazon_api.get_sales_rank_percentile(rank, category)
+                    for rank, category in zip(ranks, categories)]
+        self.assertEqual(percentiles.tolist(), expected)
+        
+        # Missing ranks are treated as invalid
+        self.assertEqual(amazon_api.get_sales_rank_percentile_batch([None], ["Books"]).tolist(), [100.0])
+    
+    def test_amazon_scraper_product_page(self):
+        """Test scraping a product page with mock HTML"""
+        page = (
+            '<html><body><span id="productTitle"> Amazon Test Product </span>'
+            '<div class="a-price"><span class="a-offscreen">$1,029.99</span></div>'
+            '<table id="productDetails_detailBullets_sections1"><tr><th>Best Sellers Rank</th>'
+            '<td>#1,234 in Toys &amp; Games</td></tr></table>'
+            '<span id="acrCustomerReviewText">1,024 ratings</span>'
+            '<span data-hook="rating-out-of-text">4.5 out of 5</span>'
+            '</body></html>'
+        )
+        response = unittest.mock.Mock(text=page, content=page.encode())
+        
+        with unittest.mock.patch.object(self.amazon_scraper.session, 'get', return_value=response):
+            product = self.amazon_scraper.get_product_by_asin("B01EXAMPLE")
+        
+        self.assertEqual(product.title, "Amazon Test Product")
+        self.assertEqual(product.price, 1029.99)
+        self.assertEqual(product.sales_rank, 1234)
+        self.assertEqual(product.review_count, 1024)
+        self.assertEqual(product.rating, 4.5)
+        
+        # Scraped products are cached, including in get_products_by_asins
+        with unittest.mock.patch.object(self.amazon_scraper.session, 'get') as get:
+            products = self.amazon_scraper.get_products_by_asins(["B01EXAMPLE", "B01EXAMPLE"])
+        self.assertEqual([product.asin for product in products], ["B01EXAMPLE", "B01EXAMPLE"])
+        get.assert_not_called()
+    
+    def test_amazon_scraper_json_ld(self):
+        """Test product pages with structured data are read without parsing the HTML"""
+        page = (
+            b'<html><head><script type="application/ld+json">'
+            b'{"@type": "Product", "name": "Amazon Test Product", "image": ["https://example.com/1.jpg"],'
+            b' "offers": {"@type": "Offer", "price": "29.99"},'
+            b' "aggregateRating": {"ratingValue": "4.5", "reviewCount": "15"}}'
+            b'</script></head><body><table><tr><th>Best Sellers Rank</th>'
+            b'<td>#1,234 in Toys &amp; Games</td></tr></table></body></html>'
+        )
+        response = unittest.mock.Mock(content=page)
+        
+        with unittest.mock.patch.object(self.amazon_scraper.session, 'get', return_value=response), \
+                unittest.mock.patch('src.amazon.amazon_api.lxml_html.fromstring') as fromstring:
+            product = self.amazon_scraper.get_product_by_asin("B01JSONLD")
+        
+        fromstring.assert_not_called()
+        self.assertEqual(product.title, "Amazon Test Product")
+        self.assertEqual(product.price, 29.99)
+        self.assertEqual(product.sales_rank, 1234)
+        self.assertEqual(product.review_count, 15)
+        self.assertEqual(product.rating, 4.5)
+        self.assertEqual(product.image_url, "https://example.com/1.jpg")
+    
+    def test_amazon_products_bulk_store(self):
+        """Test flattening Amazon products into rows and storing them in bulk"""
+        product = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=29.99,
+                                features=["Feature 1", "Feature 2"])
+        row = dict(zip(AmazonProduct.ROW_FIELDS, product.to_row()))
+        self.assertEqual(json.loads(row['features']), ["Feature 1", "Feature 2"])
+        
+        # Repeated ASINs are stored once, with the latest data
+        db = ProductDatabase(db_path=":memory:")
+        updated = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=24.99)
+        self.assertEqual(db.add_amazon_products([product, updated]), 1)
+        session = db.get_session()
+        stored = session.query(AmazonProductModel).all()
+        self.assertEqual([(model.asin, model.price) for model in stored], [("B01EXAMPLE", 24.99)])
+        session.close()
+    
+    def test_product_upserts(self):
+        """Test storing a product twice updates the row identified by its natural key"""
+        db = ProductDatabase(db_path=":memory:")
+        retail = RetailProduct(product_id="123", title="Test Product", price=10.99, original_price=19.99,
+                               url="https://www.walmart.com/ip/123", image_url="", store="Walmart")
+        amazon = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=29.99)
+        db.add_retail_product(retail)
+        db.add_amazon_product(amazon)
+        
+        retail.price = 8.99
+        amazon.price = 24.99
+        self.assertEqual(db.add_retail_product(retail).price, 8.99)
+        self.assertEqual(db.add_amazon_product(amazon).price, 24.99)
+        
+        session = db.get_session()
+        self.assertEqual([(model.product_id, model.store, model.price)
+                          for model in session.query(RetailProductModel)], [("123", "Walmart", 8.99)])
+        self.assertEqual([(model.asin, model.price)
+                          for model in session.query(AmazonProductModel)], [("B01EXAMPLE", 24.99)])
+        session.close()
+    
+    def test_product_cache_persists(self):
+        """Test product caches backed by a file survive a new client"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'products.db')
+            product = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=29.99)
+            AmazonProductAPI("access", "secret", "tag", cache_path=path).product_cache.set("item:B01EXAMPLE", product)
+            
+            amazon_api = AmazonProductAPI("access", "secret", "tag", cache_path=path)
+            amazon_api.amazon.ItemLookup = unittest.mock.Mock()
+            self.assertEqual(amazon_api.get_product_by_asin("B01EXAMPLE"), product)
+            amazon_api.amazon.ItemLookup.assert_not_called()
+    
+    @unittest.skipIf(httpx is None, "httpx not installed")
+    def test_amazon_scraper_async_search(self):
+        """Test async scraper search against a mocked transport"""
+        page = (
+            '<div data-asin="B01EXAMPLE"><h2><a><span>Amazon Test Product</span></a></h2>'
+            '<span class="a-price"><span class="a-offscreen">$29.99</span></span></div>'
+        )
+        requested = []
+        
+        def handler(request):
+            requested.append(str(request.url))
+            return httpx.Response(200, text=page)
+        
+        async def search():
+            self.amazon_scraper._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            self.amazon_scraper._async_loop = asyncio.get_running_loop()
+            try:
+                return await self.amazon_scraper.search_products_async("test product", limit=1)
+            finally:
+                await self.amazon_scraper.aclose()
+        
+        results = asyncio.run(search())
+        self.assertEqual(requested, ["https://www.amazon.com/s?k=test+product"])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].asin, "B01EXAMPLE")
+        self.assertEqual(results[0].price, 29.99)
+
+    
+    def test_lookup_cache(self):
+        """Test TTL cache for Amazon lookups"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        
+        # Equivalent queries share a key
+        self.assertEqual(normalize_query("Brand X Item"), normalize_query("brand x, item "))
+        
+        # Cached misses are distinguishable from absent keys
+        cache.set("missing", None)
+        self.assertEqual(cache.get("missing"), (True, None))
+        self.assertEqual(cache.get("unknown"), (False, None))
+        
+        # Least recently used entry is evicted
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("missing"), (False, None))
+        self.assertEqual(cache.get("b"), (True, 2))
+    
+    def test_lookup_cache_set_many(self):
+        """Test batched cache writes persist across instances"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.db")
+            cache = TTLCache(maxsize=10, ttl=60, path=path)
+            cache.set_many([(normalize_query("upc:123"), "by upc"), ("title:" + normalize_query("UPC 123"), None)])
+            cache._db.close()
+            
+            # Identifier and title keys stay apart even when their text normalizes alike
+            reopened = TTLCache(maxsize=10, ttl=60, path=path)
+            self.assertEqual(reopened.get("upc 123"), (True, "by upc"))
+            self.assertEqual(reopened.get("title:upc 123"), (True, None))
+            reopened._db.close()
 
 
 class TestProfitCalculator(unittest.TestCase):
@@ -236,6 +582,93 @@ class TestProfitCalculator(unittest.TestCase):
         self.assertEqual(opportunity.fulfillment_method, "FBA")
         self.assertGreater(opportunity.profit, 0)
         self.assertGreater(opportunity.roi, 0)
+    
+    def test_calculate_opportunities_bulk(self):
+        """Test bulk calculation matches per-product calculation"""
+        # Prices whose fees round differently if the percentage is applied in another order
+        prices = [(5.0, 20.0), (48.22, 26.63), (87.18, 90.31)]
+        pairs = []
+        for i, (buy_price, sell_price) in enumerate(prices):
+            retail_product = RetailProduct(
+                product_id=str(i),
+                title=f"Test Product {i}",
+                price=buy_price,
+                original_price=None,
+                url=f"https://www.walmart.com/ip/{i}",
+                image_url="",
+                store="Walmart"
+            )
+            amazon_product = AmazonProduct(
+                asin=f"B0{i}EXAMPLE",
+                title=f"Amazon Test Product {i}",
+                price=sell_price
+            )
+            pairs.append((retail_product, amazon_product))
+        
+        opportunities = self.calculator.calculate_opportunities_bulk(pairs, fulfillment_method="FBA")
+        
+        self.assertEqual(len(opportunities), 3)
+        for (retail_product, amazon_product), opportunity in zip(pairs, opportunities):
+            expected = self.calculator.calculate_opportunity(retail_product, amazon_product, fulfillment_method="FBA")
+            self.assertIs(opportunity.retail_product, retail_product)
+            self.assertEqual(opportunity.costs, expected.costs)
+            self.assertEqual(opportunity.profit, expected.profit)
+            self.assertEqual(opportunity.roi, expected.roi)
+    
+    def test_roi_threshold_is_inclusive(self):
+        """Test an opportunity exactly at the minimum ROI is kept"""
+        retail_product = RetailProduct(product_id="1", title="Test Product", price=1.01, original_price=None,
+                                       url="https://www.walmart.com/ip/1", image_url="", store="Walmart")
+        amazon_product = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=1.1)
+        opportunity = ArbitrageOpportunity(
+            retail_product=retail_product,
+            amazon_product=amazon_product,
+            costs=ArbitrageCosts(buy_price=1.01, amazon_fees=0.0, fulfillment_cost=0.0,
+                                 shipping_to_amazon=0.0, other_costs=0.0),
+            fulfillment_method="FBA"
+        )
+        
+        self.assertEqual(self.calculator.find_best_opportunities([opportunity], min_roi=opportunity.roi,
+                                                                 max_reviews=None), [opportunity])
+    
+    def test_opportunity_rebuilt_after_price_change(self):
+        """Test profit and ROI are fixed at creation and recomputed by rebuilding"""
+        retail_product = RetailProduct(product_id="1", title="Test Product", price=10.0, original_price=None,
+                                       url="https://www.walmart.com/ip/1", image_url="", store="Walmart")
+        amazon_product = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=30.0)
+        opportunity = self.calculator.calculate_opportunity(retail_product, amazon_product)
+        
+        # Costs and derived values cannot be changed in place
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            opportunity.costs.buy_price = 5.0
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            opportunity.roi = 100.0
+        
+        amazon_product.price = 40.0
+        rebuilt = dataclasses.replace(opportunity)
+        self.assertAlmostEqual(rebuilt.profit, opportunity.profit + 10.0)
+        self.assertGreater(rebuilt.roi, opportunity.roi)
+    
+    def test_min_retail_price_for_roi(self):
+        """Test the retail price cutoff is tight at the assumed markup"""
+        cutoff = self.calculator.min_retail_price_for_roi(40.0, max_markup=5.0)
+        self.assertGreater(cutoff, 0)
+        
+        retail_product = RetailProduct(
+            product_id="1",
+            title="Test Product",
+            price=cutoff,
+            original_price=None,
+            url="https://www.walmart.com/ip/1",
+            image_url="",
+            store="Walmart"
+        )
+        amazon_product = AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=cutoff * 5.0)
+        opportunity = self.calculator.calculate_opportunity(retail_product, amazon_product, fulfillment_method="FBA")
+        self.assertAlmostEqual(opportunity.roi, 40.0)
+        
+        # No price can reach an ROI above the markup itself
+        self.assertEqual(self.calculator.min_retail_price_for_roi(1000.0, max_markup=2.0), float('inf'))
 
 
 class TestProductFilter(unittest.TestCase):
@@ -305,6 +738,45 @@ class TestProductFilter(unittest.TestCase):
         # Test filtered opportunities
         self.assertEqual(len(filtered_opportunities), 1)
         self.assertEqual(filtered_opportunities[0], opportunity)
+    
+    def test_apply_all_filters_matches_individual_filters(self):
+        """Test the masked filters agree with chaining the individual filters"""
+        calculator = ProfitCalculator()
+        categories = ["Electronics", "Books", "Garden", None]
+        pairs = []
+        for i in range(40):
+            retail_product = RetailProduct(
+                product_id=str(i),
+                title=f"Test Product {i}",
+                price=3.0 + (i % 7),
+                original_price=None,
+                url=f"https://www.walmart.com/ip/{i}",
+                image_url="",
+                store="Walmart"
+            )
+            amazon_product = AmazonProduct(
+                asin=f"B0{i}EXAMPLE",
+                title=f"Amazon Test Product {i}",
+                price=15.0 + (i % 11) * 2,
+                category=categories[i % 4],
+                sales_rank=None if i % 5 == 0 else 500 * (i % 9) + 100,
+                review_count=None if i % 6 == 0 else (i * 3) % 40
+            )
+            pairs.append((retail_product, amazon_product))
+        opportunities = calculator.calculate_opportunities_bulk(pairs)
+        category_percentiles = SalesRankAnalyzer().get_category_percentiles()
+        
+        expected = self.product_filter.filter_by_roi(opportunities)
+        expected = self.product_filter.filter_by_profit(expected)
+        expected = self.product_filter.filter_by_reviews(expected)
+        expected = self.product_filter.filter_by_sales_rank(expected, category_percentiles)
+        expected.sort(key=lambda x: x.roi, reverse=True)
+        
+        filtered = self.product_filter.apply_all_filters(opportunities, category_percentiles)
+        
+        self.assertTrue(expected)
+        self.assertEqual([opp.retail_product.product_id for opp in filtered],
+                         [opp.retail_product.product_id for opp in expected])
 
 
 class TestDatabase(unittest.TestCase):
@@ -427,6 +899,83 @@ class TestListingGenerator(unittest.TestCase):
         
         # Test pricing
         self.assertGreater(listing['pricing']['suggested_price'], retail_product.price)
+    
+    def test_generate_listing_single_ai_request(self):
+        """Test AI fields come from one request, with templates filling in missing ones"""
+        generator = ListingContentGenerator(openai_api_key="test")
+        generator.client = unittest.mock.Mock()
+        message = unittest.mock.Mock(content=json.dumps({
+            "title": "Test Brand Test Product",
+            "bullet_points": ["- GREAT VALUE - Test bullet"]
+        }))
+        generator.client.chat.completions.create.return_value = unittest.mock.Mock(
+            choices=[unittest.mock.Mock(message=message)]
+        )
+        
+        retail_product = RetailProduct(
+            product_id="123",
+            title="Test Product",
+            brand="Test Brand",
+            category="Electronics",
+            price=10.99,
+            original_price=19.99,
+            url="https://www.walmart.com/ip/123",
+            image_url="https://www.walmart.com/ip/123.jpg",
+            store="Walmart"
+        )
+        listing = generator.generate_listing(retail_product)
+        
+        generator.client.chat.completions.create.assert_called_once()
+        self.assertEqual(listing['title'], "Test Brand Test Product")
+        self.assertEqual(listing['bullet_points'][0], "GREAT VALUE - Test bullet")
+        self.assertEqual(len(listing['bullet_points']), 5)
+        self.assertIn("Test Product", listing['description'])
+        self.assertIn("Test Product", listing['keywords'])
+        
+        # Repeating the product reuses the cached response
+        self.assertEqual(generator.generate_listing(retail_product)['title'], "Test Brand Test Product")
+        generator.client.chat.completions.create.assert_called_once()
+    
+    def test_generate_pricing_batch(self):
+        """Test that batch pricing matches per-product pricing"""
+        retail_product = RetailProduct(product_id="1", title="Test Product", price=10.99, original_price=19.99,
+                                       url="https://www.walmart.com/ip/1", image_url="", store="Walmart")
+        products = [
+            (retail_product, None),
+            (retail_product, AmazonProduct(asin="B01EXAMPLE", title="Amazon Test Product", price=24.99)),
+            (retail_product, AmazonProduct(asin="B02EXAMPLE", title="Amazon Test Product", price=0.0))
+        ]
+        
+        self.assertEqual(
+            self.generator.generate_pricing_batch(products),
+            [self.generator._generate_pricing_suggestions(retail, amazon) for retail, amazon in products]
+        )
+    
+    def test_get_default_generator(self):
+        """Test that the default generator is shared per set of arguments"""
+        self.assertIs(get_default_generator("test"), get_default_generator("test"))
+        self.assertIsNot(get_default_generator("test"), get_default_generator("other"))
+    
+    def test_generate_listings_batch(self):
+        """Test generating listings for many products concurrently, in order"""
+        generator = ListingContentGenerator(openai_api_key="test")
+        client = unittest.mock.Mock()
+        client.chat.completions.create = unittest.mock.AsyncMock(side_effect=lambda **request: unittest.mock.Mock(
+            choices=[unittest.mock.Mock(message=unittest.mock.Mock(content=json.dumps({
+                "title": request['messages'][-1]['content'].split('Product: ')[1].split('\n')[0]
+            })))]
+        ))
+        generator._get_async_client = lambda: client
+        
+        products = [
+            (RetailProduct(product_id=str(i), title=f"Test Product {i}", price=10.99, original_price=19.99,
+                           url=f"https://www.walmart.com/ip/{i}", image_url="", store="Walmart"), None)
+            for i in range(5)
+        ]
+        listings = asyncio.run(generator.generate_listings_batch(products, concurrency=2))
+        
+        self.assertEqual([listing['title'] for listing in listings], [f"Test Product {i}" for i in range(5)])
+        self.assertEqual(client.chat.completions.create.await_count, 5)
 
 
 def run_tests():